@@ -7,6 +7,8 @@ from tenacity import retry, stop_after_attempt, wait_exponential, retry_if_excep
 from utils import clean_json_response
 from perfil import get_candidate_prompt
 from upload_helper import enviar_mensaje_multimodal
+from chat_context import SesionChatAcotada
+from metrics import llamar_llm, contar_reintento_llm
 
 load_dotenv()
 client = genai.Client(api_key=os.getenv("GEMINI_API_KEY"))
@@ -17,7 +19,8 @@ client = genai.Client(api_key=os.getenv("GEMINI_API_KEY"))
 @retry(
     wait=wait_exponential(multiplier=1, min=4, max=60),
     stop=stop_after_attempt(3),
-    retry=(retry_if_exception_type(APIError))
+    retry=(retry_if_exception_type(APIError)),
+    before_sleep=contar_reintento_llm("pack")
 )
 def generar_pack_postulacion(vacante: dict) -> str:
     """
@@ -64,7 +67,8 @@ def generar_pack_postulacion(vacante: dict) -> str:
     )
 
     try:
-        response = client.models.generate_content(
+        response = llamar_llm(
+            "pack", client.models.generate_content,
             model="gemini-2.0-flash-exp",
             contents=[prompt]
         )
@@ -75,6 +79,7 @@ def generar_pack_postulacion(vacante: dict) -> str:
 def iniciar_chat(vacante: dict):
     """
     Inicia una sesión de chat interactiva con el Asesor usando el PROMPT PERSISTENTE v2.
+    El prompt (CV + vacante) queda fijado y los turnos antiguos se resumen al superar el presupuesto.
     """
     try:
         titulo = vacante.get("Título", "Vacante")
@@ -117,14 +122,11 @@ def iniciar_chat(vacante: dict):
             f"Comienza con el VEREDICTO."
         )
 
-        chat = client.chats.create(
-            model="gemini-2.0-flash-exp",
-            history=[
-                genai.types.Content(
-                    role="user",
-                    parts=[genai.types.Part.from_text(text=system_instruction)]
-                )
-            ]
+        # El CV y la vacante quedan fijos; el resto del historial se acota por presupuesto de tokens
+        chat = SesionChatAcotada(
+            client,
+            modelo="gemini-2.0-flash-exp",
+            contexto_fijo=system_instruction
         )
         return chat
     except Exception as e:
@@ -0,0 +1,175 @@
+"""
+Script: Chat_Context_Manager.py
+Purpose: Sesiones de chat con el Asesor con contexto acotado (presupuesto de tokens y resumen rodante).
+"""
+import time
+from typing import List, Dict, Any
+
+from google import genai
+
+from config import CHAT_PRESUPUESTO_TOKENS, CHAT_TURNOS_RECIENTES
+from metrics import llamar_llm
+
+# Heurística estándar para estimar tokens sin llamar a la API (se calibra con usage_metadata)
+CHARS_POR_TOKEN = 4
+# Costo aproximado de un adjunto (imagen/PDF) dentro del contexto
+TOKENS_POR_ADJUNTO = 1000
+
+
+class _Respuesta:
+    """Respuesta mínima compatible con la de chat.send_message (expone .text)."""
+
+    def __init__(self, text: str, stats: Dict[str, Any]):
+        self.text = text
+        self.stats = stats
+
+
+class SesionChatAcotada:
+    """
+    Reemplazo de client.chats.create que mantiene el historial bajo un presupuesto de tokens.
+
+    - El contexto fijo (CV + datos de la vacante) nunca se expulsa.
+    - Cuando el historial supera el presupuesto, los turnos más antiguos se resumen
+      con el modelo y se reemplazan por ese resumen.
+    - Los adjuntos de turnos antiguos se sustituyen por una referencia de texto.
+    - Cada turno registra tokens de entrada/salida y latencia en `estadisticas`.
+    """
+
+    def __init__(self, client, modelo: str, contexto_fijo: str,
+                 presupuesto_tokens: int = CHAT_PRESUPUESTO_TOKENS,
+                 turnos_recientes: int = CHAT_TURNOS_RECIENTES):
+        self.client = client
+        self.modelo = modelo
+        self.contexto_fijo = genai.types.Content(
+            role="user",
+            parts=[genai.types.Part.from_text(text=contexto_fijo)]
+        )
+        self.presupuesto_tokens = presupuesto_tokens
+        self.turnos_recientes = turnos_recientes
+        self.resumen = ""
+        self.historial: List[genai.types.Content] = []
+        self.estadisticas: List[Dict[str, Any]] = []
+        self._factor_calibracion = 1.0
+
+    # --- ESTIMACIÓN DE TOKENS ---
+    def _estimar_content(self, content) -> int:
+        total = 0
+        for part in content.parts or []:
+            if part.text:
+                total += len(part.text) // CHARS_POR_TOKEN + 1
+            elif part.inline_data or part.file_data:
+                total += TOKENS_POR_ADJUNTO
+        return int(total * self._factor_calibracion)
+
+    def tokens_contexto(self) -> int:
+        """Estimación de los tokens que se enviarán en el próximo turno."""
+        return sum(self._estimar_content(c) for c in self._contents_base())
+
+    def _contents_base(self) -> list:
+        contents = [self.contexto_fijo]
+        if self.resumen:
+            contents.append(genai.types.Content(
+                role="user",
+                parts=[genai.types.Part.from_text(text=f"RESUMEN DE LA CONVERSACIÓN PREVIA:\n{self.resumen}")]
+            ))
+        return contents + self.historial
+
+    # --- ENVÍO ---
+    def send_message(self, mensaje):
+        """Acepta un string, un Part o una lista de Parts (igual que chat.send_message)."""
+        if isinstance(mensaje, str):
+            parts = [genai.types.Part.from_text(text=mensaje)]
+        elif isinstance(mensaje, list):
+            parts = mensaje
+        else:
+            parts = [mensaje]
+
+        turno_usuario = genai.types.Content(role="user", parts=parts)
+        contents = self._contents_base() + [turno_usuario]
+        estimado = sum(self._estimar_content(c) for c in contents)
+
+        inicio = time.perf_counter()
+        response = llamar_llm("chat", self.client.models.generate_content, model=self.modelo, contents=contents)
+        latencia = time.perf_counter() - inicio
+
+        usage = getattr(response, "usage_metadata", None)
+        tokens_entrada = getattr(usage, "prompt_token_count", None) or estimado
+        tokens_salida = getattr(usage, "candidates_token_count", None) or 0
+
+        # Calibrar la heurística con el conteo real de la API
+        if usage and usage.prompt_token_count and estimado:
+            self._factor_calibracion *= usage.prompt_token_count / estimado
+
+        texto = response.text or ""
+        self.historial.append(turno_usuario)
+        self.historial.append(genai.types.Content(
+            role="model",
+            parts=[genai.types.Part.from_text(text=texto)]
+        ))
+
+        stats = {
+            "turno": len(self.estadisticas) + 1,
+            "tokens_entrada": tokens_entrada,
+            "tokens_salida": tokens_salida,
+            "latencia_s": round(latencia, 2),
+            "turnos_en_contexto": len(self.historial) // 2,
+            "resumido": bool(self.resumen),
+        }
+        self.estadisticas.append(stats)
+
+        self._compactar()
+        return _Respuesta(texto, stats)
+
+    # --- COMPACTACIÓN ---
+    def _quitar_adjuntos(self, content):
+        """Reemplaza los bytes/URIs de adjuntos por una referencia de texto."""
+        parts = []
+        for part in content.parts or []:
+            adjunto = part.inline_data or part.file_data
+            if adjunto:
+                parts.append(genai.types.Part.from_text(text=f"[Adjunto previo: {adjunto.mime_type}]"))
+            else:
+                parts.append(part)
+        return genai.types.Content(role=content.role, parts=parts)
+
+    def _resumir(self, turnos: list) -> str:
+        transcripcion = []
+        for c in turnos:
+            rol = "Candidato" if c.role == "user" else "Asesor"
+            texto = " ".join(p.text for p in c.parts or [] if p.text)
+            transcripcion.append(f"{rol}: {texto}")
+
+        prompt = (
+            "Resume la siguiente conversación entre un candidato y su asesor de carrera en máximo 200 palabras. "
+            "Conserva hechos concretos: decisiones, datos entregados por el candidato, gaps detectados y tareas pendientes.\n\n"
+            + (f"RESUMEN ANTERIOR:\n{self.resumen}\n\n" if self.resumen else "")
+            + "CONVERSACIÓN:\n" + "\n".join(transcripcion)
+        )
+        try:
+            response = llamar_llm("chat_summary", self.client.models.generate_content, model=self.modelo, contents=[prompt])
+            return (response.text or "").strip()
+        except Exception as e:
+            print(f"⚠️ No se pudo resumir el historial, se trunca: {e}")
+            return "\n".join(filter(None, [self.resumen] + transcripcion))[-CHARS_POR_TOKEN * 500:]
+
+    def _compactar(self):
+        minimo = self.turnos_recientes * 2
+
+        # 1. Los adjuntos fuera de la ventana reciente se reemplazan por referencias
+        for i in range(max(0, len(self.historial) - minimo)):
+            self.historial[i] = self._quitar_adjuntos(self.historial[i])
+
+        # 2. Si aún se excede el presupuesto, resumir los turnos más antiguos
+        if self.tokens_contexto() <= self.presupuesto_tokens or len(self.historial) <= minimo:
+            return
+
+        expulsados = self.historial[:-minimo]
+        self.historial = self.historial[-minimo:]
+        self.resumen = self._resumir(expulsados)
+
+    def resumen_estadisticas(self) -> str:
+        """Tabla de texto con las estadísticas de cada turno."""
+        lineas = ["TURNO | TOKENS ENTRADA | TOKENS SALIDA | LATENCIA"]
+        for s in self.estadisticas:
+            lineas.append(f"{s['turno']:>5} | {s['tokens_entrada']:>14} | {s['tokens_salida']:>13} | {s['latencia_s']:>7}s")
+        return "\n".join(lineas)
@@ -6,7 +6,9 @@ from dotenv import load_dotenv
 
 import hashlib
 import json
+from datetime import datetime
 from utils import clean_json_response
+from metrics import llamar_llm, LLM_REINTENTOS
 
 CACHE_FILE = os.path.join(os.path.dirname(__file__), "..", "cv_cache.json")
 
@@ -52,7 +54,8 @@ def analyze_cv_keywords(cv_text: str) -> List[str]:
     try:
         # Intentar con el modelo potente primero
         try:
-            response = client.models.generate_content(
+            response = llamar_llm(
+                "cv_keywords", client.models.generate_content,
                 model="gemini-2.0-flash-exp",
                 contents=[prompt],
                 config=genai.types.GenerateContentConfig(
@@ -62,7 +65,9 @@ def analyze_cv_keywords(cv_text: str) -> List[str]:
         except Exception as e:
             if "RESOURCE_EXHAUSTED" in str(e) or "429" in str(e):
                 print("⚠️ Quota excedida en Gemini 2.0. Cambiando a modelo de respaldo (Lite)...")
-                response = client.models.generate_content(
+                LLM_REINTENTOS.inc(operation="cv_keywords")
+                response = llamar_llm(
+                    "cv_keywords", client.models.generate_content,
                     model="gemini-1.5-flash", 
                     contents=[prompt],
                     config=genai.types.GenerateContentConfig(
@@ -95,29 +100,35 @@ def get_file_hash(filepath: str) -> str:
             hash_md5.update(chunk)
     return hash_md5.hexdigest()
 
-def load_keyword_cache(current_hash: str) -> List[str]:
-    """Carga keywords desde cache si el hash coincide."""
+def _leer_cache() -> dict:
+    """{hash_cv: {"keywords", "cached_at"}}; el formato antiguo (un solo CV) se convierte al vuelo."""
     if not os.path.exists(CACHE_FILE):
-        return []
-    
+        return {}
+    with open(CACHE_FILE, "r", encoding="utf-8") as f:
+        data = json.load(f)
+    if "file_hash" in data:
+        return {data["file_hash"]: {"keywords": data.get("keywords", []), "cached_at": data.get("cached_at", "")}}
+    return data.get("cvs", {})
+
+def load_keyword_cache(current_hash: str) -> List[str]:
+    """Carga keywords desde cache si hay una entrada para ese hash de CV (una por CV, ej: modo multi-candidato)."""
     try:
-        with open(CACHE_FILE, "r", encoding="utf-8") as f:
-            data = json.load(f)
-            if data.get("file_hash") == current_hash:
-                return data.get("keywords", [])
+        return _leer_cache().get(current_hash, {}).get("keywords", [])
     except Exception as e:
         print(f"⚠️ Error leyendo cache: {e}")
     return []
 
 def save_keyword_cache(keywords: List[str], current_hash: str):
-    """Guarda las keywords y el hash actual en cache."""
+    """Guarda las keywords del CV con ese hash, sin pisar las de otros CVs."""
     try:
-        with open(CACHE_FILE, "w", encoding="utf-8") as f:
-            json.dump({
-                "file_hash": current_hash,
-                "keywords": keywords,
-                "cached_at":  str(os.path.getmtime(CACHE_FILE) if os.path.exists(CACHE_FILE) else "")
-            }, f, indent=2)
+        try:
+            cvs = _leer_cache()
+        except Exception:
+            cvs = {}
+        cvs[current_hash] = {"keywords": keywords, "cached_at": datetime.now().isoformat(timespec="seconds")}
+        with open(CACHE_FILE + ".tmp", "w", encoding="utf-8") as f:
+            json.dump({"cvs": cvs}, f, indent=2, ensure_ascii=False)
+        os.replace(CACHE_FILE + ".tmp", CACHE_FILE)
     except Exception as e:
         print(f"⚠️ Error guardando cache: {e}")
 
@@ -1,27 +1,43 @@
+from contextlib import contextmanager
+
 from utils import cargar_texto_pdf
 from config import RUTA_CV
 
-_CACHE_PERFIL = None
+_CACHE_PERFIL = {}
+# CV en uso; el modo batch lo cambia por candidato con usar_cv()
+_RUTA_ACTIVA = RUTA_CV
+
+
+@contextmanager
+def usar_cv(ruta: str):
+    """Dentro del bloque, los prompts usan el CV de `ruta` (modo multi-candidato)."""
+    global _RUTA_ACTIVA
+    anterior, _RUTA_ACTIVA = _RUTA_ACTIVA, ruta
+    try:
+        yield
+    finally:
+        _RUTA_ACTIVA = anterior
+
 
 def cargar_perfil() -> str:
     """
-    Carga el texto del CV desde el archivo PDF definido en config.
-    Usa un cache simple para no releer el archivo si ya está en memoria.
+    Carga el texto del CV activo (por defecto, el definido en config).
+    Usa un cache simple por archivo para no releerlo si ya está en memoria.
     """
-    global _CACHE_PERFIL
-    if _CACHE_PERFIL:
-        return _CACHE_PERFIL
+    ruta = _RUTA_ACTIVA
+    if _CACHE_PERFIL.get(ruta):
+        return _CACHE_PERFIL[ruta]
     
     try:
-        texto = cargar_texto_pdf(RUTA_CV)
+        texto = cargar_texto_pdf(ruta)
         if not texto:
-            print(f"⚠️  Advertencia: El CV en {RUTA_CV} parece estar vacío o no se pudo leer.")
+            print(f"⚠️  Advertencia: El CV en {ruta} parece estar vacío o no se pudo leer.")
             return "Información de candidato no disponible."
         
-        _CACHE_PERFIL = texto
+        _CACHE_PERFIL[ruta] = texto
         return texto
     except Exception as e:
-        print(f"❌ Error crítico leyendo CV ({RUTA_CV}): {e}")
+        print(f"❌ Error crítico leyendo CV ({ruta}): {e}")
         return "Error leyendo CV."
 
 def get_candidate_prompt() -> str:
@@ -16,6 +16,7 @@ import os
 import time
 from utils import clean_json_response
 from perfil import get_candidate_prompt
+from metrics import llamar_llm, contar_reintento_llm
 
 load_dotenv() 
 
@@ -27,7 +28,10 @@ client = genai.Client(api_key=os.getenv("GEMINI_API_KEY"))
     wait=wait_exponential(multiplier=2, min=10, max=120), 
     stop=stop_after_attempt(8), 
     retry=(retry_if_exception_type(APIError)),
-    before_sleep=lambda retry_state: print(f"⏳ API saturada. Esperando para reintentar (Intento {retry_state.attempt_number})...")
+    before_sleep=lambda retry_state: (
+        contar_reintento_llm("analyze")(retry_state),
+        print(f"⏳ API saturada. Esperando para reintentar (Intento {retry_state.attempt_number})..."),
+    )
 )
 def analizar_vacante(desc: str, titulo:str) -> str:
     """
@@ -99,7 +103,8 @@ def analizar_vacante(desc: str, titulo:str) -> str:
     }
 
     # Eliminado try-except manual para permitir que Tenacity maneje los reintentos
-    response = client.models.generate_content(
+    response = llamar_llm(
+        "analyze", client.models.generate_content,
         model="gemini-2.0-flash-exp", 
         contents=[prompt],
         config=genai.types.GenerateContentConfig(
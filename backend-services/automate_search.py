@@ -1,6 +1,7 @@
 
 import os
 import sys
+import argparse
 
 # Ensure we can import from local modules
 BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
@@ -9,4 +10,25 @@ sys.path.append(os.path.join(BASE_DIR, "backend-services"))
 from job_search_engine import run_automated_search
 
 if __name__ == "__main__":
-    run_automated_search()
+    parser = argparse.ArgumentParser(description="Búsqueda automática de vacantes (cron o daemon).")
+    parser.add_argument("--resume", action="store_true",
+                        help="Retoma la última ejecución incompleta (salta etapas e ítems ya terminados)")
+    parser.add_argument("--run-id", help="ID de la ejecución a retomar (por defecto, la última incompleta)")
+    parser.add_argument("--profile", action="store_true",
+                        help="Perfila cada etapa: pilas plegadas, cProfile y tracemalloc en runs/<run_id>/profile")
+    parser.add_argument("--bounded-memory", action="store_true",
+                        help="Descripciones a disco (runs/<run_id>/descripciones.db): el pico de memoria no crece con los resultados")
+    parser.add_argument("--daemon", action="store_true",
+                        help="Proceso de larga vida: refresca cada (portal, keyword) según DAEMON_INTERVALOS_S")
+    parser.add_argument("--candidates", nargs="?", const="", metavar="JSON",
+                        help="Modo batch: una recolección compartida para los candidatos del JSON (default: CANDIDATOS_PATH)")
+    args = parser.parse_args()
+    if args.daemon:
+        from search_daemon import run_daemon
+        run_daemon()
+    elif args.candidates is not None:
+        from batch_candidates import run_batch
+        run_batch(args.candidates)
+    else:
+        run_automated_search(reanudar=args.resume, run_id=args.run_id, perfilar=args.profile,
+                             memoria_acotada=args.bounded_memory)
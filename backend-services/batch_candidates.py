@@ -0,0 +1,192 @@
+"""
+Script: Batch_Candidates.py
+Purpose: Modo batch para varios candidatos. En vez de una ejecución completa por persona (scraping,
+         keywords y hoja propias), se unen las keywords de todos en UNA sola recolección sin
+         duplicados y el resultado se reparte: cada candidato filtra por sus propias palabras de
+         relevancia, contra su propia base local, con packs escritos con su CV y su propio
+         spreadsheet como réplica.
+         Al final se reportan las búsquedas (portal, keyword) ahorradas frente a correr por separado.
+
+Archivo de candidatos (CANDIDATOS_PATH, JSON):
+    [
+      {"nombre": "Ana", "cv": "cvs/ana.pdf", "keywords": ["Data Engineer", "Airflow"]},
+      {"nombre": "Luis", "cv": "cvs/luis.pdf", "relevancia": ["python", "django"], "sheet": "Vacantes Luis"}
+    ]
+    keywords:   búsquedas del candidato (si faltan: las de su CV, cacheadas por hash; si no, PALABRAS_CLAVE)
+    relevancia: palabras del filtro rápido (si faltan: sus keywords)
+    sheet / db: spreadsheet y base local propios (por defecto "<SHEET_NAME> - <nombre>" y
+                CANDIDATOS_DIR/<nombre>/vacantes.db)
+"""
+import os
+import re
+import json
+from datetime import datetime
+from typing import Dict, List
+
+import ui
+from config import (
+    CANDIDATOS_PATH, CANDIDATOS_DIR, SHEET_NAME, PALABRAS_CLAVE, RUNS_DIR,
+    REPLICA_ESPERA_CIERRE_S, BIGQUERY_HABILITADO,
+)
+from perfil import usar_cv
+from metrics import registro, medir_cpu
+from vacancy_store import VacancyStore
+from sheets_manager import aplanar_y_normalizar, conectar_sheets
+from sheets_replicator import ReplicadorSheets
+from bigquery_sink import publicar_en_bigquery
+from history_dataset import escribir_historial
+from cv_analysis import get_file_hash, load_keyword_cache, save_keyword_cache, extract_text_from_pdf, analyze_cv_keywords
+from job_search_engine import (
+    PORTALES_ACTIVOS, recoleccion_de_vacantes, filtrar_vacantes, generar_packs, guardar_vacantes,
+    conectar_store, limpiar_keywords,
+)
+
+
+def _slug(nombre: str) -> str:
+    return re.sub(r"[^\w-]+", "_", nombre.strip().lower()).strip("_") or "candidato"
+
+
+def _keywords_del_cv(ruta_cv: str) -> List[str]:
+    """
+    Keywords del CV del candidato: de la cache (una entrada por hash de CV) o, la primera vez,
+    extraídas con IA y guardadas para las próximas ejecuciones.
+    """
+    if not ruta_cv or not os.path.exists(ruta_cv):
+        return []
+    try:
+        hash_cv = get_file_hash(ruta_cv)
+        keywords = load_keyword_cache(hash_cv)
+        if not keywords:
+            ui.console.print(f"📄 Extracting keywords from {ruta_cv}...")
+            keywords = analyze_cv_keywords(extract_text_from_pdf(ruta_cv))
+            if keywords:
+                save_keyword_cache(keywords, hash_cv)
+        return keywords
+    except Exception as e:
+        ui.console.print(f"⚠️ Error reading CV keywords ({ruta_cv}): {e}")
+    return []
+
+
+def cargar_candidatos(ruta: str = CANDIDATOS_PATH) -> List[Dict]:
+    """Lee y completa los perfiles (keywords, relevancia, sheet, db y carpeta de packs)."""
+    with open(ruta, "r", encoding="utf-8") as f:
+        perfiles = json.load(f)
+
+    candidatos, slugs = [], set()
+    for p in perfiles:
+        nombre = (p.get("nombre") or "").strip()
+        if not nombre or not p.get("cv"):
+            raise ValueError(f"{ruta}: cada candidato necesita 'nombre' y 'cv'")
+        slug = _slug(nombre)
+        if slug in slugs:
+            raise ValueError(f"{ruta}: candidato repetido '{nombre}'")
+        slugs.add(slug)
+
+        keywords = p.get("keywords") or _keywords_del_cv(p.get("cv"))
+        if not keywords:
+            ui.console.print(f"⚠️ {nombre}: no keywords in profile or CV, using the default PALABRAS_CLAVE.")
+            keywords = PALABRAS_CLAVE
+        directorio = os.path.join(CANDIDATOS_DIR, slug)
+        candidatos.append({
+            "nombre": nombre,
+            "slug": slug,
+            "cv": p.get("cv"),
+            "keywords": limpiar_keywords(keywords),
+            "relevancia": p.get("relevancia") or keywords,
+            "sheet": p.get("sheet") or f"{SHEET_NAME} - {nombre}",
+            "db": p.get("db") or os.path.join(directorio, "vacantes.db"),
+            "recomendaciones": os.path.join(directorio, "recomendaciones"),
+        })
+    return candidatos
+
+
+def busquedas_ahorradas(candidatos: List[Dict], keywords_union: List[str], portales: int = None) -> Dict:
+    """Búsquedas (portal, keyword) por separado vs. compartidas."""
+    portales = portales or len(PORTALES_ACTIVOS)
+    separadas = sum(len(c["keywords"]) for c in candidatos) * portales
+    compartidas = len(keywords_union) * portales
+    return {"separadas": separadas, "compartidas": compartidas, "ahorradas": separadas - compartidas}
+
+
+def procesar_candidato(c: Dict, vacantes: List[Dict], run_id: str) -> Dict:
+    """Filtro, packs y publicación de un candidato sobre su copia de la recolección compartida."""
+    ui.console.print(f"\n👤 [bold]{c['nombre']}[/bold] ({len(c['keywords'])} keywords)")
+    os.makedirs(os.path.dirname(os.path.abspath(c["db"])), exist_ok=True)
+    obtener_hoja = lambda: conectar_sheets(c["sheet"])
+    store, hoja = conectar_store(VacancyStore(c["db"]), obtener_hoja)
+    if store is None:
+        return {"nombre": c["nombre"], "error": "local store empty and Sheets unavailable"}
+
+    replicador = ReplicadorSheets(store, (lambda: hoja) if hoja else obtener_hoja).iniciar()
+    resultado = {"nombre": c["nombre"], "keywords": len(c["keywords"]), "relevantes": 0, "guardadas": 0}
+    try:
+        relevantes = filtrar_vacantes(vacantes, store.urls(), palabras_relevantes=c["relevancia"])
+        # Ranking: más keywords del candidato coincidentes primero (los packs salen en ese orden)
+        relevantes.sort(key=lambda v: len(v["top_skills"].split(", ")), reverse=True)
+        resultado["relevantes"] = len(relevantes)
+        if not relevantes:
+            return resultado
+
+        with usar_cv(c["cv"]):
+            generar_packs(relevantes, auto_mode=True, dir_recomendaciones=c["recomendaciones"])
+
+        resultado["guardadas"] = guardar_vacantes(store, relevantes)
+        replicador.notificar()
+        try:
+            escribir_historial(relevantes, f"{run_id}-{c['slug']}")
+        except Exception as e:
+            ui.console.print(f"⚠️ HISTORY NOT WRITTEN: {e}")
+        if BIGQUERY_HABILITADO:
+            try:
+                publicar_en_bigquery(relevantes, run_id=f"{run_id}-{c['slug']}")
+            except Exception as e:
+                ui.console.print(f"⚠️ BIGQUERY LOAD FAILED, BATCH KEPT FOR NEXT RUN: {e}")
+    finally:
+        with ui.status_context(f"SYNCING {c['nombre'].upper()} TO CLOUD"):
+            replicador.detener(espera_max=REPLICA_ESPERA_CIERRE_S)
+    return resultado
+
+
+def run_batch(ruta: str = None):
+    ruta = ruta or CANDIDATOS_PATH
+    ui.console.print("\n👥 STARTING MULTI-CANDIDATE BATCH 👥")
+    run_id = f"batch-{datetime.now().strftime('%Y%m%dT%H%M%S')}"
+    candidatos = cargar_candidatos(ruta)
+    if not candidatos:
+        ui.console.print(f"⚠️ NO CANDIDATES IN {ruta}.")
+        return
+
+    # 1. Una sola recolección con la unión de keywords
+    keywords_union = limpiar_keywords([k for c in candidatos for k in c["keywords"]])
+    ahorro = busquedas_ahorradas(candidatos, keywords_union)
+    ui.console.print(f"[dim]{len(candidatos)} candidates, {len(keywords_union)} distinct keywords "
+                     f"({ahorro['compartidas']} searches instead of {ahorro['separadas']}).[/dim]")
+    with medir_cpu("collect"):
+        resultados_crudos = aplanar_y_normalizar(recoleccion_de_vacantes(keywords_custom=keywords_union))
+
+    # 2. Reparto: cada candidato filtra su propia copia (el filtro agrega campos a cada vacante)
+    resumen = []
+    for c in candidatos:
+        try:
+            with medir_cpu(f"candidate-{c['slug']}"):
+                resumen.append(procesar_candidato(c, [dict(v) for v in resultados_crudos], run_id))
+        except Exception as e:
+            ui.console.print(f"❌ ERROR PROCESSING {c['nombre']}: {e}")
+            resumen.append({"nombre": c["nombre"], "error": str(e)})
+
+    for r in resumen:
+        detalle = r.get("error") or f"{r['relevantes']} relevant, {r['guardadas']} new"
+        ui.console.print(f"  👤 {r['nombre']}: {detalle}")
+    ui.console.print(f"♻️  [bold]{ahorro['ahorradas']}[/bold] scrape requests saved by sharing the collection "
+                     f"({ahorro['compartidas']} made vs {ahorro['separadas']} in separate runs).")
+
+    directorio = os.path.join(RUNS_DIR, run_id)
+    os.makedirs(directorio, exist_ok=True)
+    with open(os.path.join(directorio, "batch.json"), "w", encoding="utf-8") as f:
+        json.dump({"run_id": run_id, "recolectadas": len(resultados_crudos), "busquedas": ahorro,
+                   "candidatos": resumen}, f, ensure_ascii=False, indent=2)
+    try:
+        registro.exportar(json_path=os.path.join(directorio, "metrics.json"))
+    except OSError as e:
+        ui.console.print(f"⚠️ METRICS NOT WRITTEN: {e}")
+    ui.console.print("\n👥 BATCH COMPLETE. BYE! 👋")
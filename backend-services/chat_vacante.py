@@ -2,83 +2,111 @@ import os
 import sys
 import glob
 import time
-import json
-from src.asesor import iniciar_chat, generar_pack_postulacion, enviar_mensaje_multimodal
-from src.sheets_manager import conectar_sheets, actualizar_estado, actualizar_sheet
-from src.linkedin_jobs import extraer_datos_vacante
-from src.analizador_vacantes import analizar_vacante
 
-def obtener_vacantes_pendientes(sheet):
-    """Obtiene vacantes con Match % = 'Pendiente' o vacío."""
-    # Usamos get_all_values para evitar error de "duplicate headers" si hay columnas vacías
-    todas_las_filas = sheet.get_all_values()
-    
-    # La fila 1 es metadata ("Última actualización..."), la fila 2 son los HEADERS
-    if len(todas_las_filas) < 3:
-        return []
-        
-    headers = todas_las_filas[1]
-    data = []
-    
-    # Mapeo manual (Datos desde fila 3 en adelante)
-    for i, row in enumerate(todas_las_filas[2:]):
-        item = {}
-        for j, h in enumerate(headers):
-            if h and j < len(row): # Solo columnas con nombre
-                item[h] = row[j]
-        
-        # Agregar índice real (i + 3 porque row 1 metadata, row 2 headers, i0 based)
-        item["_row_idx"] = i + 3
-        data.append(item)
-    
-    pendientes = []
-    
-    for row in data:
-        start_date = row.get("Fecha de Registro", "")
-        # Filtrado simple: Si no tiene Match % calculado o dice Pendiente
-        match_val = str(row.get("Match %", "")).strip()
-        
-        # Lógica: Si es Pendiente, vacio, o 0.
-        if match_val in ["Pendiente", "", "0"]:
-            pendientes.append(row)
-            
-    # Ordenar las últimas primero
-    return pendientes[::-1]
+# --- ENTERPRISE PATH SETUP ---
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(os.path.join(BASE_DIR, "infrastructure"))
+sys.path.append(os.path.join(BASE_DIR, "data-engineering"))
+sys.path.append(os.path.join(BASE_DIR, "ai-automations"))
+sys.path.append(os.path.join(os.path.dirname(__file__), "src"))
+
+from advisor import iniciar_chat, enviar_mensaje_multimodal
+from config import REPLICA_ESPERA_CIERRE_S
+from sheets_manager import conectar_sheets
+from vacancy_store import VacancyStore, HEADER_A_CAMPO, clave_vacante
+from sheets_replicator import ReplicadorSheets
+import sheet_snapshot
+from sheets_scheduler import planificador
+from linkedin_jobs import extraer_datos_vacante
+from prefetch_vacantes import PrefetcherVacantes, analizar_y_empaquetar
+from upload_helper import GestorAdjuntos, SubidorGemini
+
 
-def procesar_vacante_seleccionada(vacante, sheet):
+def mostrar_stats_turno(stats: dict):
+    """Imprime tokens de entrada/salida y latencia del último turno."""
+    if not stats:
+        return
+    extra = " (+resumen)" if stats.get("resumido") else ""
+    print(
+        f"   📊 Turno {stats['turno']} | entrada: {stats['tokens_entrada']} tokens | "
+        f"salida: {stats['tokens_salida']} | {stats['latencia_s']}s | "
+        f"contexto: {stats['turnos_en_contexto']} turnos{extra}"
+    )
+
+def obtener_vacantes_pendientes(store):
+    """
+    Obtiene vacantes sin analizar (Match % = 'Pendiente' o vacío), las últimas primero.
+    Un 0 es un resultado real y no vuelve a la cola.
+    Lee de la base local (sin red); Sheets es solo una réplica.
+    """
+    return store.pendientes_match()
+
+def campos_enriquecimiento(vacante, data_analisis) -> dict:
+    """
+    Campos de la base local a actualizar con el resultado del análisis IA.
+    Los análisis fallidos no se guardan (la vacante sigue pendiente y se reintenta).
+    """
+    if data_analisis.get("error"):
+        return {}
+    campos = {
+        "match_percent": data_analisis.get("match_percent", ""),
+        "match_reason": data_analisis.get("match_reason", ""),
+    }
+    if vacante.get("Título") in ("Cargo Manual", "", None):
+        campos["titulo"] = data_analisis.get("titulo_vacante", vacante.get("Título"))
+    if vacante.get("Empresa") in ("Empresa Manual", "", None):
+        campos["empresa"] = data_analisis.get("empresa", vacante.get("Empresa"))
+    return campos
+
+def guardar_analisis(store, resultados) -> int:
+    """
+    Guarda en bloque [(vacante, resultado)] en la base local; la réplica escribe todas las
+    filas en Sheets en un mismo batchUpdate (columnas resueltas por encabezado).
+    Retorna cuántas vacantes salieron de la cola de pendientes.
+    """
+    guardadas = 0
+    for vacante, resultado in resultados:
+        campos = campos_enriquecimiento(vacante, resultado["data_analisis"])
+        if vacante.get("_clave") and campos and store.actualizar_campos(vacante["_clave"], **campos):
+            guardadas += 1
+    return guardadas
+
+def procesar_vacante_seleccionada(vacante, store=None, prefetcher=None):
     """
     1. Analiza la vacante con IA
     2. Genera Pack
-    3. Actualiza Sheet
+    3. Guarda Match %, título y empresa en la base local (se replican a Sheets)
     4. Retorna contexto para chat
+    Si hay un prefetcher, usa el resultado pre-calculado en segundo plano.
     """
     print(f"\n🧠 Analizando a fondo: {vacante.get('Título')} @ {vacante.get('Empresa')}...")
     
-    # 1. Análisis Técnico
-    description_to_analyze = vacante.get("Descripción", "")
-    analisis_json = analizar_vacante(description_to_analyze, vacante.get("Título", ""))
-    
-    # Parsear para actualizar sheet
     try:
-        data_analisis = json.loads(analisis_json)
+        if prefetcher is not None:
+            if prefetcher.listo(vacante):
+                print("⚡ Resultado pre-calculado en segundo plano.")
+            resultado = prefetcher.obtener(vacante)
+        else:
+            resultado = analizar_y_empaquetar(vacante)
+
+        data_analisis = resultado["data_analisis"]
+        pack_content = resultado["pack"]
         match_pct = data_analisis.get("match_percent", 0)
 
+        # Guardar el análisis: la vacante sale de la cola de pendientes y no se re-analiza
+        if store is not None:
+            guardar_analisis(store, [(vacante, resultado)])
+
         # Actualizar datos si son genéricos (Extracción automática)
         if vacante.get("Título") == "Cargo Manual":
              vacante["Título"] = data_analisis.get("titulo_vacante", "Cargo Manual")
         
         if vacante.get("Empresa") == "Empresa Manual":
              vacante["Empresa"] = data_analisis.get("empresa", "Empresa Manual")
-        
-        # 2. Generar Pack (Carta, Tips)
-        print("📝 Redactando estrategia de postulación...")
-        pack_content = generar_pack_postulacion({
-            "titulo": vacante.get("Título"),
-            "empresa": vacante.get("Empresa"),
-            "descripcion": "Revisar link para detalle", # El asesor ya tiene el contexto del análisis
-            "url": vacante.get("URL"),
-            "analisis_previo": analisis_json
-        })
+
+        # Para vacantes nuevas (link/texto) el match se guarda junto con ellas
+        if not data_analisis.get("error"):
+            vacante["Match %"] = match_pct
         
         # Guardar en archivo
         dir_reco = os.path.join(os.path.dirname(__file__), "recomendaciones")
@@ -91,9 +119,6 @@ def procesar_vacante_seleccionada(vacante, sheet):
             
         print(f"✅ Pack guardado en: recomendaciones/{filename}")
         
-        # 3. Actualizar Sheet (Opcional, si queremos guardar el resultado)
-        # Nota: Escribir en una celda específica requiere coordenadas.
-        # Por simplicidad ahora, solo mostramos el resultado.
         print(f"🎯 Match IA calculado: {match_pct}%")
         
         return pack_content
@@ -107,14 +132,25 @@ def main():
     print("---------------------------------------")
     print("Conectando con tu base de vacantes...")
     
+    store = VacancyStore()
+    sheet = None
     try:
         sheet = conectar_sheets()
-        vacantes = obtener_vacantes_pendientes(sheet)
+        if store.contar() == 0:
+            importadas = store.importar_desde_hoja(sheet_snapshot.leer_filas(sheet))
+            print(f"Base local inicializada desde Sheets: {importadas} vacantes.")
     except Exception as e:
-        print(f"❌ Error leyendo Excel: {e}")
-        return
+        print(f"⚠️ Sheets no disponible, usando base local: {e}")
+
+    # Los cambios (vacantes guardadas, estados) se replican a Sheets en segundo plano
+    replicador = ReplicadorSheets(store, (lambda: sheet) if sheet else conectar_sheets).iniciar()
+    vacantes = obtener_vacantes_pendientes(store)
 
     print(f"\nSe encontraron {len(vacantes)} vacantes pendientes.")
+
+    # Pre-análisis en segundo plano del top-N mientras el usuario elige
+    prefetcher = PrefetcherVacantes()
+    prefetcher.iniciar(vacantes[:10])
     
     # Menu Principal
     # Menu Principal Loop
@@ -128,7 +164,8 @@ def main():
         # Mostrar menú (Top 10)
         top_n = vacantes[:10]
         for i, v in enumerate(top_n):
-            print(f" [{i+1}] {v.get('Título')} - {v.get('Empresa')} (📍 {v.get('Ubicación')})")
+            listo = " ⚡" if prefetcher.listo(v) else ""
+            print(f" [{i+1}] {v.get('Título')} - {v.get('Empresa')} (📍 {v.get('Ubicación')}){listo}")
 
         opcion_raw = input("\nElige opción: ").strip().lower()
         
@@ -136,6 +173,8 @@ def main():
         modo_link = False
 
         if opcion_raw == "0":
+            prefetcher.cerrar()
+            replicador.detener(espera_max=REPLICA_ESPERA_CIERRE_S)
             return
         elif opcion_raw == "l":
             modo_link = True
@@ -154,7 +193,7 @@ def main():
                 "Ubicación": datos_scraped.get("ubicacion"),
                 "URL": datos_scraped.get("url"),
                 "Descripción": datos_scraped.get("descripcion"),
-                "Match %": "Nuevo",
+                "Match %": "",  # Sin analizar: si el análisis falla, queda en la cola de pendientes
                 "_row_idx": None # No está en sheet aún
             }
             break # Exit menu loop to process
@@ -190,7 +229,7 @@ def main():
                 "Ubicación": "Manual",
                 "URL": "Texto Pegado",
                 "Descripción": desc_full,
-                "Match %": "Nuevo",
+                "Match %": "",  # Sin analizar: si el análisis falla, queda en la cola de pendientes
                 "_row_idx": None
             }
             break # Exit menu loop to process
@@ -204,12 +243,30 @@ def main():
                 print("❌ Opción inválida. Intenta de nuevo.")
                 # Loop continues automatically
 
-    # Procesar
-    pack_generado = procesar_vacante_seleccionada(target_vacante, sheet)
+    # Procesar (las vacantes no elegidas se cancelan dentro del prefetcher)
+    if modo_link:
+        pack_generado = procesar_vacante_seleccionada(target_vacante)
+    else:
+        pack_generado = procesar_vacante_seleccionada(target_vacante, store, prefetcher)
+
+    # Los pre-análisis que alcanzaron a terminar también se guardan (ya se pagaron)
+    otras = [(v, r) for v, r in prefetcher.completados() if v.get("_clave") != target_vacante.get("_clave")]
+    guardadas = guardar_analisis(store, otras)
+    if guardadas:
+        print(f"💾 {guardadas} análisis adicionales guardados (salen de la cola de pendientes).")
+    prefetcher.cerrar()
+    replicador.notificar()
     
     # Iniciar Chat
     print("\n💬 Iniciando Chat con el Asesor (Modo Elite)...")
     chat_session = iniciar_chat(target_vacante)
+    if chat_session is None:
+        # iniciar_chat ya imprimió el error; el pack quedó guardado en recomendaciones/
+        print("❌ No se pudo iniciar el chat con el asesor.")
+        replicador.detener(espera_max=REPLICA_ESPERA_CIERRE_S)
+        return
+    # Los adjuntos se suben una vez por contenido y luego se envían como referencia
+    gestor_adjuntos = GestorAdjuntos(SubidorGemini(chat_session.client))
     
     # Primera interacción automática para obtener el veredicto
     try:
@@ -235,69 +292,85 @@ def main():
     try:
         resp = chat_session.send_message("Dame el veredicto según las instrucciones.")
         print(f"\n{resp.text}")
+        mostrar_stats_turno(resp.stats)
     except Exception as e:
         print(f"Error obteniendo respuesta inicial: {e}")
-        
-        while True:
-            user_input = input("\n👤 Tú: ")
-            if user_input.lower() in ["salir", "exit", "chau"]:
-                print("👋 ¡Éxito en tu postulación!")
-                break
-            
-            archivo_adjunto = None
-            mensaje_usuario = user_input
-            
-            # Detectar comando /adjuntar o /foto
-            if user_input.startswith(("/adjuntar", "/foto", "/attach")):
-                parts = user_input.split(" ", 1)
-                if len(parts) > 1:
-                    path_raw = parts[1].strip()
-                    # Limpiar comillas si el usuario arrastró el archivo
-                    path_raw = path_raw.replace('"', '').replace("'", "")
-                    archivo_adjunto = path_raw
-                    mensaje_usuario = "He adjuntado un archivo para que lo analices."
-                    print(f"📎 Adjuntando: {archivo_adjunto}")
-                else:
-                    print("⚠️ Uso: /adjuntar <ruta_del_archivo>")
-                    continue
 
-            try:
-                if archivo_adjunto:
-                    resp_text = enviar_mensaje_multimodal(chat_session, mensaje_usuario, archivo_adjunto)
-                else:
-                    resp = chat_session.send_message(mensaje_usuario)
-                    resp_text = resp.text
-                    
-                print(f"\n🤖 Asesor: {resp_text}")
-            except Exception as e:
-                print(f"Error: {e}")
+    while True:
+        user_input = input("\n👤 Tú: ")
+        if user_input.lower() in ["salir", "exit", "chau"]:
+            print(gestor_adjuntos.resumen())
+            print("👋 ¡Éxito en tu postulación!")
+            break
 
-        # --- SEGUIMIENTO (LINK vs EXISTENTE) ---
-        if modo_link:
-             guardar = input("\n¿Quieres GUARDAR esta vacante en tu Excel? [S/N]: ").lower()
-             if guardar == "s":
-                 # Convertir keys para sheet manager
-                 vacante_fmt = {k.lower(): v for k,v in target_vacante.items() if k != "_row_idx"}
-                 vacante_fmt["fecha_busqueda"] = "Manual"
-                 actualizar_sheet(sheet, [vacante_fmt])
-                 print("✅ Vacante guardada. (Aparecerá en la lista la próxima vez)")
+        if user_input.strip().lower() == "/stats":
+            print(chat_session.resumen_estadisticas())
+            print(gestor_adjuntos.resumen())
+            continue
+
+        archivo_adjunto = None
+        mensaje_usuario = user_input
+
+        # Detectar comando /adjuntar o /foto
+        if user_input.startswith(("/adjuntar", "/foto", "/attach")):
+            parts = user_input.split(" ", 1)
+            if len(parts) > 1:
+                path_raw = parts[1].strip()
+                # Limpiar comillas si el usuario arrastró el archivo
+                path_raw = path_raw.replace('"', '').replace("'", "")
+                archivo_adjunto = path_raw
+                mensaje_usuario = "He adjuntado un archivo para que lo analices."
+                print(f"📎 Adjuntando: {archivo_adjunto}")
+            else:
+                print("⚠️ Uso: /adjuntar <ruta_del_archivo>")
+                continue
+
+        try:
+            if archivo_adjunto:
+                resp_text = enviar_mensaje_multimodal(chat_session, mensaje_usuario, archivo_adjunto, gestor=gestor_adjuntos)
+            else:
+                resp = chat_session.send_message(mensaje_usuario)
+                resp_text = resp.text
+
+            print(f"\n🤖 Asesor: {resp_text}")
+            if chat_session.estadisticas:
+                mostrar_stats_turno(chat_session.estadisticas[-1])
+        except Exception as e:
+            print(f"Error: {e}")
+
+    # --- SEGUIMIENTO (LINK vs EXISTENTE) ---
+    if modo_link:
+         guardar = input("\n¿Quieres GUARDAR esta vacante en tu Excel? [S/N]: ").lower()
+         if guardar == "s":
+             # Convertir keys de la hoja a campos de la base local
+             vacante_fmt = {HEADER_A_CAMPO[k]: v for k, v in target_vacante.items() if k in HEADER_A_CAMPO}
+             vacante_fmt["fecha_busqueda"] = "Manual"
+             store.insertar_nuevas([vacante_fmt])
+             replicador.notificar()
+             target_vacante["_clave"] = clave_vacante(vacante_fmt)
+             print("✅ Vacante guardada. (Aparecerá en la lista la próxima vez)")
+    
+    # Solo ofrecemos tracking si la vacante está en la base
+    if target_vacante.get("_clave"):
+        print("\n📊 SEGUIMIENTO:")
+        print("¿Qué harás con esta vacante?")
+        opcion = input("[P]ostulado ✅  | [D]escartar ❌  | [M]antener Pendiente ⏳ : ").lower()
         
-        # Solo ofrecemos tracking si tiene una fila asociada
-        if target_vacante.get("_row_idx"):
-            print("\n📊 SEGUIMIENTO:")
-            print("¿Qué harás con esta vacante?")
-            opcion = input("[P]ostulado ✅  | [D]escartar ❌  | [M]antener Pendiente ⏳ : ").lower()
+        nuevo_estado = ""
+        if opcion.startswith("p"):
+            nuevo_estado = "Postulado"
+        elif opcion.startswith("d"):
+            nuevo_estado = "Rechazado"
             
-            nuevo_estado = ""
-            if opcion.startswith("p"):
-                nuevo_estado = "Postulado"
-            elif opcion.startswith("d"):
-                nuevo_estado = "Rechazado"
-                
-            if nuevo_estado:
-                actualizar_estado(target_vacante["_row_idx"], nuevo_estado)
-            else:
-                print("👌 Manteniendo en Pendiente.")
+        if nuevo_estado:
+            store.actualizar_campos(target_vacante["_clave"], estado=nuevo_estado)
+            replicador.notificar()
+            print(f"✅ Estado actualizado: {nuevo_estado}")
+        else:
+            print("👌 Manteniendo en Pendiente.")
+
+    replicador.detener(espera_max=REPLICA_ESPERA_CIERRE_S)
+    print(planificador.resumen())
 
 if __name__ == "__main__":
     main()
@@ -6,10 +6,13 @@ Author: Iván Durán
 import os
 import sys
 import json
+import time
 import traceback
 from time import sleep
+from datetime import datetime
+from functools import partial
 from concurrent.futures import ThreadPoolExecutor, as_completed
-from typing import List, Dict, Any
+from typing import Any, Dict, Iterable, Iterator, List
 import questionary
 
 # --- ENTERPRISE PATH SETUP ---
@@ -21,11 +24,27 @@ sys.path.append(os.path.join(os.path.dirname(__file__), "src"))
 
 # Infrastructure Imports
 import ui
-from config import PALABRAS_CLAVE, RUTA_CV
-from utils import es_vacante_valida
+from config import (
+    PALABRAS_CLAVE, RUTA_CV, RUNS_DIR, REPLICA_ESPERA_CIERRE_S, ARCHIVO_RETENCION_DIAS, BIGQUERY_HABILITADO,
+    CPU_POOL_WORKERS, CPU_POOL_LOTE, CPU_POOL_MINIMO_FILTRO, MEMORIA_ACOTADA_LOTE,
+)
+from utils import evaluar_vacante
+from cpu_pool import mapear
 
 # Data Engineering Imports
-from sheets_manager import aplanar_y_normalizar, conectar_sheets, preparar_hoja, actualizar_sheet, registrar_actualizacion, obtener_urls_existentes
+from sheets_manager import aplanar_y_normalizar, conectar_sheets, preparar_hoja
+from vacancy_store import VacancyStore
+from sheets_replicator import ReplicadorSheets
+import sheet_snapshot
+from sheets_scheduler import planificador
+from sheet_archive import archivar_vacantes
+from bigquery_sink import publicar_en_bigquery, escribir_lote
+from history_dataset import escribir_historial
+from run_checkpoint import RunCheckpoint
+from description_store import DescripcionStore, CAMPO_REF
+import tracing
+from profiling import Perfilador
+from metrics import registro, cronometro, medir_cpu, PORTAL_LATENCIA, PORTAL_ERRORES, VACANTES_ETAPA, FILTRO_DESCARTES
 
 # AI Automation Imports
 from vacancy_analyzer import analizar_vacante
@@ -37,6 +56,8 @@ from getonbrd import buscar_vacantes_getonbrd
 from linkedin_jobs import buscar_vacantes_linkedin
 
 
+DIR_RECOMENDACIONES = os.path.join(os.path.dirname(__file__), "recomendaciones")
+
 PORTALES_ACTIVOS = [
     ("GetOnBrd", buscar_vacantes_getonbrd),
     ("LinkedIn", buscar_vacantes_linkedin),
@@ -44,30 +65,65 @@ PORTALES_ACTIVOS = [
 ]
 
 
-def recoleccion_de_vacantes(keywords_custom: List[str] = None) -> List[Dict[str, Any]]:
+def buscar_en_portal(portal_nombre: str, portal_func, keyword: str) -> List[Dict[str, Any]]:
+    """Una búsqueda (portal, keyword) con latencia y errores en métricas; abre la traza de cada vacante."""
+    inicio = time.time()
+    with cronometro(PORTAL_LATENCIA, PORTAL_ERRORES, portal=portal_nombre):
+        vacantes = portal_func(keyword)
+    fin = time.time()
+    for v in vacantes or []:
+        if isinstance(v, dict):
+            tracing.registrar(v, "collect", inicio, fin, portal=portal_nombre, keyword=keyword, results=len(vacantes))
+    return vacantes
+
+
+def limpiar_keywords(keywords_custom: List[str] = None) -> List[str]:
+    """Keywords a buscar (las de config si no se pasan), sin espacios ni duplicados."""
+    keywords_to_use = keywords_custom if keywords_custom else PALABRAS_CLAVE
+    return list(set([k.strip() for k in keywords_to_use if k and k.strip()]))
+
+
+def recoleccion_de_vacantes(keywords_custom: List[str] = None, checkpoint: RunCheckpoint = None,
+                            descripciones: DescripcionStore = None, portales: List = None,
+                            fallidas: List[str] = None) -> List[Dict[str, Any]]:
     """
     Recolecta vacantes usando concurrencia anidada (por portal y por keyword).
-    Si keywords_custom es None, usa las de config.
+    Si keywords_custom es None, usa las de config; si `portales` es None, PORTALES_ACTIVOS.
+    Con `checkpoint`, cada (portal, keyword) terminado queda en disco y al reanudar no se repite.
+    Con `descripciones` (memoria acotada), cada resultado deja su descripción en disco al llegar.
+    `fallidas` acumula las búsquedas ("portal|keyword") que terminaron en error.
     """
     resultados_raw = []
     
-    keywords_to_use = keywords_custom if keywords_custom else PALABRAS_CLAVE
-    
-    # Deduplicar y limpiar
-    keywords_to_use = list(set([k.strip() for k in keywords_to_use if k and k.strip()]))
+    keywords_to_use = limpiar_keywords(keywords_custom)
+    portales = portales or PORTALES_ACTIVOS
 
+    hechas = checkpoint.items("collect") if checkpoint else {}
     tareas_con_keywords = []
-    for portal_nombre, portal_func in PORTALES_ACTIVOS:
+    for portal_nombre, portal_func in portales:
         for keyword in keywords_to_use:
-            tareas_con_keywords.append((portal_nombre, portal_func, keyword))
+            clave = f"{portal_nombre}|{keyword}"
+            if clave in hechas:
+                resultados_raw.extend(hechas[clave] or [])
+            else:
+                tareas_con_keywords.append((portal_nombre, portal_func, keyword))
+    if hechas:
+        ui.console.print(f"↩️  [dim]{len(hechas)} searches restored from checkpoint, {len(tareas_con_keywords)} pending.[/dim]")
 
-    ui.console.print(f"🔍 SEARCHING IN {len(PORTALES_ACTIVOS)} PORTALS FOR {len(keywords_to_use)} KEYWORDS...")
+    ui.console.print(f"🔍 SEARCHING IN {len(portales)} PORTALS FOR {len(keywords_to_use)} KEYWORDS...")
     # ui.console.print(f"   [dim]Keywords: {', '.join(keywords_to_use)}[/dim]")
 
+    def buscar(portal_nombre, portal_func, keyword):
+        vacantes = buscar_en_portal(portal_nombre, portal_func, keyword)
+        # Memoria acotada: se derrama en el mismo hilo, antes de que el resultado espere en su future
+        if vacantes and descripciones is not None:
+            descripciones.derramar(vacantes)
+        return vacantes
+
     with ui.status_context("SEARCHING WEB FOR VACANCIES") as status:
         with ThreadPoolExecutor(max_workers=10) as executor:
             future_to_task = {
-                executor.submit(portal_func, keyword): (portal_nombre, keyword)
+                executor.submit(buscar, portal_nombre, portal_func, keyword): (portal_nombre, keyword)
                 for portal_nombre, portal_func, keyword in tareas_con_keywords
             }
 
@@ -77,8 +133,12 @@ def recoleccion_de_vacantes(keywords_custom: List[str] = None) -> List[Dict[str,
                     vacantes_encontradas = future.result()
                     if vacantes_encontradas:
                         resultados_raw.extend(vacantes_encontradas)
+                    if checkpoint:
+                        checkpoint.registrar_item("collect", f"{portal_nombre}|{keyword}", vacantes_encontradas or [])
                 except Exception as e:
                     ui.console.print(f"❌ ERROR IN {portal_nombre} ('{keyword}'): {e}")
+                    if fallidas is not None:
+                        fallidas.append(f"{portal_nombre}|{keyword}")
 
     return resultados_raw
 
@@ -86,194 +146,491 @@ def procesar_vacantes(resultados_raw: List[Dict[str, Any]], urls_existentes: set
     """
     Normaliza, aplica la deduplicación, y realiza el análisis CONCURRENTE (IA).
     """
-    
-    
-    with ui.status_context("PROCESSING AND NORMALIZING DATA"):
-        vacantes_normalizadas = aplanar_y_normalizar(resultados_raw)
+    vacantes_a_analizar = filtrar_vacantes(resultados_raw, urls_existentes)
+    if vacantes_a_analizar:
+        generar_packs(vacantes_a_analizar, auto_mode=auto_mode)
+    return vacantes_a_analizar
 
-        vacantes_unicas = {}
-        vacantes_sin_url = []
-        vacantes_descartadas = 0
 
-        # from src.utils import es_vacante_valida (Moved to top) 
+def en_lotes(items: Iterable, tamano: int) -> Iterator[list]:
+    """Agrupa `items` en listas de `tamano` (la última puede quedar más corta)."""
+    lote = []
+    for item in items:
+        lote.append(item)
+        if len(lote) >= tamano:
+            yield lote
+            lote = []
+    if lote:
+        yield lote
 
-        for vacante in vacantes_normalizadas:
-            # 0. FILTRO PREVIO (Exclusión/Inclusión)
-            if not es_vacante_valida(vacante.get("titulo"), vacante.get("descripcion")):
-                vacantes_descartadas += 1
+
+def filtrar_en_flujo(vacantes: Iterable[Dict[str, Any]], urls_existentes: set = frozenset(),
+                     conteo: Dict[str, int] = None, palabras_relevantes: Iterable[str] = None,
+                     descripciones: DescripcionStore = None) -> Iterator[Dict[str, Any]]:
+    """
+    Filtro en flujo (no retiene más que las URLs vistas y un lote): palabras excluidas/requeridas,
+    URL repetida (gana la primera), ya existente y relevancia por keywords (PALABRAS_CLAVE si no
+    se pasan `palabras_relevantes`). Entrega las nuevas y relevantes con match_percent "Pendiente".
+    `conteo` acumula cuántas cayeron en cada filtro.
+    Los filtros de palabras (solo CPU) se evalúan por lotes en cpu_pool; dedupe y existentes, en orden acá.
+    Con `descripciones`, el texto de las vacantes derramadas se carga solo mientras se evalúa su lote.
+    """
+    conteo = conteo if conteo is not None else {}
+    for clave in ("collected", "excluded_words", "duplicate_url", "already_stored", "no_keyword_match", "relevant"):
+        conteo.setdefault(clave, 0)
+
+    # Palabras clave extra para validar relevancia (ordenadas: mismo resultado en cualquier proceso)
+    keywords_relevantes = tuple(sorted(set([item.lower() for item in (palabras_relevantes or PALABRAS_CLAVE)])))
+    evaluar = partial(evaluar_vacante, palabras_relevantes=keywords_relevantes)
+    urls_vistas = set()
+
+    # Lotes de al menos CPU_POOL_MINIMO_FILTRO: con menos, mapear los evalúa en línea y el pool no se usa
+    tamano_lote = max(CPU_POOL_MINIMO_FILTRO, CPU_POOL_LOTE * max(1, CPU_POOL_WORKERS))
+    for lote in en_lotes((v for v in vacantes if isinstance(v, dict)), tamano_lote):
+        for vacante in lote:
+            vacante['url'] = vacante.get('url', '')
+            if CAMPO_REF not in vacante:
+                vacante['descripcion'] = vacante.get('descripcion', '')
+        textos = descripciones.hidratar(lote) if descripciones is not None else lote
+        inicio = time.time()
+        evaluaciones = mapear(evaluar, [{"titulo": v.get("titulo"), "descripcion": v["descripcion"]} for v in textos],
+                              minimo=CPU_POOL_MINIMO_FILTRO)
+        del textos
+        fin = time.time()
+
+        for vacante, (valida, matches) in zip(lote, evaluaciones):
+            conteo["collected"] += 1
+
+            # 0. FILTRO PREVIO (Exclusión/Inclusión); el span cubre la evaluación del lote
+            tracing.registrar(vacante, "filter.words", inicio, fin, kept=valida, batch=len(lote))
+            if not valida:
+                conteo["excluded_words"] += 1
+                tracing.cerrar(vacante, "dropped", filter="excluded_words")
                 continue
 
             url = vacante.get("url")
             if url and url.strip():
-                vacantes_unicas[url] = vacante
-            else:
-                vacantes_sin_url.append(vacante)
-            
-    ui.console.print(f"🧹 [dim]Vacantes descartadas por filtro de palabras: {vacantes_descartadas}[/dim]")
+                if url in urls_vistas:
+                    # Misma URL = misma traza: queda registrado que llegó repetida
+                    conteo["duplicate_url"] += 1
+                    tracing.registrar(vacante, "filter.dedupe", time.time(), time.time(), crear=False, duplicate=True)
+                    continue
+                urls_vistas.add(url)
+
+            if url in urls_existentes:
+                conteo["already_stored"] += 1
+                tracing.cerrar(vacante, "dropped", filter="already_stored")
+                continue
 
-    vacantes_finales = list(vacantes_unicas.values()) + vacantes_sin_url
+            # FILTRADO RÁPIDO (SIN IA): al menos 1 palabra clave fuerte
+            tracing.registrar(vacante, "filter.relevance", inicio, fin, score=len(matches), batch=len(lote))
+            if not matches:
+                conteo["no_keyword_match"] += 1
+                tracing.cerrar(vacante, "dropped", filter="no_keyword_match")
+                continue
 
-    ui.console.print(f"📊 Vacantes ÚNICAS encontradas: [bold]{len(vacantes_finales)}[/bold]")
+            vacante["match_percent"] = "Pendiente"
+            vacante["match_reason"] = f"Keywords: {', '.join(matches[:3])}"
+            vacante["seniority_estimado"] = "N/A"
+            vacante["top_skills"] = ", ".join(matches)
+            conteo["relevant"] += 1
+            yield vacante
 
-    vacantes_a_analizar = []
-    for v in vacantes_finales:
-        if v.get("url") not in urls_existentes:
-            vacantes_a_analizar.append(v)
-        else:
-            pass
-            
-    nuevas_count = len(vacantes_a_analizar)
-    repetidas_count = len(vacantes_finales) - nuevas_count
-    
-    ui.console.print(f"♻️  [dim]Ya existían en base de datos: {repetidas_count}[/dim]")
-    
-    if not vacantes_a_analizar:
-        ui.console.print("⚠️ NO NEW VACANCIES TO ANALYZE.")
-        return []
-    
-    ui.console.print(f"🆕 [bold green]Nuevas vacantes a analizar: {nuevas_count}[/bold green]")
+    _registrar_metricas_filtro(conteo)
 
-    # --- NUEVA LÓGICA: FILTRADO RÁPIDO (SIN IA) ---
-    ui.console.print("\n⚡ FILTERING BY RELEVANCE...")
-    
-    # Palabras clave extra para validar relevancia
-    KEYWORDS_RELEVANTES = set([item.lower() for item in PALABRAS_CLAVE])
-    
-    vacantes_filtradas = []
 
-    # Barra de progreso simple para el filtrado
+def _registrar_metricas_filtro(conteo: Dict[str, int]):
+    validas = conteo["collected"] - conteo["excluded_words"]
+    unicas = validas - conteo["duplicate_url"]
+    nuevas = unicas - conteo["already_stored"]
+    for etapa, n in (("collected", conteo["collected"]), ("valid", validas), ("unique", unicas),
+                     ("new", nuevas), ("relevant", conteo["relevant"])):
+        VACANTES_ETAPA.inc(n, stage=etapa)
+    for filtro in ("excluded_words", "duplicate_url", "already_stored", "no_keyword_match"):
+        FILTRO_DESCARTES.inc(conteo[filtro], filter=filtro)
+
+
+def filtrar_vacantes(resultados_raw: List[Dict[str, Any]], urls_existentes: set = set(),
+                     palabras_relevantes: Iterable[str] = None, descripciones: DescripcionStore = None) -> List[Dict[str, Any]]:
+    """
+    Normaliza, filtra por palabras, deduplica contra lo existente y puntúa relevancia por keywords.
+    Retorna las vacantes nuevas y relevantes (con match_percent "Pendiente").
+    """
+    with ui.status_context("PROCESSING AND NORMALIZING DATA"):
+        vacantes_normalizadas = aplanar_y_normalizar(resultados_raw)
+
+    conteo = {}
     with ui.status_context("EVALUATING RELEVANCE"):
-        for vacante in vacantes_a_analizar:
-            texto_completo = (vacante.get("titulo", "") + " " + vacante.get("descripcion", "")).lower()
-            
-            # Scoring simple
-            score = 0
-            matches = []
-            for kw in KEYWORDS_RELEVANTES:
-                if kw in texto_completo:
-                    score += 1
-                    matches.append(kw)
-            
-            # Umbral: Al menos 1 palabra clave fuerte
-            if score > 0:
-                vacante["match_percent"] = "Pendiente" 
-                vacante["match_reason"] = f"Keywords: {', '.join(matches[:3])}"
-                vacante["seniority_estimado"] = "N/A"
-                vacante["top_skills"] = ", ".join(matches)
-                vacantes_filtradas.append(vacante)
-            else:
-                 # ui.console.print(f"[dim]🗑️ Descartando: {vacante.get('titulo')}[/dim]")
-                 pass
-    
-    vacantes_a_analizar = vacantes_filtradas
+        vacantes_a_analizar = list(filtrar_en_flujo(vacantes_normalizadas, urls_existentes, conteo, palabras_relevantes, descripciones))
+
+    unicas = conteo["collected"] - conteo["excluded_words"] - conteo["duplicate_url"]
+    ui.console.print(f"🧹 [dim]Vacantes descartadas por filtro de palabras: {conteo['excluded_words']}[/dim]")
+    ui.console.print(f"📊 Vacantes ÚNICAS encontradas: [bold]{unicas}[/bold]")
+    ui.console.print(f"♻️  [dim]Ya existían en base de datos: {conteo['already_stored']}[/dim]")
+
+    if unicas == conteo["already_stored"]:
+        ui.console.print("⚠️ NO NEW VACANCIES TO ANALYZE.")
+        return []
+
+    ui.console.print(f"🆕 [bold green]Nuevas vacantes a analizar: {unicas - conteo['already_stored']}[/bold green]")
     ui.console.print(f"✅ Vacantes relevantes tras filtro: [bold]{len(vacantes_a_analizar)}[/bold]")
+    return vacantes_a_analizar
+
 
-    # --- FASE 2: GENERACIÓN DE PACK DE POSTULACIÓN (Asesor) ---
+def generar_pack(v: Dict[str, Any], dir_recomendaciones: str):
+    """
+    Pack de postulación de una vacante en dir_recomendaciones (si ya existe, no se regenera).
+    Retorna (nombre de archivo, True si se generó ahora); (None, False) si el LLM falló.
+    """
+    # Si pasó el filtro de keywords es un candidato potencial: 'match_percent' aún es "Pendiente",
+    # así que no se filtra por puntaje acá.
+    empresa = v.get("empresa", "Empresa").replace("/", "-").strip()
+    titulo = v.get("titulo", "Rol").replace("/", "-").strip()
+    filename = f"{empresa}_{titulo}.md"
+    filepath = os.path.join(dir_recomendaciones, filename)
+
+    generado = False
+    if not os.path.exists(filepath):
+        try:
+            with tracing.span(v, "llm.pack") as atributos:
+                pack_content = generar_pack_postulacion(v)
+                atributos["attempts"] = getattr(generar_pack_postulacion, "statistics", {}).get("attempt_number", 1)
+            with open(filepath, "w", encoding="utf-8") as f:
+                f.write(pack_content)
+            generado = True
+        except Exception as e:
+            ui.console.print(f"⚠️ ERROR GENERATING PACK FOR {titulo}: {e}")
+            return None, False
+    VACANTES_ETAPA.inc(stage="packed")
+    return filename, generado
+
+
+def generar_packs(vacantes_a_analizar: List[Dict[str, Any]], auto_mode: bool = False, checkpoint: RunCheckpoint = None,
+                  dir_recomendaciones: str = DIR_RECOMENDACIONES, descripciones: DescripcionStore = None):
+    """
+    FASE 2: genera el pack de postulación de cada vacante (se omiten los que ya existen).
+    Con `checkpoint`, cada vacante terminada queda registrada y al reanudar se salta.
+    Con `descripciones`, la descripción de cada vacante se carga solo para su prompt.
+    """
     if auto_mode or ui.confirmar_accion(f"GENERATE APPLICATION PACKS FOR {len(vacantes_a_analizar)} VACANCIES?"):
         ui.console.print("\n🧠 GENERATING STRATEGIES...")
         
-        dir_recomendaciones = os.path.join(os.path.dirname(__file__), "recomendaciones")
         os.makedirs(dir_recomendaciones, exist_ok=True)
 
         count_generados = 0
+        hechas = checkpoint.items("pack") if checkpoint else {}
         with ui.status_context("WRITING LETTERS AND ANALYZING"):
             for v in vacantes_a_analizar:
-                # Aquí asumimos que si pasó el filtro de keywords es un candidato potencial,
-                # pero idealmente tendríamos un score numérico real. 
-                # Simulemos un score alto para procesar o usar lógica previa.
-                # En el código original se usaba match_pct >= 70. 
-                # Como 'match_percent' es "Pendiente", este bloque original podría fallar si comparamos strings.
-                # Vamos a forzar el intento si pasó el filtro de keywords.
-                
-                empresa = v.get("empresa", "Empresa").replace("/", "-").strip()
-                titulo = v.get("titulo", "Rol").replace("/", "-").strip()
-                filename = f"{empresa}_{titulo}.md"
-                filepath = os.path.join(dir_recomendaciones, filename)
-
-                if not os.path.exists(filepath):
-                    try:
-                        pack_content = generar_pack_postulacion(v)
-                        with open(filepath, "w", encoding="utf-8") as f:
-                            f.write(pack_content)
-                        count_generados += 1
-                    except Exception as e:
-                        ui.console.print(f"⚠️ ERROR GENERATING PACK FOR {titulo}: {e}")
+                clave_item = v.get("url") or f"{v.get('empresa')}|{v.get('titulo')}"
+                if clave_item in hechas:
+                    continue
+                if descripciones is not None:
+                    v = descripciones.hidratar([v])[0]
+                filename, generado = generar_pack(v, dir_recomendaciones)
+                if filename is None:
+                    continue
+                count_generados += generado
+                if checkpoint:
+                    checkpoint.registrar_item("pack", clave_item, filename)
         
         ui.console.print(f"✨ Se generaron [bold]{count_generados}[/bold] nuevos packs de postulación.")
 
-    return vacantes_a_analizar
-
 
-def run_automated_search():
+def guardar_vacantes(store: VacancyStore, vacantes: List[Dict[str, Any]], descripciones: DescripcionStore = None) -> int:
     """
-    Runs the job search process largely unattended.
-    Intended for cron jobs or background execution.
+    Inserta en la base local (Sheets se replica aparte); cierra la traza de cada vacante como 'stored'.
+    Con `descripciones`, se inserta por lotes de MEMORIA_ACOTADA_LOTE con el texto cargado.
     """
-    ui.console.print("\n🤖 STARTING AUTOMATED JOB SEARCH ENGINE 🤖")
-    
-    # 1. Connect to Sheets
+    inicio = time.time()
+    if descripciones is None:
+        guardadas = store.insertar_nuevas(vacantes)
+    else:
+        guardadas = sum(store.insertar_nuevas(descripciones.hidratar(lote))
+                        for lote in en_lotes(vacantes, MEMORIA_ACOTADA_LOTE))
+    fin = time.time()
+    VACANTES_ETAPA.inc(guardadas, stage="stored")
+    for v in vacantes:
+        tracing.registrar(v, "publish.store", inicio, fin, batch=len(vacantes))
+        tracing.cerrar(v, "stored")
+    return guardadas
+
+
+def sembrar_store(store: VacancyStore, hoja):
+    """Primera ejecución con base local vacía: importa el historial existente de la hoja."""
+    if store.contar() == 0:
+        importadas = store.importar_desde_hoja(sheet_snapshot.leer_filas(hoja))
+        ui.console.print(f"[dim]Local store initialised from Sheets: {importadas} vacancies.[/dim]")
+
+
+def conectar_store(store: VacancyStore = None, obtener_hoja=conectar_sheets):
+    """
+    Local store (primary) + Sheets hoja for the write-behind replica.
+    Returns (store, hoja); hoja is None when Sheets is down, and store is None when there is
+    no local history either (without it duplicates can't be checked).
+    """
+    store = store or VacancyStore()
+    hoja = None
     try:
         ui.console.print("[dim]Connecting to Google Sheets...[/dim]")
-        hoja = conectar_sheets()
+        hoja = obtener_hoja()
         preparar_hoja(hoja)
-        urls_existentes = obtener_urls_existentes(hoja)
+        sembrar_store(store, hoja)
     except Exception as e:
-        ui.console.print(f"❌ ERROR CONNECTING TO SHEETS: {e}")
-        # In automation, if we can't connect to DB to check duplicates, 
-        # we might risk duplicates or just fail. Let's return to avoid mess.
-        return
+        ui.console.print(f"⚠️ SHEETS UNAVAILABLE, USING LOCAL STORE: {e}")
+        if store.contar() == 0:
+            # Without any history we can't check duplicates. Return to avoid mess.
+            ui.console.print("❌ LOCAL STORE IS EMPTY, CANNOT DEDUPLICATE. ABORTING.")
+            return None, None
+    return store, hoja
 
-    # 2. Get Keywords (Prefer Cache, else Config)
-    keywords_dinamicas = []
+
+def keywords_automaticas() -> List[str]:
+    """Keywords for unattended runs: CV cache if valid, else [] (recoleccion falls back to config)."""
     if os.path.exists(RUTA_CV):
         try:
             current_cv_hash = get_file_hash(RUTA_CV)
             cached_keywords = load_keyword_cache(current_cv_hash)
             if cached_keywords:
                 ui.console.print(f"⚡ Keywords from cache: {', '.join(cached_keywords)}")
-                keywords_dinamicas = cached_keywords
-            else:
-                 # If no cache, we don't want to block on AI analysis of CV in automation 
-                 # unless we implement a non-interactive version. 
-                 # For now, fallback to config PALABRAS_CLAVE is safer or just None (which uses config).
-                 ui.console.print("⚠️ CV changed or not cached. Using default config keywords.")
+                return cached_keywords
+            # If no cache, we don't want to block on AI analysis of CV in automation
+            # unless we implement a non-interactive version.
+            ui.console.print("⚠️ CV changed or not cached. Using default config keywords.")
         except Exception as e:
             ui.console.print(f"⚠️ Error reading CV cache: {e}")
+    return []
+
+
+def exportar_metricas(checkpoint: RunCheckpoint):
+    """Modo cron: textfile Prometheus (METRICAS_TEXTFILE_PATH) + metrics.json en el directorio de la ejecución."""
+    try:
+        rutas = registro.exportar(json_path=os.path.join(checkpoint.dir, "metrics.json"))
+        ui.console.print(f"[dim]Metrics: {', '.join(rutas)}[/dim]")
+    except OSError as e:
+        ui.console.print(f"⚠️ METRICS NOT WRITTEN: {e}")
+
+
+def finalizar_trazas():
+    resumen = tracing.finalizar()
+    if resumen:
+        perdidas = f", [bold]{resumen['perdidas']} lost[/bold]" if resumen["perdidas"] else ""
+        ui.console.print(f"[dim]Traces: {resumen['vacantes']} vacancies, {resumen['spans']} spans -> {resumen['destino']}[/dim]{perdidas}")
+
+
+def abrir_descripciones(checkpoint: RunCheckpoint, memoria_acotada: bool):
+    """
+    DescripcionStore de la ejecución (runs/<run_id>/descripciones.db) en modo memoria acotada.
+    Si la ejecución empezó en ese modo, se abre igual al reanudarla (sus checkpoints traen referencias).
+    """
+    ruta = os.path.join(checkpoint.dir, "descripciones.db")
+    if memoria_acotada or os.path.exists(ruta):
+        return DescripcionStore(ruta)
+    return None
+
+
+def publicar_historial(vacantes: List[Dict[str, Any]], run_id: str, descripciones: DescripcionStore = None,
+                       intento: int = None):
+    """
+    Parquet local; con `descripciones`, por lotes hidratados. `intento` separa los archivos de una
+    ejecución reanudada, que solo trae las vacantes de las búsquedas repetidas.
+    """
+    if descripciones is None:
+        escribir_historial(vacantes, run_id, intento=intento)
+        return
+    for parte, lote in enumerate(en_lotes(vacantes, MEMORIA_ACOTADA_LOTE)):
+        escribir_historial(descripciones.hidratar(lote), run_id, parte=parte, intento=intento)
+
+
+def publicar_bigquery(vacantes: List[Dict[str, Any]], run_id: str, descripciones: DescripcionStore = None,
+                      checkpoint: RunCheckpoint = None):
+    """
+    Escribe el lote de la ejecución (por partes en memoria acotada) y carga todos los pendientes.
+    Con `checkpoint`, "lote escrito" queda registrado aparte de "cargado": si la carga falla, el lote
+    sigue pendiente en disco y al reanudar no se escribe otro con las mismas filas.
+    """
+    if checkpoint is None or "bigquery_lote" not in checkpoint.items("publish"):
+        if descripciones is None:
+            if vacantes:
+                escribir_lote(vacantes, run_id)
+        else:
+            for parte, lote in enumerate(en_lotes(vacantes, MEMORIA_ACOTADA_LOTE)):
+                escribir_lote(descripciones.hidratar(lote), run_id, parte=parte)
+        if checkpoint is not None:
+            checkpoint.registrar_item("publish", "bigquery_lote")
+    publicar_en_bigquery([], run_id=run_id)
+
+
+def pico_memoria_mb() -> float:
+    """Pico de RSS del proceso (Unix); None donde `resource` no existe."""
+    try:
+        import resource
+    except ImportError:
+        return None
+    pico = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return round(pico / (2 ** 20 if sys.platform == "darwin" else 2 ** 10), 1)
+
+
+def run_automated_search(reanudar: bool = False, run_id: str = None, perfilar: bool = False, memoria_acotada: bool = False):
+    """
+    Runs the job search process largely unattended.
+    Intended for cron jobs or background execution.
+    Every stage (collect, filter, pack, publish) is checkpointed under RUNS_DIR/<run_id>;
+    with `reanudar` the last unfinished run continues where it stopped.
+    With `perfilar` each stage is profiled into RUNS_DIR/<run_id>/profile (see profiling.py).
+    With `memoria_acotada` descriptions are spilled to disk as they arrive (see description_store.py).
+    """
+    ui.console.print("\n🤖 STARTING AUTOMATED JOB SEARCH ENGINE 🤖")
+    checkpoint = RunCheckpoint.abrir(reanudar=reanudar, run_id=run_id)
+    ui.console.print(f"[dim]Run ID: {checkpoint.run_id}[/dim]")
+    tracing.iniciar(checkpoint.run_id)
+    perfil = Perfilador(os.path.join(checkpoint.dir, "profile"), activo=perfilar)
+    descripciones = abrir_descripciones(checkpoint, memoria_acotada)
+    
+    # 1. Local store (primary) + Sheets as write-behind replica
+    with perfil.etapa("setup"):
+        store, hoja = conectar_store()
+    if store is None:
+        tracing.finalizar()
+        perfil.cerrar()
+        if descripciones is not None:
+            descripciones.cerrar()
+        return
+
+    replicador = ReplicadorSheets(store, (lambda: hoja) if hoja else conectar_sheets).iniciar()
+    urls_existentes = store.urls()
+
+    # 2. Get Keywords (Prefer Cache, else Config)
+    keywords_dinamicas = keywords_automaticas()
     
     # 3. Search
     # If keywords_dinamicas is empty, recoleccion uses defaults from config.
-    resultados_crudos = recoleccion_de_vacantes(keywords_custom=keywords_dinamicas)
+    if checkpoint.etapa_completa("collect"):
+        resultados_crudos = [r["datos"] for r in checkpoint.cargar("collect")]
+        resultados_crudos = [v for lote in resultados_crudos for v in (lote or [])]
+    else:
+        # Reanudación de una recolección con búsquedas fallidas: solo se repiten esas, y filtro y
+        # publicación se rehacen sobre el total (lo ya guardado cae como "already_stored");
+        # los packs ya escritos se conservan y el historial de este intento va en archivos aparte
+        if checkpoint.fallidas("collect"):
+            checkpoint.nuevo_intento()
+            checkpoint.reabrir("filter")
+            checkpoint.reabrir("pack", conservar_items=True)
+            checkpoint.reabrir("publish")
+        fallidas = []
+        with perfil.etapa("collect"), medir_cpu("collect"):
+            resultados_crudos = recoleccion_de_vacantes(keywords_custom=keywords_dinamicas, checkpoint=checkpoint,
+                                                        descripciones=descripciones, fallidas=fallidas)
+        if fallidas:
+            # La etapa queda abierta: --resume repite solo las búsquedas que faltan
+            checkpoint.registrar_fallidas("collect", fallidas)
+            ui.console.print(f"⚠️ {len(fallidas)} SEARCHES FAILED; COLLECT STAGE LEFT OPEN FOR --resume.")
+        else:
+            checkpoint.completar("collect", items=len(resultados_crudos))
     
     if not resultados_crudos:
         ui.console.print("NO VACANCIES FOUND.")
+        replicador.detener(espera_max=REPLICA_ESPERA_CIERRE_S)
+        exportar_metricas(checkpoint)
+        finalizar_trazas()
+        perfil.cerrar()
+        if descripciones is not None:
+            descripciones.cerrar()
+        if checkpoint.etapa_completa("collect"):
+            checkpoint.finalizar()
         return
 
-    # 4. Process (Auto Mode = True)
-    # This will filter, dedupe, analyze with AI, and generate packs automatically.
-    vacantes_finales = procesar_vacantes(resultados_crudos, urls_existentes, auto_mode=True)
+    # 4. Normalise, dedupe and score relevance; then generate packs (skipping finished ones on resume)
+    if checkpoint.etapa_completa("filter"):
+        vacantes_finales = checkpoint.cargar("filter")
+        ui.console.print(f"↩️  [dim]{len(vacantes_finales)} filtered vacancies restored from checkpoint.[/dim]")
+    else:
+        with perfil.etapa("filter"), medir_cpu("filter"):
+            vacantes_finales = filtrar_vacantes(resultados_crudos, urls_existentes, descripciones=descripciones)
+        checkpoint.guardar("filter", vacantes_finales)
+    del resultados_crudos
+
+    if vacantes_finales and not checkpoint.etapa_completa("pack"):
+        with perfil.etapa("pack"), medir_cpu("pack"):
+            generar_packs(vacantes_finales, auto_mode=True, checkpoint=checkpoint, descripciones=descripciones)
+        checkpoint.completar("pack")
+
+    # 5. Publish: local store (Sheets replicated in background), Parquet history and BigQuery.
+    # Each target is recorded once done, so a resumed run does not publish twice.
+    with perfil.etapa("publish"), medir_cpu("publish"):
+        publicados = checkpoint.items("publish")
+        if "store" not in publicados:
+            if vacantes_finales:
+                try:
+                    guardadas = guardar_vacantes(store, vacantes_finales, descripciones)
+                    replicador.notificar()
+                    publicados["store"] = guardadas
+                    checkpoint.registrar_item("publish", "store", guardadas)
+                    ui.console.print(f"✅ SAVE SUCCESSFUL! ({guardadas} stored locally, syncing to Sheets...)")
+                except Exception as e:
+                    ui.console.print(f"CRITICAL ERROR SAVING: {e}")
+            else:
+                publicados["store"] = 0
+                ui.console.print("[dim]Nothing new to save.[/dim]")
+
+        # 6. History: local Parquet dataset + BigQuery load job (failed batches are retried next run)
+        if "historial" not in publicados:
+            try:
+                publicar_historial(vacantes_finales or [], checkpoint.run_id, descripciones, checkpoint.intento)
+                checkpoint.registrar_item("publish", "historial")
+            except Exception as e:
+                ui.console.print(f"⚠️ HISTORY NOT WRITTEN: {e}")
+        if BIGQUERY_HABILITADO and "bigquery" not in publicados:
+            try:
+                publicar_bigquery(vacantes_finales or [], checkpoint.run_id, descripciones, checkpoint)
+                checkpoint.registrar_item("publish", "bigquery")
+            except Exception as e:
+                ui.console.print(f"⚠️ BIGQUERY LOAD FAILED, BATCH KEPT FOR NEXT RUN: {e}")
+    # Without the local save the run stays unfinished so --resume can retry it
+    if "store" in publicados:
+        checkpoint.completar("publish")
 
-    # 5. Save to Sheets (Auto)
-    if vacantes_finales and hoja:
+    with ui.status_context("SYNCING TO CLOUD"), perfil.etapa("sync"):
+        replicador.detener(espera_max=REPLICA_ESPERA_CIERRE_S)
+
+    # 7. Archive old rows (only once the replica is drained, so row indexes are stable)
+    if hoja is not None and ARCHIVO_RETENCION_DIAS > 0 and not store.sin_sincronizar(limite=1):
         try:
-            with ui.status_context("SAVING TO CLOUD"):
-                actualizar_sheet(hoja, vacantes_finales)
-                registrar_actualizacion(hoja)
-            ui.console.print("✅ SAVE SUCCESSFUL!")
+            with perfil.etapa("archive"):
+                archivar_vacantes(hoja, store)
         except Exception as e:
-            ui.console.print(f"CRITICAL ERROR SAVING: {e}")
-    elif not vacantes_finales:
-        ui.console.print("[dim]Nothing new to save.[/dim]")
+            ui.console.print(f"⚠️ ARCHIVING SKIPPED: {e}")
+    ui.console.print(f"[dim]{planificador.resumen()}[/dim]")
+    if descripciones is not None:
+        descripciones.cerrar()
+        ui.console.print(f"[dim]Bounded memory: peak RSS {pico_memoria_mb()} MB.[/dim]")
+    exportar_metricas(checkpoint)
+    finalizar_trazas()
+    perfil.cerrar()
+    if checkpoint.etapa_completa("collect") and checkpoint.etapa_completa("publish"):
+        checkpoint.finalizar()
+    else:
+        ui.console.print(f"⚠️ RUN {checkpoint.run_id} INCOMPLETE. RETRY WITH --resume.")
 
     ui.console.print("\n🤖 AUTOMATION COMPLETE. BYE! 👋")
 
 
-def main():
+def main(perfilar: bool = False):
     ui.mostrar_banner()
 
+    store = VacancyStore()
+    replicador = None
+    perfil = Perfilador(os.path.join(RUNS_DIR, f"interactive-{datetime.now().strftime('%Y%m%dT%H%M%S')}", "profile"),
+                        activo=perfilar)
+    busquedas = 0
+
     while True:
         opcion = ui.menu_principal()
 
         if "Salir" in opcion:
+            if replicador:
+                with ui.status_context("SYNCING TO CLOUD"):
+                    replicador.detener(espera_max=REPLICA_ESPERA_CIERRE_S)
+            perfil.cerrar()
             ui.console.print("GOODBYE! 👋")
             break
 
@@ -283,12 +640,15 @@ def main():
                 ui.console.print("\n[dim]Conectando a Google Sheets para obtener historial...[/dim]")
                 hoja = conectar_sheets()
                 preparar_hoja(hoja)
-                urls_existentes = obtener_urls_existentes(hoja)
+                sembrar_store(store, hoja)
             except Exception as e:
                 ui.console.print(f"ERROR CONNECTING TO SHEETS: {e}")
-                urls_existentes = set()
                 hoja = None
 
+            if replicador is None:
+                replicador = ReplicadorSheets(store, (lambda h=hoja: h) if hoja else conectar_sheets).iniciar()
+            urls_existentes = store.urls()
+
             resultados_crudos = []
             keywords_dinamicas = []
 
@@ -357,24 +717,26 @@ def main():
                         ui.console.print("⚠️ Análisis de CV omitido por el usuario.")
 
             # 2. Búsqueda
-            resultados_crudos = recoleccion_de_vacantes(keywords_custom=keywords_dinamicas)
+            busquedas += 1
+            with perfil.etapa(f"collect-{busquedas}"):
+                resultados_crudos = recoleccion_de_vacantes(keywords_custom=keywords_dinamicas)
             
             if not resultados_crudos:
                 ui.console.print("NO VACANCIES FOUND.")
                 continue
 
-            vacantes_finales = procesar_vacantes(resultados_crudos, urls_existentes)
+            with perfil.etapa(f"procesar-{busquedas}"):
+                vacantes_finales = procesar_vacantes(resultados_crudos, urls_existentes)
 
             # Mostrar resumen antes de guardar
             ui.mostrar_tabla_resultados(vacantes_finales, titulo="Resumen de Vacantes Encontradas")
 
-            if vacantes_finales and hoja:
+            if vacantes_finales:
                 if ui.confirmar_accion("SAVE RESULTS TO GOOGLE SHEETS?"):
                     try:
-                        with ui.status_context("SAVING TO CLOUD"):
-                            actualizar_sheet(hoja, vacantes_finales)
-                            registrar_actualizacion(hoja)
-                        ui.console.print("✅ SAVE SUCCESSFUL!")
+                        guardadas = store.insertar_nuevas(vacantes_finales)
+                        replicador.notificar()
+                        ui.console.print(f"✅ SAVE SUCCESSFUL! ({guardadas} stored locally, syncing to Sheets...)")
                     except Exception as e:
                         ui.console.print(f"CRITICAL ERROR SAVING: {e}")
                 else:
@@ -389,8 +751,13 @@ def main():
 
 
 if __name__ == "__main__":
+    import argparse
+    parser = argparse.ArgumentParser(description="Job search engine (menú interactivo).")
+    parser.add_argument("--profile", action="store_true",
+                        help="Perfila cada etapa (pilas muestreadas, cProfile, tracemalloc) en RUNS_DIR/interactive-*/profile")
+    args = parser.parse_args()
     try:
-        main()
+        main(perfilar=args.profile)
     except KeyboardInterrupt:
         print("\nInterrupción detectada. Saliendo...")
         sys.exit(0)
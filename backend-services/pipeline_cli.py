@@ -0,0 +1,242 @@
+"""
+Script: Pipeline_CLI.py
+Purpose: CLI sin menú, una etapa por subcomando. Cada etapa lee y escribe JSONL en flujo (una
+         vacante por línea, "-" = stdin/stdout), así se pueden encadenar con pipes, correr en
+         máquinas distintas o repetir una sola etapa sobre el artefacto de la anterior.
+         Los logs van a stderr; stdout queda solo para el JSONL.
+
+Uso:
+    python backend-services/pipeline_cli.py collect -o crudas.jsonl
+    python backend-services/pipeline_cli.py filter -i crudas.jsonl -o filtradas.jsonl
+    python backend-services/pipeline_cli.py analyze -i filtradas.jsonl -o analizadas.jsonl
+    python backend-services/pipeline_cli.py pack -i analizadas.jsonl -o listas.jsonl
+    python backend-services/pipeline_cli.py publish -i listas.jsonl
+
+    python backend-services/pipeline_cli.py collect --portales GetOnBrd | \\
+        python backend-services/pipeline_cli.py filter | python backend-services/pipeline_cli.py publish
+"""
+import os
+import sys
+import json
+import argparse
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Iterator
+
+# --- PATH SETUP ---
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(os.path.join(BASE_DIR, "infrastructure"))
+sys.path.append(os.path.join(BASE_DIR, "data-engineering"))
+sys.path.append(os.path.join(BASE_DIR, "ai-automations"))
+sys.path.append(os.path.join(os.path.dirname(__file__), "src"))
+
+from config import REPLICA_ESPERA_CIERRE_S, BIGQUERY_HABILITADO
+from job_search_engine import (
+    PORTALES_ACTIVOS, DIR_RECOMENDACIONES, buscar_en_portal, limpiar_keywords, keywords_automaticas,
+    filtrar_en_flujo, generar_pack, guardar_vacantes, en_lotes,
+)
+from metrics import medir_cpu
+from vacancy_store import VacancyStore
+from vacancy_analyzer import analizar_vacante
+from history_dataset import escribir_historial
+from bigquery_sink import publicar_en_bigquery
+from sheets_manager import conectar_sheets
+from sheets_replicator import ReplicadorSheets
+
+# Salida real para el JSONL; print()/ui.console se desvían a stderr en main()
+_STDOUT = sys.stdout
+LOTE_PUBLICACION = 500
+
+
+# --- JSONL EN FLUJO ---
+def leer_jsonl(ruta: str) -> Iterator[dict]:
+    """Vacantes de un JSONL (o stdin con "-"), de a una. Las líneas vacías o inválidas se omiten."""
+    f = sys.stdin if ruta == "-" else open(ruta, "r", encoding="utf-8")
+    try:
+        for n, linea in enumerate(f, 1):
+            if not linea.strip():
+                continue
+            try:
+                yield json.loads(linea)
+            except ValueError:
+                print(f"⚠️ {ruta}:{n}: línea JSON inválida, se omite.")
+    finally:
+        if f is not sys.stdin:
+            f.close()
+
+
+@contextmanager
+def escribir_jsonl(ruta: str):
+    """Escritor que agrega una línea por vacante y hace flush (el siguiente proceso del pipe la ve al tiro)."""
+    if ruta == "-":
+        f = _STDOUT
+    else:
+        os.makedirs(os.path.dirname(os.path.abspath(ruta)), exist_ok=True)
+        f = open(ruta + ".tmp", "w", encoding="utf-8")
+    contador = {"n": 0}
+
+    def escribir(registro: dict):
+        f.write(json.dumps(registro, ensure_ascii=False, default=str) + "\n")
+        f.flush()
+        contador["n"] += 1
+
+    try:
+        yield escribir
+    finally:
+        if f is not _STDOUT:
+            f.close()
+            os.replace(ruta + ".tmp", ruta)
+        print(f"📝 {contador['n']} vacantes -> {'stdout' if ruta == '-' else ruta}")
+
+
+# --- ETAPAS ---
+def cmd_collect(args):
+    keywords = limpiar_keywords(args.keywords.split(",") if args.keywords else keywords_automaticas())
+    portales = [(n, f) for n, f in PORTALES_ACTIVOS if not args.portales or n in args.portales.split(",")]
+    print(f"🔍 {len(portales)} portales x {len(keywords)} keywords")
+    with escribir_jsonl(args.output) as escribir, ThreadPoolExecutor(max_workers=args.workers) as executor:
+        futuros = {executor.submit(buscar_en_portal, n, f, kw): (n, kw) for n, f in portales for kw in keywords}
+        for futuro in as_completed(futuros):
+            portal, keyword = futuros[futuro]
+            try:
+                for v in futuro.result() or []:
+                    v.setdefault("keyword_buscada", keyword)
+                    escribir(v)
+            except Exception as e:
+                print(f"❌ ERROR IN {portal} ('{keyword}'): {e}")
+
+
+def cmd_filter(args):
+    urls_existentes = set()
+    if not args.sin_store:
+        urls_existentes = VacancyStore().urls()
+    conteo = {}
+    with escribir_jsonl(args.output) as escribir:
+        for v in filtrar_en_flujo(leer_jsonl(args.input), urls_existentes, conteo):
+            escribir(v)
+    print("🧹 " + ", ".join(f"{k}: {n}" for k, n in conteo.items()))
+
+
+def campos_analisis(vacante: dict, data: dict) -> dict:
+    """Resultado de analizar_vacante -> campos de la vacante (los vacíos se completan con lo extraído)."""
+    if data.get("error"):
+        return {"analisis_error": data["error"]}
+    campos = {
+        "match_percent": data.get("match_percent", 0),
+        "match_reason": data.get("match_reason", ""),
+        "top_skills": ", ".join(data.get("top_skills") or []),
+        "seniority_estimado": data.get("nivel", "N/A"),
+    }
+    for campo in ("empresa", "ubicacion", "modalidad", "nivel", "jornada", "salario"):
+        if not vacante.get(campo) and data.get(campo):
+            campos[campo] = data[campo]
+    return campos
+
+
+def _analizar(vacante: dict) -> dict:
+    try:
+        data = json.loads(analizar_vacante(vacante.get("descripcion", ""), vacante.get("titulo", "")))
+    except Exception as e:
+        data = {"error": str(e)}
+    vacante.update(campos_analisis(vacante, data))
+    return vacante
+
+
+def cmd_analyze(args):
+    """Análisis IA en paralelo acotado: a lo más `workers` vacantes en memoria, salida en el orden de entrada."""
+    with escribir_jsonl(args.output) as escribir, ThreadPoolExecutor(max_workers=args.workers) as executor:
+        pendientes = deque()
+        for v in leer_jsonl(args.input):
+            pendientes.append(executor.submit(_analizar, v))
+            if len(pendientes) >= args.workers:
+                escribir(pendientes.popleft().result())
+        while pendientes:
+            escribir(pendientes.popleft().result())
+
+
+def cmd_pack(args):
+    os.makedirs(args.dir, exist_ok=True)
+    with escribir_jsonl(args.output) as escribir:
+        for v in leer_jsonl(args.input):
+            match = str(v.get("match_percent", ""))
+            # Sin análisis ("Pendiente") se genera igual, como en run_automated_search
+            if args.min_match and match.isdigit() and int(match) < args.min_match:
+                escribir(v)
+                continue
+            filename, _ = generar_pack(v, args.dir)
+            if filename:
+                v["pack"] = filename
+            escribir(v)
+
+
+def cmd_publish(args):
+    """Base local por lotes (Sheets se replica desde ahí), historial Parquet y BigQuery."""
+    store = VacancyStore()
+    run_id = args.run_id or f"cli-{datetime.now().strftime('%Y%m%dT%H%M%S')}"
+    total = 0
+    for n, lote in enumerate(en_lotes(leer_jsonl(args.input), LOTE_PUBLICACION), 1):
+        total += guardar_vacantes(store, lote)
+        if not args.sin_historial:
+            escribir_historial(lote, f"{run_id}-{n:04d}")
+        if BIGQUERY_HABILITADO and not args.sin_bigquery:
+            publicar_en_bigquery(lote, run_id=f"{run_id}-{n:04d}")
+    print(f"✅ {total} vacantes nuevas en la base local.")
+
+    if not args.sin_sheets and store.sin_sincronizar(limite=1):
+        replicador = ReplicadorSheets(store, conectar_sheets).iniciar()
+        replicador.notificar()
+        replicador.detener(espera_max=REPLICA_ESPERA_CIERRE_S)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Pipeline de vacantes por etapas (JSONL en flujo).")
+    sub = parser.add_subparsers(dest="etapa", required=True)
+
+    def etapa(nombre, ayuda, entrada=True):
+        p = sub.add_parser(nombre, help=ayuda)
+        if entrada:
+            p.add_argument("-i", "--input", default="-", help="JSONL de entrada (default: stdin)")
+        p.add_argument("-o", "--output", default="-", help="JSONL de salida (default: stdout)")
+        return p
+
+    p = etapa("collect", "Scraping de portales", entrada=False)
+    p.add_argument("--keywords", help="Separadas por coma (default: cache del CV o config)")
+    p.add_argument("--portales", help=f"Separados por coma: {', '.join(n for n, _ in PORTALES_ACTIVOS)}")
+    p.add_argument("--workers", type=int, default=10)
+    p.set_defaults(fn=cmd_collect)
+
+    p = etapa("filter", "Palabras, duplicados, existentes y relevancia")
+    p.add_argument("--sin-store", action="store_true", help="No descartar las URLs ya guardadas en la base local")
+    p.set_defaults(fn=cmd_filter)
+
+    p = etapa("analyze", "Match con el perfil vía LLM")
+    p.add_argument("--workers", type=int, default=1, help="Análisis en paralelo (cuidado con la cuota del LLM)")
+    p.set_defaults(fn=cmd_analyze)
+
+    p = etapa("pack", "Packs de postulación (Markdown)")
+    p.add_argument("--dir", default=DIR_RECOMENDACIONES)
+    p.add_argument("--min-match", type=int, default=0, help="Solo vacantes analizadas con match >= N")
+    p.set_defaults(fn=cmd_pack)
+
+    p = sub.add_parser("publish", help="Base local + réplica a Sheets + historial")
+    p.add_argument("-i", "--input", default="-", help="JSONL de entrada (default: stdin)")
+    p.add_argument("--run-id")
+    p.add_argument("--sin-sheets", action="store_true", help="Solo base local (la réplica queda pendiente)")
+    p.add_argument("--sin-historial", action="store_true")
+    p.add_argument("--sin-bigquery", action="store_true")
+    p.set_defaults(fn=cmd_publish)
+
+    args = parser.parse_args(argv)
+    sys.stdout = sys.stderr  # logs de scrapers/ui fuera del JSONL
+    try:
+        with medir_cpu(args.etapa):
+            args.fn(args)
+    finally:
+        sys.stdout = _STDOUT
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,148 @@
+"""
+Script: Vacancy_Prefetcher.py
+Purpose: Pre-análisis en segundo plano (análisis IA + pack) de las vacantes pendientes más relevantes.
+"""
+import json
+import threading
+from concurrent.futures import ThreadPoolExecutor, CancelledError
+from typing import List, Dict, Any, Callable
+
+from config import PALABRAS_CLAVE, PREFETCH_TOP_N, PREFETCH_WORKERS, PREFETCH_CRITERIO
+from vacancy_analyzer import analizar_vacante
+from advisor import generar_pack_postulacion
+
+
+class AnalisisCancelado(Exception):
+    """El usuario eligió otra vacante antes de que terminara el pre-análisis."""
+
+
+def clave_vacante(vacante: dict) -> str:
+    """Identificador estable de una vacante del sheet (fila o URL)."""
+    return str(vacante.get("_row_idx") or vacante.get("URL") or vacante.get("Título"))
+
+
+def score_local(vacante: dict) -> int:
+    """Cuenta keywords de config en título + descripción (sin IA)."""
+    texto = f"{vacante.get('Título', '')} {vacante.get('Descripción', '')}".lower()
+    return sum(1 for kw in PALABRAS_CLAVE if kw.lower() in texto)
+
+
+def priorizar_vacantes(vacantes: List[dict], criterio: str = PREFETCH_CRITERIO) -> List[dict]:
+    """
+    Ordena las vacantes a pre-analizar.
+    'reciente' respeta el orden de la lista (ya viene con las últimas primero),
+    'score' ordena por coincidencia de keywords (estable ante empates).
+    """
+    if criterio == "score":
+        return sorted(vacantes, key=score_local, reverse=True)
+    return list(vacantes)
+
+
+def analizar_y_empaquetar(vacante: dict, cancelado: threading.Event = None) -> Dict[str, Any]:
+    """
+    Ejecuta las dos llamadas LLM de una vacante: análisis técnico y pack de postulación.
+    Si `cancelado` se activa entre ambas, se omite el pack.
+    """
+    analisis_json = analizar_vacante(vacante.get("Descripción", ""), vacante.get("Título", ""))
+    data_analisis = json.loads(analisis_json)
+
+    if cancelado is not None and cancelado.is_set():
+        raise AnalisisCancelado(clave_vacante(vacante))
+
+    titulo = vacante.get("Título")
+    empresa = vacante.get("Empresa")
+    if titulo == "Cargo Manual":
+        titulo = data_analisis.get("titulo_vacante", titulo)
+    if empresa == "Empresa Manual":
+        empresa = data_analisis.get("empresa", empresa)
+
+    pack_content = generar_pack_postulacion({
+        "titulo": titulo,
+        "empresa": empresa,
+        "descripcion": "Revisar link para detalle", # El asesor ya tiene el contexto del análisis
+        "url": vacante.get("URL"),
+        "analisis_previo": analisis_json
+    })
+
+    return {
+        "analisis_json": analisis_json,
+        "data_analisis": data_analisis,
+        "pack": pack_content,
+    }
+
+
+class PrefetcherVacantes:
+    """
+    Lanza analizar_y_empaquetar en un pool de hilos para el top-N de vacantes
+    apenas se carga la lista. Al seleccionar una, `obtener` devuelve el resultado
+    cacheado (o espera solo lo que falte) y el resto del trabajo se cancela.
+    """
+
+    def __init__(self, top_n: int = PREFETCH_TOP_N, max_workers: int = PREFETCH_WORKERS,
+                 criterio: str = PREFETCH_CRITERIO,
+                 procesar: Callable[[dict, threading.Event], Dict[str, Any]] = analizar_y_empaquetar):
+        self.top_n = top_n
+        self.criterio = criterio
+        self._procesar = procesar
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="prefetch")
+        self._futures = {}
+        self._vacantes = {}
+        self._cancelados = {}
+        self._lock = threading.Lock()
+
+    def iniciar(self, vacantes: List[dict]):
+        """Encola el pre-análisis de las primeras `top_n` vacantes según el criterio."""
+        for vacante in priorizar_vacantes(vacantes, self.criterio)[:self.top_n]:
+            clave = clave_vacante(vacante)
+            with self._lock:
+                if clave in self._futures:
+                    continue
+                evento = threading.Event()
+                self._cancelados[clave] = evento
+                self._vacantes[clave] = vacante
+                self._futures[clave] = self._executor.submit(self._procesar, vacante, evento)
+
+    def listo(self, vacante: dict) -> bool:
+        """True si el resultado ya está en cache (selección instantánea)."""
+        future = self._futures.get(clave_vacante(vacante))
+        return bool(future and future.done() and not future.cancelled() and future.exception() is None)
+
+    def obtener(self, vacante: dict) -> Dict[str, Any]:
+        """
+        Devuelve el resultado pre-calculado. Si la vacante no estaba en el top-N,
+        o su pre-análisis falló/se canceló, se procesa en línea.
+        """
+        clave = clave_vacante(vacante)
+        self.cancelar_excepto(clave)
+
+        future = self._futures.get(clave)
+        if future is not None:
+            try:
+                return future.result()
+            except (CancelledError, AnalisisCancelado):
+                pass
+            except Exception as e:
+                print(f"⚠️ Pre-análisis falló, reintentando en línea: {e}")
+
+        return self._procesar(vacante, None)
+
+    def completados(self) -> List[tuple]:
+        """[(vacante, resultado)] de los pre-análisis que terminaron bien (para guardarlos)."""
+        with self._lock:
+            pares = list(self._futures.items())
+        return [(self._vacantes[clave], future.result()) for clave, future in pares
+                if future.done() and not future.cancelled() and future.exception() is None]
+
+    def cancelar_excepto(self, clave_conservar: str = None):
+        """Cancela lo encolado y marca como cancelado lo que esté en curso (salvo `clave_conservar`)."""
+        with self._lock:
+            for clave, future in self._futures.items():
+                if clave == clave_conservar:
+                    continue
+                future.cancel()
+                self._cancelados[clave].set()
+
+    def cerrar(self):
+        """Cancela todo lo pendiente y libera el pool sin esperar llamadas en curso."""
+        self.cancelar_excepto(None)
+        self._executor.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,187 @@
+"""
+Script: Run_Checkpoint.py
+Purpose: Checkpoints por etapa de run_automated_search. Cada ejecución tiene un directorio
+         RUNS_DIR/<run_id>/ con un manifest.json y un JSONL por etapa. Con --resume se retoma la
+         última ejecución incompleta: se saltan las etapas terminadas y, dentro de una etapa,
+         los ítems ya procesados.
+"""
+import os
+import json
+import shutil
+import threading
+from datetime import datetime
+from typing import Any, Dict, Iterable, List, Optional
+
+from config import RUNS_DIR, RUNS_CONSERVAR
+
+ETAPAS = ["collect", "filter", "pack", "publish"]
+
+
+def _ahora() -> str:
+    return datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+
+
+def _leer_jsonl(ruta: str) -> List[dict]:
+    """Lee un JSONL ignorando líneas truncadas (el proceso murió a mitad de una escritura)."""
+    if not os.path.exists(ruta):
+        return []
+    registros = []
+    with open(ruta, "r", encoding="utf-8") as f:
+        for linea in f:
+            try:
+                registros.append(json.loads(linea))
+            except ValueError:
+                continue
+    return registros
+
+
+class RunCheckpoint:
+    """
+    Uso típico:
+        ck = RunCheckpoint.abrir(reanudar=True)
+        if ck.etapa_completa("filter"):
+            vacantes = ck.cargar("filter")
+        else:
+            vacantes = ...
+            ck.guardar("filter", vacantes)
+    Etapas con ítems: registrar_item(etapa, clave, datos) tras cada ítem, items(etapa) al reanudar
+    y completar(etapa) al final.
+    """
+
+    def __init__(self, run_id: str, base_dir: str = RUNS_DIR):
+        self.run_id = run_id
+        self.dir = os.path.join(base_dir, run_id)
+        self._lock = threading.Lock()
+        os.makedirs(self.dir, exist_ok=True)
+        ruta = os.path.join(self.dir, "manifest.json")
+        if os.path.exists(ruta):
+            with open(ruta, "r", encoding="utf-8") as f:
+                self.manifest = json.load(f)
+        else:
+            self.manifest = {"run_id": run_id, "creado": _ahora(), "etapas": {}, "completado": False}
+            self._guardar_manifest()
+
+    @classmethod
+    def abrir(cls, reanudar: bool = False, run_id: str = None, base_dir: str = RUNS_DIR) -> "RunCheckpoint":
+        """
+        Nueva ejecución, o con `reanudar` la indicada en `run_id` (o la última incompleta).
+        Si no hay nada que reanudar se inicia una nueva.
+        """
+        if reanudar:
+            run_id = run_id or cls.ultima_incompleta(base_dir)
+            if run_id:
+                ck = cls(run_id, base_dir)
+                hechas = [e for e in ETAPAS if ck.etapa_completa(e)]
+                print(f"↩️  Reanudando ejecución {run_id} (etapas completas: {', '.join(hechas) or 'ninguna'}).")
+                return ck
+            print("No hay ejecuciones incompletas para reanudar. Iniciando una nueva.")
+        cls.limpiar_antiguas(base_dir)
+        return cls(run_id or datetime.now().strftime("%Y%m%dT%H%M%S"), base_dir)
+
+    @staticmethod
+    def _manifests(base_dir: str) -> List[dict]:
+        if not os.path.isdir(base_dir):
+            return []
+        manifests = []
+        for nombre in sorted(os.listdir(base_dir)):
+            ruta = os.path.join(base_dir, nombre, "manifest.json")
+            if os.path.exists(ruta):
+                with open(ruta, "r", encoding="utf-8") as f:
+                    manifests.append(json.load(f))
+        return manifests
+
+    @classmethod
+    def ultima_incompleta(cls, base_dir: str = RUNS_DIR) -> Optional[str]:
+        incompletas = [m["run_id"] for m in cls._manifests(base_dir) if not m.get("completado")]
+        return incompletas[-1] if incompletas else None
+
+    @classmethod
+    def limpiar_antiguas(cls, base_dir: str = RUNS_DIR, conservar: int = RUNS_CONSERVAR):
+        """Borra los directorios de ejecuciones completas, salvo las `conservar` más recientes."""
+        completas = [m["run_id"] for m in cls._manifests(base_dir) if m.get("completado")]
+        for run_id in completas[:-conservar] if conservar else completas:
+            shutil.rmtree(os.path.join(base_dir, run_id), ignore_errors=True)
+
+    # --- MANIFEST ---
+    def _guardar_manifest(self):
+        ruta = os.path.join(self.dir, "manifest.json")
+        with open(ruta + ".tmp", "w", encoding="utf-8") as f:
+            json.dump(self.manifest, f, ensure_ascii=False, indent=2)
+        os.replace(ruta + ".tmp", ruta)
+
+    def _ruta(self, etapa: str) -> str:
+        return os.path.join(self.dir, f"{etapa}.jsonl")
+
+    def etapa_completa(self, etapa: str) -> bool:
+        return self.manifest["etapas"].get(etapa, {}).get("completa", False)
+
+    def completar(self, etapa: str, **extra):
+        with self._lock:
+            info = self.manifest["etapas"].setdefault(etapa, {})
+            info.pop("fallidas", None)
+            info.update(completa=True, terminada=_ahora(), **extra)
+            self._guardar_manifest()
+
+    def registrar_fallidas(self, etapa: str, claves: List[str]):
+        """Deja la etapa abierta con los ítems que fallaron (al reanudar se repiten solo esos)."""
+        with self._lock:
+            info = self.manifest["etapas"].setdefault(etapa, {})
+            info.update(completa=False, fallidas=sorted(claves), terminada=_ahora())
+            self._guardar_manifest()
+
+    def fallidas(self, etapa: str) -> List[str]:
+        return self.manifest["etapas"].get(etapa, {}).get("fallidas", [])
+
+    @property
+    def intento(self) -> int:
+        """1 en la primera corrida; nuevo_intento() lo incrementa al reanudar una etapa con fallidas."""
+        return self.manifest.get("intento", 1)
+
+    def nuevo_intento(self) -> int:
+        with self._lock:
+            self.manifest["intento"] = self.intento + 1
+            self._guardar_manifest()
+        return self.manifest["intento"]
+
+    def reabrir(self, etapa: str, conservar_items: bool = False):
+        """Vuelve a abrir una etapa; sin `conservar_items` también descarta su progreso."""
+        with self._lock:
+            self.manifest["etapas"].pop(etapa, None)
+            self._guardar_manifest()
+            if not conservar_items and os.path.exists(self._ruta(etapa)):
+                os.remove(self._ruta(etapa))
+
+    def finalizar(self):
+        with self._lock:
+            self.manifest["completado"] = True
+            self.manifest["terminado"] = _ahora()
+            self._guardar_manifest()
+
+    # --- ETAPAS COMPLETAS (una salida) ---
+    def guardar(self, etapa: str, registros: Iterable[dict]):
+        """Escribe la salida completa de la etapa (atómico) y la marca como completa."""
+        ruta = self._ruta(etapa)
+        n = 0
+        with open(ruta + ".tmp", "w", encoding="utf-8") as f:
+            for r in registros:
+                f.write(json.dumps(r, ensure_ascii=False, default=str) + "\n")
+                n += 1
+        os.replace(ruta + ".tmp", ruta)
+        self.completar(etapa, items=n)
+
+    def cargar(self, etapa: str) -> List[dict]:
+        return _leer_jsonl(self._ruta(etapa))
+
+    # --- ETAPAS POR ÍTEM ---
+    def registrar_item(self, etapa: str, clave: str, datos: Any = None):
+        """Agrega (y fuerza a disco) el resultado de un ítem; sobrevive a un corte del proceso."""
+        linea = json.dumps({"clave": clave, "datos": datos}, ensure_ascii=False, default=str) + "\n"
+        with self._lock:
+            with open(self._ruta(etapa), "a", encoding="utf-8") as f:
+                f.write(linea)
+                f.flush()
+                os.fsync(f.fileno())
+
+    def items(self, etapa: str) -> Dict[str, Any]:
+        """{clave: datos} de los ítems ya registrados en la etapa."""
+        return {r["clave"]: r.get("datos") for r in _leer_jsonl(self._ruta(etapa))}
@@ -0,0 +1,347 @@
+"""
+Script: Search_Daemon.py
+Purpose: Modo daemon de la búsqueda automática. En vez de re-ejecutar todo por cron, un proceso
+         de larga vida refresca cada par (portal, keyword) con el intervalo de su portal
+         (GetOnBrd cada hora, LinkedIn cada pocas horas) y pasa solo lo recolectado por el mismo
+         camino filter -> pack -> publish de run_automated_search.
+         Entre ciclos se mantienen abiertos la base local, el replicador de Sheets, el cliente
+         de Sheets (sheets_client), la sesión HTTP de GetOnBrd y un Chromium por hilo de LinkedIn.
+         El estado queda en DAEMON_ESTADO_PATH y, si hay puerto, en GET /health y GET /status;
+         las métricas (metrics.py) en GET /metrics con formato Prometheus.
+"""
+import os
+import json
+import random
+import signal
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Tuple
+
+import ui
+from config import (
+    DAEMON_INTERVALOS_S, DAEMON_INTERVALO_DEFECTO_S, DAEMON_HILOS, DAEMON_TICK_S, DAEMON_KEYWORDS_CADA_S,
+    DAEMON_ESTADO_PATH, DAEMON_HOST, DAEMON_PUERTO, REPLICA_ESPERA_CIERRE_S, BIGQUERY_HABILITADO,
+)
+from sheets_manager import conectar_sheets
+from sheets_replicator import ReplicadorSheets
+from sheets_scheduler import planificador
+from bigquery_sink import publicar_en_bigquery
+from history_dataset import escribir_historial
+import tracing
+from metrics import registro
+from linkedin_jobs import buscar_vacantes_linkedin, navegador_del_hilo, cerrar_navegador_del_hilo
+from job_search_engine import (
+    PORTALES_ACTIVOS, buscar_en_portal, guardar_vacantes, finalizar_trazas, conectar_store, keywords_automaticas, limpiar_keywords, filtrar_vacantes, generar_packs,
+)
+
+# Tras un error el par se reintenta antes que su intervalo normal: 5 min, 10, 20... (tope: el intervalo)
+REINTENTO_BASE_S = 300
+
+
+def _ahora() -> str:
+    return datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+
+
+def _buscar_linkedin_caliente(keyword: str):
+    return buscar_vacantes_linkedin(keyword, browser=navegador_del_hilo())
+
+
+# Portales cuya búsqueda reutiliza recursos del hilo trabajador entre ciclos
+FUNCIONES_CALIENTES = {"LinkedIn": _buscar_linkedin_caliente}
+
+
+class DaemonBusqueda:
+    """
+    Uso:
+        DaemonBusqueda().ejecutar()   # bloquea hasta SIGINT/SIGTERM o detener()
+    Cada portal tiene su propio pool de hilos (DAEMON_HILOS), así un LinkedIn lento no
+    retrasa a GetOnBrd. Las búsquedas terminadas se juntan en cada tick y se procesan en un hilo
+    propio, en orden: los packs (LLM, con reintentos largos) no frenan el tick, así se siguen
+    lanzando y recogiendo búsquedas y /health ve al ciclo vivo.
+    """
+
+    def __init__(self, intervalos: Dict[str, float] = None, tick: float = DAEMON_TICK_S,
+                 estado_path: str = DAEMON_ESTADO_PATH, puerto: int = DAEMON_PUERTO):
+        self.intervalos = dict(DAEMON_INTERVALOS_S if intervalos is None else intervalos)
+        self.tick = tick
+        self.estado_path = estado_path
+        self.puerto = puerto
+        self.portales = {nombre: FUNCIONES_CALIENTES.get(nombre, func) for nombre, func in PORTALES_ACTIVOS}
+
+        self.store = None
+        self.replicador = None
+        self._ejecutores: Dict[str, ThreadPoolExecutor] = {}
+        self._procesador = ThreadPoolExecutor(max_workers=1, thread_name_prefix="daemon-procesar")
+        self._lotes_pendientes = []  # futures de _procesar encolados o en curso
+        self._en_curso = {}  # future -> (portal, keyword)
+        self._proximas: Dict[Tuple[str, str], float] = {}
+        self._keywords: List[str] = []
+        self._keywords_leidas = 0.0
+        self._dia_trazas = None
+        self._detener = threading.Event()
+        self._servidor = None
+        self._lock = threading.Lock()
+
+        self.pares: Dict[str, dict] = {}
+        self.estado = {
+            "pid": os.getpid(), "iniciado": _ahora(), "ultimo_tick": None, "ciclos": 0,
+            "busquedas": 0, "errores": 0, "vacantes_nuevas": 0, "ultimo_error": None,
+        }
+        self._ultimo_tick = time.monotonic()
+
+    # --- CICLO DE VIDA ---
+    def iniciar(self) -> bool:
+        self.store, _ = conectar_store()
+        if self.store is None:
+            return False
+        # conectar_sheets() sale del pool de sheets_client: si Sheets vuelve tras una caída, se reconecta solo
+        self.replicador = ReplicadorSheets(self.store, conectar_sheets).iniciar()
+        for nombre in self.portales:
+            self._ejecutores[nombre] = ThreadPoolExecutor(
+                max_workers=DAEMON_HILOS.get(nombre, 2), thread_name_prefix=f"daemon-{nombre.lower()}")
+        if self.puerto:
+            self._iniciar_servidor()
+        # Un JSONL de trazas por día (rota en ciclo()); un reinicio en el mismo día sigue en el mismo archivo
+        self._dia_trazas = datetime.now().strftime("%Y%m%d")
+        tracing.iniciar(f"daemon-{self._dia_trazas}")
+        return True
+
+    def detener(self):
+        self._detener.set()
+
+    def ejecutar(self):
+        if threading.current_thread() is threading.main_thread():
+            for sig in (signal.SIGINT, signal.SIGTERM):
+                signal.signal(sig, lambda *_: self.detener())
+        if not self.iniciar():
+            return
+        ui.console.print(f"\n🛰️  DAEMON STARTED (pid {os.getpid()}). Status: {self.estado_path}"
+                         + (f", http://{DAEMON_HOST}:{self.puerto}/status" if self._servidor else ""))
+        try:
+            while not self._detener.is_set():
+                self.ciclo()
+                self._detener.wait(self._espera())
+        finally:
+            self._apagar()
+
+    def ciclo(self):
+        """Un tick: lanza los pares vencidos, encola lo recolectado para procesar y guarda el estado."""
+        self._ultimo_tick = time.monotonic()
+        dia = datetime.now().strftime("%Y%m%d")
+        if dia != self._dia_trazas:
+            self._dia_trazas = dia
+            tracing.rotar(f"daemon-{dia}")
+        with self._lock:  # /status lee `pares` desde el hilo HTTP
+            self._refrescar_keywords()
+            self._lanzar_vencidos()
+            crudos = self._recoger_terminados()
+            self._lotes_pendientes = [f for f in self._lotes_pendientes if not f.done()]
+        if crudos:
+            self._lotes_pendientes.append(self._procesador.submit(self._procesar_lote, crudos))
+        self.estado["ultimo_tick"] = _ahora()
+        self.guardar_estado()
+
+    def _espera(self) -> float:
+        """Hasta el próximo par vencido, como máximo un tick (así /health ve ticks regulares)."""
+        if not self._proximas:
+            return self.tick
+        return max(1.0, min(self.tick, min(self._proximas.values()) - time.monotonic()))
+
+    # --- PROGRAMACIÓN ---
+    def _refrescar_keywords(self):
+        if self._keywords and time.monotonic() - self._keywords_leidas < DAEMON_KEYWORDS_CADA_S:
+            return
+        self._keywords = limpiar_keywords(keywords_automaticas())
+        self._keywords_leidas = time.monotonic()
+        vigentes = {(p, k) for p in self.portales for k in self._keywords}
+        for par in list(self._proximas):
+            if par not in vigentes:
+                del self._proximas[par]
+                self.pares.pop("|".join(par), None)
+        for par in vigentes:
+            self._proximas.setdefault(par, time.monotonic())  # pares nuevos: de inmediato
+
+    def intervalo(self, portal: str) -> float:
+        return self.intervalos.get(portal, DAEMON_INTERVALO_DEFECTO_S)
+
+    def _lanzar_vencidos(self):
+        ahora = time.monotonic()
+        ocupados = set(self._en_curso.values())
+        for (portal, keyword), vence in sorted(self._proximas.items(), key=lambda x: x[1]):
+            if vence > ahora or (portal, keyword) in ocupados:
+                continue
+            futuro = self._ejecutores[portal].submit(buscar_en_portal, portal, self.portales[portal], keyword)
+            self._en_curso[futuro] = (portal, keyword)
+            self.pares.setdefault(f"{portal}|{keyword}", {"errores_seguidos": 0})["en_curso"] = True
+
+    def _recoger_terminados(self) -> list:
+        crudos = []
+        for futuro in [f for f in self._en_curso if f.done()]:
+            portal, keyword = self._en_curso.pop(futuro)
+            if futuro.cancelled():  # apagado antes de empezar
+                continue
+            info = self.pares.setdefault(f"{portal}|{keyword}", {"errores_seguidos": 0})
+            info.update(en_curso=False, ultima=_ahora())
+            intervalo = self.intervalo(portal)
+            try:
+                vacantes = futuro.result() or []
+                crudos.extend(vacantes)
+                info.update(resultados=len(vacantes), errores_seguidos=0, ultimo_error=None)
+                self.estado["busquedas"] += 1
+                # +-10% para que los pares de un mismo portal no queden sincronizados en ráfagas
+                espera = intervalo * random.uniform(0.9, 1.1)
+            except Exception as e:
+                info["errores_seguidos"] += 1
+                info["ultimo_error"] = str(e)
+                self.estado["errores"] += 1
+                self.estado["ultimo_error"] = f"{portal} '{keyword}': {e}"
+                ui.console.print(f"❌ ERROR IN {portal} ('{keyword}'): {e}")
+                espera = min(intervalo, REINTENTO_BASE_S * 2 ** (info["errores_seguidos"] - 1))
+            if (portal, keyword) in self._proximas:
+                self._proximas[(portal, keyword)] = time.monotonic() + espera
+                info["proxima"] = datetime.fromtimestamp(time.time() + espera).strftime("%Y-%m-%d %H:%M:%S")
+        return crudos
+
+    # --- PROCESAMIENTO ---
+    def _procesar_lote(self, crudos: list):
+        """Hilo de procesamiento: un error en un lote no detiene los siguientes."""
+        try:
+            self._procesar(crudos)
+        except Exception as e:
+            self.estado["ultimo_error"] = f"process: {e}"
+            ui.console.print(f"❌ ERROR PROCESSING {len(crudos)} VACANCIES: {e}")
+
+    def _procesar(self, crudos: list):
+        """Mismo camino que run_automated_search (filter -> pack -> publish) para lo recién recolectado."""
+        self.estado["ciclos"] += 1
+        run_id = f"daemon-{datetime.now().strftime('%Y%m%dT%H%M%S')}"
+        vacantes = filtrar_vacantes(crudos, self.store.urls())
+        if not vacantes:
+            return
+        generar_packs(vacantes, auto_mode=True)
+        try:
+            guardadas = guardar_vacantes(self.store, vacantes)
+            self.replicador.notificar()
+            self.estado["vacantes_nuevas"] += guardadas
+            ui.console.print(f"✅ {guardadas} new vacancies stored (syncing to Sheets...)")
+        except Exception as e:
+            self.estado["ultimo_error"] = f"store: {e}"
+            ui.console.print(f"CRITICAL ERROR SAVING: {e}")
+            return
+        try:
+            escribir_historial(vacantes, run_id)
+            if BIGQUERY_HABILITADO:
+                publicar_en_bigquery(vacantes, run_id=run_id)
+        except Exception as e:
+            ui.console.print(f"⚠️ HISTORY/BIGQUERY SKIPPED THIS CYCLE: {e}")
+
+    # --- ESTADO / HEALTH ---
+    def sano(self) -> bool:
+        """El ciclo principal sigue vivo (hizo un tick hace menos de 3 ticks)."""
+        return not self._detener.is_set() and time.monotonic() - self._ultimo_tick < 3 * self.tick + 5
+
+    def resumen_estado(self) -> dict:
+        with self._lock:
+            return {
+                **self.estado,
+                "sano": self.sano(),
+                "keywords": self._keywords,
+                "en_curso": len(self._en_curso),
+                "lotes_por_procesar": sum(1 for f in self._lotes_pendientes if not f.done()),
+                "pares": {clave: dict(info) for clave, info in sorted(self.pares.items())},
+                "replicador": dict(self.replicador.stats) if self.replicador else None,
+                "sheets": dict(planificador.stats),
+            }
+
+    def guardar_estado(self):
+        """Escribe el estado de forma atómica (un lector nunca ve un JSON a medias)."""
+        with open(self.estado_path + ".tmp", "w", encoding="utf-8") as f:
+            json.dump(self.resumen_estado(), f, ensure_ascii=False, indent=2, default=str)
+        os.replace(self.estado_path + ".tmp", self.estado_path)
+
+    def _iniciar_servidor(self):
+        daemon = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path == "/metrics":
+                    datos = registro.texto_prometheus().encode("utf-8")
+                    self.send_response(200)
+                    self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+                    self.send_header("Content-Length", str(len(datos)))
+                    self.end_headers()
+                    self.wfile.write(datos)
+                    return
+                if self.path == "/health":
+                    sano = daemon.sano()
+                    codigo, cuerpo = (200 if sano else 503), {"sano": sano, "ultimo_tick": daemon.estado["ultimo_tick"]}
+                elif self.path == "/status":
+                    codigo, cuerpo = 200, daemon.resumen_estado()
+                else:
+                    codigo, cuerpo = 404, {"error": "rutas: /health, /status, /metrics"}
+                datos = json.dumps(cuerpo, ensure_ascii=False, default=str).encode("utf-8")
+                self.send_response(codigo)
+                self.send_header("Content-Type", "application/json; charset=utf-8")
+                self.send_header("Content-Length", str(len(datos)))
+                self.end_headers()
+                self.wfile.write(datos)
+
+            def log_message(self, *args):
+                pass
+
+        try:
+            self._servidor = ThreadingHTTPServer((DAEMON_HOST, self.puerto), Handler)
+        except OSError as e:
+            ui.console.print(f"⚠️ STATUS ENDPOINT DISABLED (port {self.puerto}): {e}")
+            return
+        threading.Thread(target=self._servidor.serve_forever, name="daemon-http", daemon=True).start()
+
+    # --- APAGADO ---
+    def _cerrar_navegadores(self, nombre: str, ejecutor: ThreadPoolExecutor):
+        """Un cierre por hilo: la barrera obliga a que cada tarea caiga en un hilo distinto."""
+        hilos = DAEMON_HILOS.get(nombre, 2)
+        barrera = threading.Barrier(hilos)
+
+        def cerrar():
+            try:
+                barrera.wait(timeout=10)
+            except threading.BrokenBarrierError:
+                pass
+            cerrar_navegador_del_hilo()
+
+        for futuro in [ejecutor.submit(cerrar) for _ in range(hilos)]:
+            try:
+                futuro.result(timeout=30)
+            except Exception as e:
+                ui.console.print(f"[dim]Browser close: {e}[/dim]")
+
+    def _apagar(self):
+        ui.console.print("\n🛑 STOPPING DAEMON...")
+        for futuro in self._en_curso:
+            futuro.cancel()
+        for nombre, ejecutor in self._ejecutores.items():
+            if self.portales.get(nombre) is _buscar_linkedin_caliente:
+                self._cerrar_navegadores(nombre, ejecutor)
+            ejecutor.shutdown(wait=True, cancel_futures=True)
+        crudos = self._recoger_terminados()
+        if crudos:
+            self._procesador.submit(self._procesar_lote, crudos)
+        # Termina los lotes ya encolados antes de cerrar el replicador
+        self._procesador.shutdown(wait=True)
+        if self.replicador:
+            with ui.status_context("SYNCING TO CLOUD"):
+                self.replicador.detener(espera_max=REPLICA_ESPERA_CIERRE_S)
+        if self._servidor:
+            self._servidor.shutdown()
+        finalizar_trazas()
+        self.estado["detenido"] = _ahora()
+        self.guardar_estado()
+        ui.console.print(f"[dim]{planificador.resumen()}[/dim]")
+        ui.console.print("🤖 DAEMON STOPPED. BYE! 👋")
+
+
+def run_daemon(**kwargs):
+    DaemonBusqueda(**kwargs).ejecutar()
@@ -1,10 +1,16 @@
 import requests
 import json
-from config import URL_GETONBRD, MAX_VACANTES_POR_PALABRA
-from utils import fecha_actual, calc_prioridad
-from bs4 import BeautifulSoup
+from config import URL_GETONBRD, MAX_VACANTES_POR_PALABRA, CPU_POOL_MINIMO_HTML
+from utils import fecha_actual, calc_prioridad, html_a_texto
+from cpu_pool import mapear
+from portal_fixtures import url_portal, grabar_respuesta
 from datetime import datetime, timedelta
 
+# Sesión compartida: reutiliza conexiones HTTPS (keep-alive) entre búsquedas y ciclos del daemon
+_sesion = requests.Session()
+# Con PORTAL_CAPTURA_DIR cada respuesta queda en el archivo de fixtures (benchmarks/portal_replay.py)
+_sesion.hooks["response"].append(grabar_respuesta)
+
 LIMITE_ANTIGUEDAD_DIAS = 60
 
 def _procesar_resultados_getonbrd(json_data: list, keyword: str):
@@ -58,8 +64,8 @@ def _procesar_resultados_getonbrd(json_data: list, keyword: str):
         
         timestamp_publicacion = attributes.get("published_at")
         
+        # HTML -> texto se hace al final, todo el lote en el pool de procesos
         descripcion_html = attributes.get("description", "")
-        descripcion_limpia = BeautifulSoup(descripcion_html, 'html.parser').get_text(separator=' ', strip=True)
 
         min_salary = attributes.get("min_salary")
         max_salary = attributes.get("max_salary")
@@ -68,7 +74,7 @@ def _procesar_resultados_getonbrd(json_data: list, keyword: str):
         vacante_dict = {
             "titulo": attributes.get("title", "No indicado"), 
             "url": links.get("public_url", ""), 
-            "descripcion": descripcion_limpia,
+            "descripcion": descripcion_html,
             
             "fecha_publicacion": fecha_publicacion.strftime("%Y-%m-%d"),
             
@@ -85,17 +91,20 @@ def _procesar_resultados_getonbrd(json_data: list, keyword: str):
         }
         
         vacantes_procesadas.append(vacante_dict)
-        
+
+    textos = mapear(html_a_texto, [v["descripcion"] for v in vacantes_procesadas], minimo=CPU_POOL_MINIMO_HTML)
+    for vacante, texto in zip(vacantes_procesadas, textos):
+        vacante["descripcion"] = texto
     return vacantes_procesadas
 
 def buscar_vacantes_getonbrd(keyword: str): 
     """Realiza la solicitud API a GetOnBrd para una única palabra clave."""
     
     vacantes_raw = []
-    url = URL_GETONBRD.format(requests.utils.quote(keyword))
+    url = url_portal(URL_GETONBRD.format(requests.utils.quote(keyword)))
     
     try:
-        response = requests.get(url, timeout=10)
+        response = _sesion.get(url, timeout=10)
         response.raise_for_status()
         data = response.json()
         
@@ -2,7 +2,11 @@ from playwright.sync_api import sync_playwright
 from datetime import datetime
 import time
 import random
+import threading
 from utils import normalizar_texto, calc_prioridad, fecha_actual
+from portal_fixtures import url_portal, grabar_pagina, aislar_pagina, en_replay
+
+_hilo = threading.local()
 
 def extraer_datos_vacante(url: str):
     """
@@ -82,165 +86,203 @@ def extraer_datos_vacante(url: str):
         finally:
             browser.close()
 
-def buscar_vacantes_linkedin(keyword: str):
-    ofertas = []
-    
+def navegador_del_hilo():
+    """
+    Chromium persistente del hilo actual. Los objetos de Playwright (API sync) no se pueden
+    compartir entre hilos, así que cada hilo trabajador mantiene el suyo entre búsquedas.
+    """
+    if getattr(_hilo, "playwright", None) is None:
+        _hilo.playwright = sync_playwright().start()
+    if getattr(_hilo, "browser", None) is None or not _hilo.browser.is_connected():
+        _hilo.browser = _hilo.playwright.chromium.launch(headless=True)
+    return _hilo.browser
+
+def cerrar_navegador_del_hilo():
+    """Cierra el navegador y Playwright del hilo actual (al apagar el daemon)."""
+    browser, playwright = getattr(_hilo, "browser", None), getattr(_hilo, "playwright", None)
+    _hilo.browser, _hilo.playwright = None, None
+    try:
+        if browser is not None:
+            browser.close()
+    finally:
+        if playwright is not None:
+            playwright.stop()
+
+def buscar_vacantes_linkedin(keyword: str, browser=None):
+    """
+    Busca `keyword` en LinkedIn (vista invitado). Si se pasa `browser` (ej: navegador_del_hilo())
+    se reutiliza con un contexto nuevo; si no, se lanza y cierra un Chromium propio.
+    """
     if not keyword:
         return []
 
+    if browser is not None:
+        context = browser.new_context()
+        try:
+            return _buscar_en_linkedin(context.new_page(), keyword)
+        finally:
+            context.close()
+
     with sync_playwright() as p:
         browser = p.chromium.launch(headless=True)
-        page = browser.new_page()
+        try:
+            return _buscar_en_linkedin(browser.new_page(), keyword)
+        finally:
+            browser.close()
+
+def _buscar_en_linkedin(page, keyword: str):
+    ofertas = []
 
+    try:
+        # --- FASE 1: Búsqueda y Recolección de URLs ---
+        url_busqueda = f"https://www.linkedin.com/jobs/search/?keywords={keyword}&location=Chile"
+        print(f"🔎 Buscando '{keyword}' en LinkedIn...")
+        
+        aislar_pagina(page)
+        page.goto(url_portal(url_busqueda), timeout=60000)
+        
+        selector_tarjeta = "li.base-card, div.job-search-card, div.base-card"
+        
         try:
-            # --- FASE 1: Búsqueda y Recolección de URLs ---
-            url_busqueda = f"https://www.linkedin.com/jobs/search/?keywords={keyword}&location=Chile"
-            print(f"🔎 Buscando '{keyword}' en LinkedIn...")
-            
-            page.goto(url_busqueda, timeout=60000)
-            
-            selector_tarjeta = "li.base-card, div.job-search-card, div.base-card"
-            
-            try:
-                page.wait_for_selector(selector_tarjeta, timeout=15000)
-            except:
-                print(f"⚠️ No se encontraron resultados inmediatos en LinkedIn para '{keyword}'.")
+            page.wait_for_selector(selector_tarjeta, timeout=15000)
+        except:
+            print(f"⚠️ No se encontraron resultados inmediatos en LinkedIn para '{keyword}'.")
 
-            # Breve scroll para cargar
-            for _ in range(3):
-                if page.locator(selector_tarjeta).count() > 0:
-                    break
-                page.mouse.wheel(0, 2000)
-                page.wait_for_timeout(2000)
+        # Breve scroll para cargar
+        for _ in range(3):
+            if page.locator(selector_tarjeta).count() > 0:
+                break
+            page.mouse.wheel(0, 2000)
+            page.wait_for_timeout(2000)
 
-            cards = page.locator(selector_tarjeta).all()
-            print(f"💬 LinkedIn '{keyword}': {len(cards)} resultados encontrados. Procesando Top 5...")
+        grabar_pagina(url_busqueda, page)
+        cards = page.locator(selector_tarjeta).all()
+        print(f"💬 LinkedIn '{keyword}': {len(cards)} resultados encontrados. Procesando Top 5...")
 
-            pre_ofertas = []
-            
-            # Solo procesamos las 5 primeras para no ser bloqueados
-            for card in cards[:5]: 
-                try:
-                    titulo = normalizar_texto(card.locator("h3.base-search-card__title").inner_text())
-                    
-                    # 🛡️ Detección de ofuscación (Asteriscos)
-                    if not titulo or "****" in titulo:
-                        # Intentar recuperar desde aria-label del enlace
-                        try:
-                            aria_label = card.locator("a.base-card__full-link").get_attribute("aria-label")
-                            if aria_label:
-                                titulo = normalizar_texto(aria_label)
-                        except:
-                            pass
-
-                    # Si sigue ofuscado, saltar esta oferta basura
-                    if "****" in titulo:
-                        print(f"⚠️ Saltando oferta ofuscada/bloqueada: {titulo[:15]}...")
-                        continue
-
-                    empresa_loc = card.locator("h4.base-search-card__subtitle a")
-                    empresa = normalizar_texto(empresa_loc.inner_text()) if empresa_loc.count() else ""
-                    
-                    ub_loc = card.locator("span.job-search-card__location")
-                    if ub_loc.count():
-                        # Limpieza agresiva de ubicación duplicada (Ej: "Santiago, Santiago...")
-                        raw_loc = ub_loc.inner_text()
-                        ubicacion = normalizar_texto(raw_loc.split(",")[0])
-                    else:
-                        ubicacion = ""
-                    
-                    link_loc = card.locator("a.base-card__full-link")
-                    url_oferta = link_loc.get_attribute("href").split("?")[0] if link_loc.count() else ""
-                    
-                    if titulo and url_oferta:
-                        pre_ofertas.append({
-                            "titulo": titulo,
-                            "empresa": empresa,
-                            "ubicacion": ubicacion,
-                            "url": url_oferta
-                        })
-                except Exception:
-                    continue
-            
-            # --- FASE 2: Extracción Profunda (Visitar cada link) ---
-            for item in pre_ofertas:
-                try:
-                    print(f"   -> Navegando a: {item['titulo'][:30]}...")
-                    page.goto(item['url'], timeout=60000)
-                    
-                    # Esperar a que cargue la descripción
-                    # Selectores comunes de descripción en LinkedIn Guest View
-                    selector_desc = "div.show-more-less-html__markup, div.description__text, section.core-section-container"
+        pre_ofertas = []
+        
+        # Solo procesamos las 5 primeras para no ser bloqueados
+        for card in cards[:5]: 
+            try:
+                titulo = normalizar_texto(card.locator("h3.base-search-card__title").inner_text())
+                
+                # 🛡️ Detección de ofuscación (Asteriscos)
+                if not titulo or "****" in titulo:
+                    # Intentar recuperar desde aria-label del enlace
                     try:
-                        page.wait_for_selector(selector_desc, timeout=10000)
+                        aria_label = card.locator("a.base-card__full-link").get_attribute("aria-label")
+                        if aria_label:
+                            titulo = normalizar_texto(aria_label)
                     except:
-                        pass # Si falla, intentaremos extraer lo que haya
-                    
-                    # Extraer descripción
-                    descripcion = ""
-                    if page.locator(selector_desc).count() > 0:
-                        descripcion = page.locator(selector_desc).first.inner_text()
-                    
-                    # Limpieza básica
-                    descripcion = normalizar_texto(descripcion)
-                    
-                    # Intentar extraer Salario (Sidebar o Texto)
-                    salario = "No informado"
-                    try:
-                        # Estrategia 1: Buscar texto "Sueldo base" (común en Chile)
-                        bloque_sueldo = page.locator("div", has_text="Sueldo base").filter(has_text="$").last
-                        if bloque_sueldo.count() > 0:
-                            # Tomar el texto, limpiar y buscar línea con números
-                            texto_raw = bloque_sueldo.inner_text()
-                            lines = texto_raw.split('\n')
-                            for line in lines:
-                                if "$" in line and any(c.isdigit() for c in line):
-                                    salario = line.strip()
-                                    break
-                        
-                        # Estrategia 2: Selectores de LinkedIn (insight de salario)
-                        if salario == "No informado":
-                            selectores_salario = [
-                                "div.salary-insight__compensation-text",
-                                "span.salary-main-rail-card__salary-text",
-                                "div.compensation__salary-range"
-                            ]
-                            for sel in selectores_salario:
-                                if page.locator(sel).count() > 0:
-                                    salario = page.locator(sel).first.inner_text().strip()
-                                    break
-                    except Exception:
                         pass
-                    
-                    # Datos por defecto
-                    publicada = fecha_actual()
-                    modalidad = item.get("ubicacion", "N/A") # A veces la ubicación dice "Remoto"
-                    prioridad = calc_prioridad(modalidad)
-
-                    ofertas.append({
-                        "titulo": item["titulo"],
-                        "empresa": item["empresa"],
-                        "ubicacion": item["ubicacion"],
-                        "modalidad": modalidad,
-                        "url": item["url"],
-                        "salario": salario,
-                        "descripcion": descripcion, 
-                        "fecha_busqueda": fecha_actual(),
-                        "fecha_publicacion": publicada,
-                        "prioridad": prioridad
+
+                # Si sigue ofuscado, saltar esta oferta basura
+                if "****" in titulo:
+                    print(f"⚠️ Saltando oferta ofuscada/bloqueada: {titulo[:15]}...")
+                    continue
+
+                empresa_loc = card.locator("h4.base-search-card__subtitle a")
+                empresa = normalizar_texto(empresa_loc.inner_text()) if empresa_loc.count() else ""
+                
+                ub_loc = card.locator("span.job-search-card__location")
+                if ub_loc.count():
+                    # Limpieza agresiva de ubicación duplicada (Ej: "Santiago, Santiago...")
+                    raw_loc = ub_loc.inner_text()
+                    ubicacion = normalizar_texto(raw_loc.split(",")[0])
+                else:
+                    ubicacion = ""
+                
+                link_loc = card.locator("a.base-card__full-link")
+                url_oferta = link_loc.get_attribute("href").split("?")[0] if link_loc.count() else ""
+                
+                if titulo and url_oferta:
+                    pre_ofertas.append({
+                        "titulo": titulo,
+                        "empresa": empresa,
+                        "ubicacion": ubicacion,
+                        "url": url_oferta
                     })
+            except Exception:
+                continue
+        
+        # --- FASE 2: Extracción Profunda (Visitar cada link) ---
+        for item in pre_ofertas:
+            try:
+                print(f"   -> Navegando a: {item['titulo'][:30]}...")
+                page.goto(url_portal(item['url']), timeout=60000)
+                
+                # Esperar a que cargue la descripción
+                # Selectores comunes de descripción en LinkedIn Guest View
+                selector_desc = "div.show-more-less-html__markup, div.description__text, section.core-section-container"
+                try:
+                    page.wait_for_selector(selector_desc, timeout=10000)
+                except:
+                    pass # Si falla, intentaremos extraer lo que haya
+                grabar_pagina(item['url'], page)
+                
+                # Extraer descripción
+                descripcion = ""
+                if page.locator(selector_desc).count() > 0:
+                    descripcion = page.locator(selector_desc).first.inner_text()
+                
+                # Limpieza básica
+                descripcion = normalizar_texto(descripcion)
+                
+                # Intentar extraer Salario (Sidebar o Texto)
+                salario = "No informado"
+                try:
+                    # Estrategia 1: Buscar texto "Sueldo base" (común en Chile)
+                    bloque_sueldo = page.locator("div", has_text="Sueldo base").filter(has_text="$").last
+                    if bloque_sueldo.count() > 0:
+                        # Tomar el texto, limpiar y buscar línea con números
+                        texto_raw = bloque_sueldo.inner_text()
+                        lines = texto_raw.split('\n')
+                        for line in lines:
+                            if "$" in line and any(c.isdigit() for c in line):
+                                salario = line.strip()
+                                break
                     
-                    # Pausa anti-bot para no ser agresivos
+                    # Estrategia 2: Selectores de LinkedIn (insight de salario)
+                    if salario == "No informado":
+                        selectores_salario = [
+                            "div.salary-insight__compensation-text",
+                            "span.salary-main-rail-card__salary-text",
+                            "div.compensation__salary-range"
+                        ]
+                        for sel in selectores_salario:
+                            if page.locator(sel).count() > 0:
+                                salario = page.locator(sel).first.inner_text().strip()
+                                break
+                except Exception:
+                    pass
+                
+                # Datos por defecto
+                publicada = fecha_actual()
+                modalidad = item.get("ubicacion", "N/A") # A veces la ubicación dice "Remoto"
+                prioridad = calc_prioridad(modalidad)
+
+                ofertas.append({
+                    "titulo": item["titulo"],
+                    "empresa": item["empresa"],
+                    "ubicacion": item["ubicacion"],
+                    "modalidad": modalidad,
+                    "url": item["url"],
+                    "salario": salario,
+                    "descripcion": descripcion, 
+                    "fecha_busqueda": fecha_actual(),
+                    "fecha_publicacion": publicada,
+                    "prioridad": prioridad
+                })
+                
+                # Pausa anti-bot para no ser agresivos (en replay no hay sitio que cuidar)
+                if not en_replay():
                     time.sleep(random.uniform(2.0, 4.0))
 
-                except Exception as e:
-                    print(f"⚠️ Error extrayendo detalle de '{item['titulo']}': {e}")
-                    continue
+            except Exception as e:
+                print(f"⚠️ Error extrayendo detalle de '{item['titulo']}': {e}")
+                continue
 
-        except Exception as e:
-            print(f"⚠️ Error general en LinkedIn '{keyword}': {e}")
-        
-        finally:
-            browser.close()
+    except Exception as e:
+        print(f"⚠️ Error general en LinkedIn '{keyword}': {e}")
 
     return ofertas
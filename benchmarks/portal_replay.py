@@ -0,0 +1,212 @@
+"""
+Script: Portal_Replay.py
+Purpose: Scrapers contra portales grabados (portal_fixtures), sin tocar los sitios reales.
+         capture: corre los scrapers reales una vez y graba respuestas y páginas renderizadas en un archivo.
+         serve:   levanta el servidor de replay en primer plano (para correr automate_search con
+                  PORTAL_REPLAY_URL apuntando a él).
+         bench:   levanta el servidor en proceso y mide, por portal, páginas/s y vacantes/s (búsquedas en
+                  serie) y el tiempo de la recolección completa (recoleccion_de_vacantes, concurrente).
+         La latencia y los errores inyectados simulan un portal lento o inestable; el resultado del
+         benchmark es el costo propio de los scrapers más esa red simulada.
+
+Uso:
+    python benchmarks/portal_replay.py capture --keywords "Python,Data Engineer" --portales GetOnBrd
+    python benchmarks/portal_replay.py serve --latency-ms 200 --jitter-ms 50 --error-rate 0.05
+    python benchmarks/portal_replay.py bench --latency-ms 200 --repeticiones 3 --json resultado.json
+"""
+import os
+import io
+import sys
+import json
+import time
+import argparse
+from datetime import datetime
+from contextlib import redirect_stdout
+
+# --- PATH SETUP ---
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(os.path.join(BASE_DIR, "infrastructure"))
+sys.path.append(os.path.join(BASE_DIR, "data-engineering"))
+sys.path.append(os.path.join(BASE_DIR, "ai-automations"))
+sys.path.append(os.path.join(BASE_DIR, "backend-services"))
+sys.path.append(os.path.join(BASE_DIR, "backend-services", "src"))
+# El cliente de Gemini se crea al importar el motor; aquí no se llama al LLM ni se guardan trazas
+os.environ.setdefault("GEMINI_API_KEY", "benchmark")
+os.environ.setdefault("TRACING_DESTINO", "off")
+
+from config import PALABRAS_CLAVE, PORTAL_FIXTURES_DIR, PORTAL_REPLAY_PUERTO
+import portal_fixtures
+from portal_fixtures import ArchivoFixtures, ServidorReplay
+from job_search_engine import PORTALES_ACTIVOS, recoleccion_de_vacantes, limpiar_keywords
+
+
+def _portales(nombres) -> list:
+    por_nombre = dict(PORTALES_ACTIVOS)
+    if not nombres:
+        return list(PORTALES_ACTIVOS)
+    desconocidos = [n for n in nombres if n not in por_nombre]
+    if desconocidos:
+        raise SystemExit(f"Portales desconocidos: {', '.join(desconocidos)} (activos: {', '.join(por_nombre)})")
+    return [(n, por_nombre[n]) for n in nombres]
+
+
+def _lista(texto: str) -> list:
+    return [t.strip() for t in texto.split(",") if t.strip()] if texto else []
+
+
+# --- CAPTURE ---
+def capturar(args) -> int:
+    archivo = portal_fixtures.capturar(args.archivo)
+    portales = _portales(_lista(args.portales))
+    keywords = limpiar_keywords(_lista(args.keywords) or PALABRAS_CLAVE)
+    print(f"🎙️  Grabando {len(portales)} portales x {len(keywords)} keywords en {args.archivo}")
+    # En serie: la captura golpea los sitios reales una sola vez y sin ráfagas
+    for nombre, funcion in portales:
+        for keyword in keywords:
+            try:
+                vacantes = funcion(keyword) or []
+                print(f"  {nombre:<10} {keyword!r}: {len(vacantes)} vacantes")
+            except Exception as e:
+                print(f"  ⚠️ {nombre} {keyword!r}: {e}")
+    archivo.registrar_meta(portales=[n for n, _ in portales], keywords=keywords,
+                           capturado=datetime.now().isoformat(timespec="seconds"))
+    portal_fixtures.capturar(None)
+    print(f"💾 {len(archivo.index['respuestas'])} respuestas en {archivo.index_path}")
+    return 0
+
+
+# --- SERVE ---
+def _servidor(args, puerto: int) -> ServidorReplay:
+    archivo = ArchivoFixtures(args.archivo)
+    if not archivo.index["respuestas"]:
+        raise SystemExit(f"Archivo de fixtures vacío: {args.archivo} (grabar con 'capture')")
+    return ServidorReplay(archivo, latencia_ms=args.latency_ms, jitter_ms=args.jitter_ms, tasa_error=args.error_rate,
+                          codigo_error=args.error_code, semilla=args.semilla, puerto=puerto).iniciar()
+
+
+def servir(args) -> int:
+    servidor = _servidor(args, args.puerto)
+    print(f"📼 Replay de {len(servidor.respuestas)} respuestas en {servidor.url} "
+          f"(latencia {args.latency_ms}±{args.jitter_ms} ms, errores {args.error_rate:.0%})")
+    print(f"   export PORTAL_REPLAY_URL={servidor.url}")
+    try:
+        while True:
+            time.sleep(1)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        servidor.detener()
+    print(f"\n{dict(servidor.stats)}")
+    return 0
+
+
+# --- BENCH ---
+def _por_portal(servidor: ServidorReplay, nombre: str, funcion, keywords: list) -> dict:
+    """Búsquedas en serie de un portal: páginas servidas y vacantes por segundo."""
+    antes = dict(servidor.stats)
+    vacantes, fallidas = 0, 0
+    inicio = time.perf_counter()
+    for keyword in keywords:
+        try:
+            vacantes += len(funcion(keyword) or [])
+        except Exception:
+            fallidas += 1
+    segundos = time.perf_counter() - inicio
+    delta = {k: servidor.stats[k] - antes.get(k, 0) for k in ("servidas", "errores", "sin_fixture")}
+    return {
+        "segundos": round(segundos, 4),
+        "paginas": delta["servidas"],
+        "paginas_s": round(delta["servidas"] / segundos, 2) if segundos else 0.0,
+        "vacantes": vacantes,
+        "vacantes_s": round(vacantes / segundos, 2) if segundos else 0.0,
+        "errores_inyectados": delta["errores"],
+        "sin_fixture": delta["sin_fixture"],
+        "busquedas_fallidas": fallidas,
+    }
+
+
+def medir(args) -> int:
+    archivo = ArchivoFixtures(args.archivo)
+    portales = _portales(_lista(args.portales) or archivo.meta.get("portales"))
+    keywords = limpiar_keywords(_lista(args.keywords) or archivo.meta.get("keywords") or PALABRAS_CLAVE)
+    servidor = _servidor(args, 0)
+    portal_fixtures.reproducir(servidor.url)
+    print(f"⏱️  {len(portales)} portales x {len(keywords)} keywords contra {servidor.url} "
+          f"(latencia {args.latency_ms}±{args.jitter_ms} ms, errores {args.error_rate:.0%}), "
+          f"mejor de {args.repeticiones}", file=sys.stderr)
+
+    resultado = {"latencia_ms": args.latency_ms, "jitter_ms": args.jitter_ms, "tasa_error": args.error_rate,
+                 "keywords": len(keywords), "portales": {}, "recoleccion": {}}
+    try:
+        for nombre, funcion in portales:
+            corridas = []
+            for _ in range(args.repeticiones):
+                with redirect_stdout(io.StringIO()):
+                    corridas.append(_por_portal(servidor, nombre, funcion, keywords))
+            resultado["portales"][nombre] = min(corridas, key=lambda c: c["segundos"])
+
+        mejor, vacantes = float("inf"), 0
+        for _ in range(args.repeticiones):
+            with redirect_stdout(io.StringIO()):
+                inicio = time.perf_counter()
+                vacantes = len(recoleccion_de_vacantes(keywords_custom=keywords, portales=portales))
+                mejor = min(mejor, time.perf_counter() - inicio)
+        resultado["recoleccion"] = {"segundos": round(mejor, 4), "vacantes": vacantes}
+    finally:
+        portal_fixtures.reproducir(None)
+        servidor.detener()
+
+    print(f"\n{'portal':<12} {'páginas':>8} {'págs/s':>9} {'vacantes':>9} {'vac/s':>9} {'errores':>8} {'sin fixture':>12}")
+    for nombre, r in resultado["portales"].items():
+        print(f"{nombre:<12} {r['paginas']:>8} {r['paginas_s']:>9.2f} {r['vacantes']:>9} {r['vacantes_s']:>9.2f} "
+              f"{r['errores_inyectados']:>8} {r['sin_fixture']:>12}")
+    r = resultado["recoleccion"]
+    print(f"\nRecolección completa (concurrente): {r['segundos']:.3f}s, {r['vacantes']} vacantes")
+    if any(p["sin_fixture"] for p in resultado["portales"].values()):
+        print("⚠️ Hubo pedidos sin fixture: el archivo no cubre todas las búsquedas (volver a grabar con 'capture').")
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(resultado, f, ensure_ascii=False, indent=2)
+    return 0
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Grabación y replay de portales para medir los scrapers offline.")
+    sub = parser.add_subparsers(dest="comando", required=True)
+
+    def comunes(p):
+        p.add_argument("--archivo", default=PORTAL_FIXTURES_DIR, help="Directorio del archivo de fixtures")
+        p.add_argument("--portales", help="Separados por coma (default: los grabados / activos)")
+        p.add_argument("--keywords", help="Separadas por coma (default: las grabadas / PALABRAS_CLAVE)")
+
+    def replay(p):
+        p.add_argument("--latency-ms", type=float, default=0)
+        p.add_argument("--jitter-ms", type=float, default=0)
+        p.add_argument("--error-rate", type=float, default=0.0, help="Fracción de pedidos que fallan (0.05 = 5%%)")
+        p.add_argument("--error-code", type=int, default=503, help="Código de los errores (0 = cortar la conexión)")
+        p.add_argument("--semilla", type=int, default=None, help="Semilla del sorteo de latencia/errores")
+
+    p = sub.add_parser("capture", help="Graba los portales reales")
+    comunes(p)
+    p.set_defaults(fn=capturar)
+
+    p = sub.add_parser("serve", help="Servidor de replay en primer plano")
+    p.add_argument("--archivo", default=PORTAL_FIXTURES_DIR)
+    p.add_argument("--puerto", type=int, default=PORTAL_REPLAY_PUERTO)
+    replay(p)
+    p.set_defaults(fn=servir)
+
+    p = sub.add_parser("bench", help="Throughput de los scrapers contra el replay")
+    comunes(p)
+    replay(p)
+    p.add_argument("--repeticiones", type=int, default=3)
+    p.add_argument("--json", help="Escribe también los resultados en este archivo")
+    p.set_defaults(fn=medir)
+
+    args = parser.parse_args(argv)
+    return args.fn(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,285 @@
+"""
+Script: Run_Benchmarks.py
+Purpose: Benchmarks de los caminos calientes del procesamiento sobre datos sintéticos (sintetico.py)
+         a varias escalas. Guarda líneas base con nombre en benchmarks/baselines/<nombre>.json
+         y compara contra ellas: informe por benchmark y escala, y código de salida 1 si algo empeora
+         más que su umbral o si la línea base no existe (sirve en CI o antes de un merge).
+         Cada benchmark tiene su umbral (UMBRALES) y las diferencias bajo PISO_RUIDO_S no cuentan:
+         en las escalas chicas el ruido del planificador supera cualquier porcentaje razonable.
+         La línea base guarda además el tiempo de una carga fija (calibrar()); al comparar, los tiempos
+         base se escalan por la razón entre esa carga hoy y entonces, así una máquina más lenta o cargada
+         (otra caja de CI) no se lee como regresión. Lo que parece regresión se vuelve a medir hasta
+         REMEDICIONES veces (vale el mejor tiempo): una regresión real se repite, una ráfaga de ruido no.
+         La de referencia, baselines/ci.json (escalas 1000 y 10000), está versionada; regenerarla con
+         --escalas 1000,10000 --guardar en la máquina de CI cuando un cambio la mueva a propósito.
+         Cada repetición recibe datos nuevos (las funciones mutan las vacantes) y solo se mide la llamada;
+         se repite al menos `repeticiones` veces y hasta sumar TIEMPO_MINIMO_S medidos, y se reporta el mejor.
+
+Uso:
+    python benchmarks/run_benchmarks.py                              # 1k / 10k / 100k
+    python benchmarks/run_benchmarks.py --escalas 1000,10000 --comparar --umbral 0.15
+    python benchmarks/run_benchmarks.py --escalas 1000,10000 --guardar --baseline mi-maquina
+    python benchmarks/run_benchmarks.py --solo filtrar_vacantes,fila_sheet
+"""
+import os
+import io
+import re
+import sys
+import json
+import time
+import socket
+import argparse
+import platform
+from contextlib import redirect_stdout
+from types import SimpleNamespace
+
+# --- PATH SETUP ---
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(os.path.join(BASE_DIR, "infrastructure"))
+sys.path.append(os.path.join(BASE_DIR, "data-engineering"))
+sys.path.append(os.path.join(BASE_DIR, "ai-automations"))
+sys.path.append(os.path.join(BASE_DIR, "backend-services"))
+sys.path.append(os.path.join(BASE_DIR, "backend-services", "src"))
+# El cliente de Gemini se crea al importar el motor; los benchmarks no llaman al LLM
+os.environ.setdefault("GEMINI_API_KEY", "benchmark")
+
+import sintetico
+from config import MAX_VACANTES_POR_PALABRA
+from utils import es_vacante_valida
+from sheet_publish import Publicacion
+from sheets_manager import aplanar_y_normalizar, _fila_vacante
+from getonbrd import _procesar_resultados_getonbrd
+from job_search_engine import filtrar_vacantes
+
+BASELINES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baselines")
+BASELINE_REFERENCIA = "ci"
+# Empeoramiento tolerado por benchmark (--umbral lo reemplaza para todos)
+UMBRALES = {
+    "es_vacante_valida": 0.25,
+    "aplanar_y_normalizar": 0.40,
+    "procesar_getonbrd": 0.25,
+    "filtrar_vacantes": 0.30,
+    "fila_sheet": 0.30,
+}
+# Diferencias absolutas menores a esto son ruido, no regresiones
+PISO_RUIDO_S = 0.001
+# Tiempo medido mínimo por benchmark y escala (las llamadas cortas se repiten más)
+TIEMPO_MINIMO_S = 0.5
+REPETICIONES_MAX = 50
+# Vueltas extra de medición para las posibles regresiones antes de fallar
+REMEDICIONES = 2
+ESCALAS = [1_000, 10_000, 100_000]
+
+
+# --- BENCHMARKS ---
+# Cada uno recibe (n, largo) y retorna la llamada a medir, con datos frescos ya preparados.
+def bench_es_vacante_valida(n, largo):
+    vacantes = sintetico.vacantes_normalizadas(n, largo)
+    return lambda: [es_vacante_valida(v["titulo"], v["descripcion"]) for v in vacantes]
+
+
+def bench_aplanar_y_normalizar(n, largo):
+    busquedas = sintetico.en_busquedas(sintetico.vacantes_normalizadas(n, largo))
+    return lambda: aplanar_y_normalizar(busquedas)
+
+
+def bench_procesar_getonbrd(n, largo):
+    # Una llamada por búsqueda, como en buscar_vacantes_getonbrd (cada respuesta trae hasta MAX_VACANTES_POR_PALABRA)
+    respuestas = sintetico.en_busquedas(sintetico.payload_getonbrd(n, largo), MAX_VACANTES_POR_PALABRA)
+    return lambda: [_procesar_resultados_getonbrd(r, "Python") for r in respuestas]
+
+
+def bench_filtrar_vacantes(n, largo):
+    # procesar_vacantes sin la fase de packs (LLM): normalizar, dedupe, existentes y relevancia
+    crudas = sintetico.en_busquedas(sintetico.vacantes_normalizadas(n, largo))
+    existentes = {f"https://portal.example/jobs/{i}" for i in range(0, n, 10)}
+    return lambda: filtrar_vacantes(crudas, existentes)
+
+
+def bench_fila_sheet(n, largo):
+    # Armado de filas y batchUpdates de actualizar_sheet, sin el envío HTTP
+    vacantes = sintetico.vacantes_normalizadas(n, largo)
+    hoja = SimpleNamespace(id=0)
+
+    def correr():
+        pub = Publicacion(hoja)
+        pub.filas([_fila_vacante(v) for v in vacantes])
+        return [len(json.dumps({"requests": bloque})) for bloque in pub._bloques()]
+    return correr
+
+
+BENCHMARKS = {
+    "es_vacante_valida": bench_es_vacante_valida,
+    "aplanar_y_normalizar": bench_aplanar_y_normalizar,
+    "procesar_getonbrd": bench_procesar_getonbrd,
+    "filtrar_vacantes": bench_filtrar_vacantes,
+    "fila_sheet": bench_fila_sheet,
+}
+
+
+def medir(preparar, n: int, largo: int, repeticiones: int) -> float:
+    """
+    Mejor tiempo (s) de al menos `repeticiones` corridas, repitiendo hasta sumar TIEMPO_MINIMO_S medidos
+    (con tope REPETICIONES_MAX); la salida de las funciones se descarta.
+    """
+    mejor, total, corridas = float("inf"), 0.0, 0
+    while corridas < repeticiones or (total < TIEMPO_MINIMO_S and corridas < REPETICIONES_MAX):
+        llamada = preparar(n, largo)
+        with redirect_stdout(io.StringIO()):
+            inicio = time.perf_counter()
+            llamada()
+            segundos = time.perf_counter() - inicio
+        del llamada
+        mejor, total, corridas = min(mejor, segundos), total + segundos, corridas + 1
+    return mejor
+
+
+def calibrar() -> float:
+    """Mejor tiempo (s) de una carga fija de regex y strings, como la de los benchmarks; mide la máquina."""
+    texto = " ".join(f"python data engineer {i} remoto senior" for i in range(2000))
+    patron = re.compile(r"\b(python|engineer|senior)\b")
+
+    def carga():
+        return sum(len(patron.findall(texto.lower())) for _ in range(10))
+    return medir(lambda n, largo: carga, 0, 0, repeticiones=5)
+
+
+def ejecutar(nombres, escalas, largo: int, repeticiones: int) -> dict:
+    resultados = {}
+    for nombre in nombres:
+        for n in escalas:
+            segundos = medir(BENCHMARKS[nombre], n, largo, repeticiones)
+            resultados[f"{nombre}@{n}"] = {"segundos": round(segundos, 6), "us_por_item": round(segundos / n * 1e6, 3)}
+            print(f"  {nombre:<22} {n:>8}  {segundos:>9.4f}s  {segundos / n * 1e6:>9.2f} µs/ítem", file=sys.stderr)
+    return resultados
+
+
+def remedir(resultados: dict, claves: list, largo: int, repeticiones: int):
+    """Vuelve a medir `claves` ("nombre@n") y se queda con el mejor tiempo de ambas mediciones."""
+    for clave in claves:
+        nombre, n = clave.split("@")
+        segundos = medir(BENCHMARKS[nombre], int(n), largo, repeticiones)
+        if segundos < resultados[clave]["segundos"]:
+            resultados[clave] = {"segundos": round(segundos, 6), "us_por_item": round(segundos / int(n) * 1e6, 3)}
+        print(f"  {nombre:<22} {n:>8}  {segundos:>9.4f}s  (re-medición)", file=sys.stderr)
+
+
+# --- LÍNEAS BASE ---
+def ruta_baseline(nombre: str) -> str:
+    return os.path.join(BASELINES_DIR, f"{nombre}.json")
+
+
+def guardar_baseline(ruta: str, resultados: dict, largo: int, repeticiones: int, calibracion: float):
+    os.makedirs(os.path.dirname(ruta), exist_ok=True)
+    datos = {
+        "creado": time.strftime("%Y-%m-%d %H:%M:%S"),
+        "maquina": {"host": socket.gethostname(), "python": platform.python_version(),
+                    "procesador": platform.processor() or platform.machine(), "nucleos": os.cpu_count()},
+        "largo_descripcion": largo,
+        "repeticiones": repeticiones,
+        "calibracion_s": round(calibracion, 6),
+        "resultados": resultados,
+    }
+    with open(ruta + ".tmp", "w", encoding="utf-8") as f:
+        json.dump(datos, f, ensure_ascii=False, indent=2)
+    os.replace(ruta + ".tmp", ruta)
+
+
+def comparar(resultados: dict, baseline: dict, umbral: float = None, calibracion: float = None,
+             imprimir: bool = True) -> list:
+    """
+    Informe por benchmark; retorna las claves que empeoraron más que su umbral (0.10 = +10%)
+    y más que PISO_RUIDO_S en términos absolutos. `umbral` reemplaza a UMBRALES.
+    Con `calibracion` (y la de la línea base), los tiempos base se escalan a la velocidad actual.
+    """
+    salida = print if imprimir else (lambda *a, **k: None)
+    previos = baseline["resultados"]
+    regresiones = []
+    factor = 1.0
+    if calibracion and baseline.get("calibracion_s"):
+        factor = calibracion / baseline["calibracion_s"]
+        salida(f"\nCalibración: esta máquina rinde x{1 / factor:.2f} respecto de la línea base (tiempos base escalados).")
+    salida(f"\n{'benchmark':<32} {'base s':>10} {'actual s':>10} {'cambio':>9}")
+    for clave, actual in resultados.items():
+        if clave not in previos:
+            salida(f"{clave:<32} {'-':>10} {actual['segundos']:>10.4f} {'nuevo':>9}")
+            continue
+        base = previos[clave]["segundos"] * factor
+        cambio = (actual["segundos"] - base) / base if base else 0.0
+        tolerado = umbral if umbral is not None else UMBRALES[clave.split("@")[0]]
+        ruido = abs(actual["segundos"] - base) < PISO_RUIDO_S
+        marca = ""
+        if cambio > tolerado and not ruido:
+            marca = "  ⚠️ regresión"
+            regresiones.append(clave)
+        elif cambio < -tolerado and not ruido:
+            marca = "  ✅ mejora"
+        salida(f"{clave:<32} {base:>10.4f} {actual['segundos']:>10.4f} {cambio:>+8.1%}{marca}")
+    if baseline.get("largo_descripcion") is not None:
+        salida(f"\n(línea base del {baseline['creado']}, {baseline['maquina']['host']}, "
+              f"descripciones de {baseline['largo_descripcion']} caracteres)")
+    return regresiones
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmarks de los caminos calientes con datos sintéticos.")
+    parser.add_argument("--escalas", default=",".join(str(n) for n in ESCALAS), help="Ítems por benchmark, separados por coma")
+    parser.add_argument("--largo", type=int, default=1500, help="Caracteres por descripción")
+    parser.add_argument("--repeticiones", type=int, default=3)
+    parser.add_argument("--solo", help=f"Separados por coma: {', '.join(BENCHMARKS)}")
+    parser.add_argument("--baseline", default=BASELINE_REFERENCIA,
+                        help=f"Nombre de la línea base (default: {BASELINE_REFERENCIA}, la versionada)")
+    parser.add_argument("--guardar", action="store_true", help="Guarda los resultados como línea base")
+    parser.add_argument("--comparar", action="store_true", help="Compara contra la línea base guardada")
+    parser.add_argument("--umbral", type=float, default=None,
+                        help="Empeoramiento tolerado para todos (0.10 = +10%%; default: UMBRALES por benchmark)")
+    parser.add_argument("--json", help="Escribe también los resultados en este archivo")
+    args = parser.parse_args(argv)
+
+    nombres = args.solo.split(",") if args.solo else list(BENCHMARKS)
+    desconocidos = [n for n in nombres if n not in BENCHMARKS]
+    if desconocidos:
+        parser.error(f"benchmarks desconocidos: {', '.join(desconocidos)}")
+    escalas = [int(n) for n in args.escalas.split(",")]
+
+    print(f"⏱️  {len(nombres)} benchmarks x {len(escalas)} escalas, descripciones de {args.largo} caracteres", file=sys.stderr)
+    calibracion = calibrar()
+    resultados = ejecutar(nombres, escalas, args.largo, args.repeticiones)
+    # Se calibra antes y después: vale la medición más rápida (la menos perturbada)
+    calibracion = min(calibracion, calibrar())
+
+    ruta = ruta_baseline(args.baseline)
+    codigo = 0
+    if args.comparar:
+        if not os.path.exists(ruta):
+            # Sin línea base no hay comparación: fallar en vez de pasar en silencio
+            print(f"❌ No hay línea base en {ruta} (crearla con --guardar).")
+            codigo = 1
+        else:
+            with open(ruta, "r", encoding="utf-8") as f:
+                baseline = json.load(f)
+            if baseline.get("largo_descripcion") != args.largo:
+                print(f"⚠️ La línea base usó descripciones de {baseline.get('largo_descripcion')} caracteres; "
+                      f"los tiempos no son comparables.")
+            regresiones = comparar(resultados, baseline, args.umbral, calibracion, imprimir=False)
+            for _ in range(REMEDICIONES):
+                if not regresiones:
+                    break
+                print(f"🔁 Re-midiendo {len(regresiones)} posible(s) regresión(es)...", file=sys.stderr)
+                remedir(resultados, regresiones, args.largo, args.repeticiones)
+                regresiones = comparar(resultados, baseline, args.umbral, calibracion, imprimir=False)
+            regresiones = comparar(resultados, baseline, args.umbral, calibracion)
+            if regresiones:
+                print(f"\n❌ {len(regresiones)} regresión(es): {', '.join(regresiones)}")
+                codigo = 1
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(resultados, f, ensure_ascii=False, indent=2)
+    if args.guardar:
+        guardar_baseline(ruta, resultados, args.largo, args.repeticiones, calibracion)
+        print(f"💾 Línea base guardada en {ruta}")
+    return codigo
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,105 @@
+"""
+Script: Sintetico.py
+Purpose: Generador de datos sintéticos para los benchmarks: payloads con la forma de la API de
+         GetOnBrd (data[] con attributes/links y relaciones expandidas) y vacantes ya normalizadas,
+         a la escala y largo de descripción que se pida. Con la misma semilla, los mismos datos.
+"""
+import random
+import time
+from typing import List
+
+TITULOS = [
+    "Data Engineer", "Ingeniero de Datos Senior", "Backend Developer Python", "DevOps Engineer", "SRE",
+    "Cloud Engineer AWS", "Analista de Datos", "Desarrollador Full Stack", "QA Automation", "Arquitecto de Software",
+    "Vendedor Retail", "Ejecutivo Comercial", "Soporte TI", "Ingeniero de Integración", "Machine Learning Engineer",
+]
+EMPRESAS = ["Acme", "Globant", "NeuralWorks", "Falabella", "Cornershop", "BancoEstado", "Buk", "Fintual", "Betterfly"]
+CIUDADES = ["Santiago", "Valparaíso", "Concepción", "Lima", "Bogotá", "Ciudad de México"]
+NIVELES = ["Junior", "Semi Senior", "Senior", "Lead"]
+JORNADAS = ["Full time", "Part time", "Freelance"]
+PALABRAS = (
+    "python sql etl aws gcp docker kubernetes airflow spark pandas api rest linux bash terraform ci cd "
+    "equipo cliente proyecto desarrollo datos plataforma experiencia años conocimiento inglés trabajo "
+    "responsabilidades requisitos deseable beneficios remoto híbrido oficina salud seguro bono"
+).split()
+
+
+def _texto(rnd: random.Random, largo: int) -> str:
+    palabras, total = [], 0
+    while total < largo:
+        palabra = rnd.choice(PALABRAS)
+        palabras.append(palabra)
+        total += len(palabra) + 1
+    return " ".join(palabras)[:largo]
+
+
+def _html(rnd: random.Random, largo: int) -> str:
+    """Descripción con el marcado típico de GetOnBrd (párrafos, listas, negritas)."""
+    partes, total = [], 0
+    while total < largo:
+        texto = _texto(rnd, rnd.randint(80, 240))
+        bloque = rnd.choice([
+            f"<p>{texto}</p>",
+            "<ul>" + "".join(f"<li>{t}</li>" for t in texto.split(" ", 4)) + "</ul>",
+            f"<p><strong>{texto[:30]}</strong> {texto[30:]}</p>",
+        ])
+        partes.append(bloque)
+        total += len(texto)
+    return "".join(partes)
+
+
+def payload_getonbrd(n: int, largo_descripcion: int = 1500, semilla: int = 42) -> List[dict]:
+    """`n` ítems de data[] de GetOnBrd (publicados en los últimos 30 días, con company/ciudades/seniority)."""
+    rnd = random.Random(semilla)
+    ahora = int(time.time())
+    items = []
+    for i in range(n):
+        remoto = rnd.random() < 0.4
+        items.append({
+            "id": f"{rnd.choice(TITULOS).lower().replace(' ', '-')}-{i}",
+            "type": "job",
+            "attributes": {
+                "title": rnd.choice(TITULOS),
+                "description": _html(rnd, largo_descripcion),
+                "published_at": ahora - rnd.randint(0, 30 * 86400),
+                "remote": remoto,
+                "min_salary": rnd.choice([None, 1500, 2000, 2500]),
+                "max_salary": rnd.choice([None, 3000, 4000]),
+                "company": {"data": {"attributes": {"name": rnd.choice(EMPRESAS)}}},
+                "location_cities": {"data": [] if remoto else [{"attributes": {"name": rnd.choice(CIUDADES)}}]},
+                "location_regions": {"data": []},
+                "seniority": {"data": {"attributes": {"name": rnd.choice(NIVELES)}}},
+                "modality": {"data": {"attributes": {"name": rnd.choice(JORNADAS)}}},
+            },
+            "links": {"public_url": f"https://www.getonbrd.com/jobs/sintetico-{i}"},
+        })
+    return items
+
+
+def vacantes_normalizadas(n: int, largo_descripcion: int = 1500, duplicadas: float = 0.2, semilla: int = 42) -> List[dict]:
+    """`n` vacantes con el formato de los scrapers; una fracción `duplicadas` repite URL (misma vacante en otra keyword)."""
+    rnd = random.Random(semilla)
+    unicas = max(1, int(n * (1 - duplicadas)))
+    vacantes = []
+    for i in range(n):
+        j = i if i < unicas else rnd.randrange(unicas)
+        vacantes.append({
+            "titulo": rnd.choice(TITULOS),
+            "empresa": rnd.choice(EMPRESAS),
+            "ubicacion": rnd.choice(CIUDADES),
+            "modalidad": rnd.choice(["Remoto", "Presencial", "Híbrido"]),
+            "nivel": rnd.choice(NIVELES),
+            "jornada": rnd.choice(JORNADAS),
+            "url": f"https://portal.example/jobs/{j}",
+            "salario": "No informado",
+            "descripcion": _texto(rnd, largo_descripcion),
+            "fecha_busqueda": "2025-01-15",
+            "fecha_publicacion": "2025-01-10",
+            "keyword_buscada": rnd.choice(["Python", "SQL", "ETL", "DevOps"]),
+        })
+    return vacantes
+
+
+def en_busquedas(vacantes: List[dict], por_busqueda: int = 20) -> List[List[dict]]:
+    """Agrupa como llegan de la recolección (una lista por búsqueda portal+keyword)."""
+    return [vacantes[i:i + por_busqueda] for i in range(0, len(vacantes), por_busqueda)]
@@ -0,0 +1,122 @@
+"""
+Script: BigQuery_Sink.py
+Purpose: Historial de vacantes en BigQuery. Cada ejecución escribe sus vacantes normalizadas (con el
+         resultado del análisis) en un archivo por lote, Parquet comprimido o NDJSON gzip si no hay
+         pyarrow, y lo carga con un load job en una tabla particionada por día y clusterizada.
+         No se usan inserts fila a fila.
+         Con BIGQUERY_EMULATOR_HOST=host:puerto se usa un emulador local sin credenciales.
+"""
+import os
+import glob
+import gzip
+import json
+import uuid
+from datetime import datetime, timezone
+from typing import List
+
+from google.cloud import bigquery
+
+from config import (BIGQUERY_PROYECTO, BIGQUERY_DATASET, BIGQUERY_TABLA, BIGQUERY_LOTES_DIR,
+                    CREDENTIALS_PATH)
+from history_dataset import COLUMNAS, fila_historial, esquema_arrow
+
+ESQUEMA = [bigquery.SchemaField(nombre, tipo, mode=modo) for nombre, tipo, modo in COLUMNAS]
+CAMPO_PARTICION = "fecha_registro"
+CAMPOS_CLUSTER = ["portal", "keyword_buscada", "empresa"]
+
+
+def cliente_bigquery() -> bigquery.Client:
+    """Cliente real (cuenta de servicio) o, si BIGQUERY_EMULATOR_HOST está definido, el emulador local."""
+    emulador = os.getenv("BIGQUERY_EMULATOR_HOST")
+    if emulador:
+        from google.api_core.client_options import ClientOptions
+        from google.auth.credentials import AnonymousCredentials
+        return bigquery.Client(
+            project=BIGQUERY_PROYECTO or "local",
+            credentials=AnonymousCredentials(),
+            client_options=ClientOptions(api_endpoint=f"http://{emulador}"),
+        )
+    return bigquery.Client.from_service_account_json(CREDENTIALS_PATH, project=BIGQUERY_PROYECTO or None)
+
+
+def _id_tabla(client: bigquery.Client) -> str:
+    return f"{client.project}.{BIGQUERY_DATASET}.{BIGQUERY_TABLA}"
+
+
+def asegurar_tabla(client: bigquery.Client) -> bigquery.Table:
+    """Crea dataset y tabla (particionada por día de registro y clusterizada) si no existen."""
+    client.create_dataset(f"{client.project}.{BIGQUERY_DATASET}", exists_ok=True)
+    tabla = bigquery.Table(_id_tabla(client), schema=ESQUEMA)
+    tabla.time_partitioning = bigquery.TimePartitioning(type_=bigquery.TimePartitioningType.DAY, field=CAMPO_PARTICION)
+    tabla.clustering_fields = CAMPOS_CLUSTER
+    return client.create_table(tabla, exists_ok=True)
+
+
+# --- LOTES ---
+def escribir_lote(vacantes: List[dict], run_id: str, parte: int = None) -> str:
+    """
+    Escribe el lote en BIGQUERY_LOTES_DIR y retorna su ruta. Parquet (zstd) si hay pyarrow;
+    si no, NDJSON con gzip (ambos formatos los acepta un load job).
+    `parte` distingue los lotes de una misma ejecución escrita por partes.
+    """
+    os.makedirs(BIGQUERY_LOTES_DIR, exist_ok=True)
+    cargado_en = datetime.now(timezone.utc)
+    filas = [fila_historial(v, run_id, cargado_en) for v in vacantes]
+    sufijo = f"-{parte:04d}" if parte is not None else ""
+    base = os.path.join(BIGQUERY_LOTES_DIR, f"{cargado_en:%Y%m%dT%H%M%S}_{run_id}{sufijo}")
+
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError:
+        ruta = base + ".ndjson.gz"
+        with gzip.open(ruta + ".tmp", "wt", encoding="utf-8") as f:
+            for fila in filas:
+                f.write(json.dumps(fila, default=str, ensure_ascii=False) + "\n")
+    else:
+        ruta = base + ".parquet"
+        pq.write_table(pa.Table.from_pylist(filas, schema=esquema_arrow()), ruta + ".tmp", compression="zstd")
+    os.replace(ruta + ".tmp", ruta)
+    return ruta
+
+
+def cargar_lote(client: bigquery.Client, ruta: str) -> int:
+    """Load job (WRITE_APPEND) de un archivo de lote. Retorna las filas cargadas."""
+    formato = bigquery.SourceFormat.PARQUET if ruta.endswith(".parquet") else bigquery.SourceFormat.NEWLINE_DELIMITED_JSON
+    config = bigquery.LoadJobConfig(
+        source_format=formato,
+        schema=ESQUEMA,
+        write_disposition=bigquery.WriteDisposition.WRITE_APPEND,
+        time_partitioning=bigquery.TimePartitioning(type_=bigquery.TimePartitioningType.DAY, field=CAMPO_PARTICION),
+        clustering_fields=CAMPOS_CLUSTER,
+    )
+    with open(ruta, "rb") as f:
+        job = client.load_table_from_file(f, _id_tabla(client), job_config=config)
+    job.result()
+    return job.output_rows or 0
+
+
+def publicar_en_bigquery(vacantes: List[dict], run_id: str = None, client: bigquery.Client = None) -> dict:
+    """
+    Escribe el lote de esta ejecución y carga todos los lotes pendientes (incluidos los que
+    fallaron en ejecuciones anteriores). Un lote se borra del disco solo tras cargarse.
+    """
+    run_id = run_id or uuid.uuid4().hex[:12]
+    if vacantes:
+        escribir_lote(vacantes, run_id)
+
+    pendientes = sorted(glob.glob(os.path.join(BIGQUERY_LOTES_DIR, "*.parquet")) +
+                        glob.glob(os.path.join(BIGQUERY_LOTES_DIR, "*.ndjson.gz")))
+    resumen = {"run_id": run_id, "lotes": 0, "filas": 0, "pendientes": len(pendientes)}
+    if not pendientes:
+        return resumen
+
+    client = client or cliente_bigquery()
+    asegurar_tabla(client)
+    for ruta in pendientes:
+        resumen["filas"] += cargar_lote(client, ruta)
+        resumen["lotes"] += 1
+        resumen["pendientes"] -= 1
+        os.remove(ruta)
+    print(f"📊 BigQuery: {resumen['filas']} filas cargadas en {resumen['lotes']} load job(s) -> {_id_tabla(client)}.")
+    return resumen
@@ -0,0 +1,89 @@
+"""
+Script: Description_Store.py
+Purpose: Modo de memoria acotada (--bounded-memory). Las descripciones (lo más pesado de cada vacante)
+         se derraman a un SQLite en disco apenas llegan de los portales y las vacantes siguen por el
+         pipeline con una referencia liviana ("descripcion_ref"). Cada etapa que necesita el texto
+         (filtros, packs, publicación) lo carga por lotes y lo suelta al terminar, así el pico de
+         memoria no crece con la cantidad de keywords ni la profundidad de los resultados.
+         Las referencias son el hash del texto: la misma descripción (vacante repetida en varias
+         keywords) se guarda una sola vez.
+"""
+import zlib
+import sqlite3
+import hashlib
+import threading
+from typing import Dict, Iterable, List
+
+CAMPO_REF = "descripcion_ref"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS descripciones (
+    ref TEXT PRIMARY KEY,
+    texto BLOB NOT NULL
+);
+"""
+
+
+def ref_de(texto: str) -> str:
+    return hashlib.sha1(texto.encode("utf-8")).hexdigest()[:20]
+
+
+class DescripcionStore:
+    """Textos comprimidos por referencia; thread-safe (lo usan los hilos de recolección)."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        self.conn = sqlite3.connect(path, check_same_thread=False, timeout=30)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript(_SCHEMA)
+
+    def cerrar(self):
+        with self._lock:
+            self.conn.close()
+
+    def derramar(self, vacantes: Iterable[dict]) -> int:
+        """Saca 'descripcion' de cada vacante (in place) y deja su referencia. Retorna cuántas se derramaron."""
+        filas = []
+        for v in vacantes:
+            if not isinstance(v, dict) or "descripcion" not in v:
+                continue
+            texto = v.pop("descripcion") or ""
+            v[CAMPO_REF] = ref_de(texto)
+            filas.append((v[CAMPO_REF], zlib.compress(texto.encode("utf-8"))))
+        if filas:
+            with self._lock:
+                self.conn.executemany("INSERT OR IGNORE INTO descripciones (ref, texto) VALUES (?, ?)", filas)
+                self.conn.commit()
+        return len(filas)
+
+    def leer(self, refs: Iterable[str]) -> Dict[str, str]:
+        """{ref: texto} de las referencias pedidas (las desconocidas no aparecen)."""
+        refs = list({r for r in refs if r})
+        textos = {}
+        with self._lock:
+            for i in range(0, len(refs), 500):
+                parte = refs[i:i + 500]
+                marcas = ",".join("?" * len(parte))
+                for ref, texto in self.conn.execute(
+                        f"SELECT ref, texto FROM descripciones WHERE ref IN ({marcas})", parte):
+                    textos[ref] = zlib.decompress(texto).decode("utf-8")
+        return textos
+
+    def texto(self, v: dict) -> str:
+        """Descripción de la vacante, esté derramada o no."""
+        if CAMPO_REF not in v:
+            return v.get("descripcion", "")
+        return self.leer([v[CAMPO_REF]]).get(v[CAMPO_REF], "")
+
+    def hidratar(self, vacantes: List[dict]) -> List[dict]:
+        """Copias de las vacantes con 'descripcion' cargada (para un lote; los originales no cambian)."""
+        textos = self.leer(v.get(CAMPO_REF) for v in vacantes)
+        hidratadas = []
+        for v in vacantes:
+            copia = {k: valor for k, valor in v.items() if k != CAMPO_REF}
+            if CAMPO_REF in v:
+                copia["descripcion"] = textos.get(v[CAMPO_REF], "")
+            hidratadas.append(copia)
+        return hidratadas
@@ -0,0 +1,126 @@
+"""
+Script: History_Dataset.py
+Purpose: Historial columnar de vacantes. Cada ejecución agrega un archivo Parquet por mes de registro
+         a un dataset particionado estilo Hive (HISTORIAL_DIR/mes=YYYY-MM/run_<id>.parquet).
+         El mismo formato de fila alimenta la carga a BigQuery (bigquery_sink.py).
+"""
+import os
+import re
+from collections import defaultdict
+from datetime import datetime, timezone
+from typing import List
+from urllib.parse import urlparse
+
+from config import HISTORIAL_DIR
+
+# (nombre, tipo, modo) — tipos con nombres de BigQuery; ver esquema_arrow() para Parquet
+COLUMNAS = [
+    ("run_id", "STRING", "REQUIRED"),
+    ("cargado_en", "TIMESTAMP", "REQUIRED"),
+    ("fecha_registro", "DATE", "NULLABLE"),
+    ("portal", "STRING", "NULLABLE"),
+    ("keyword_buscada", "STRING", "NULLABLE"),
+    ("titulo", "STRING", "NULLABLE"),
+    ("empresa", "STRING", "NULLABLE"),
+    ("ubicacion", "STRING", "NULLABLE"),
+    ("modalidad", "STRING", "NULLABLE"),
+    ("nivel", "STRING", "NULLABLE"),
+    ("jornada", "STRING", "NULLABLE"),
+    ("url", "STRING", "NULLABLE"),
+    ("salario", "STRING", "NULLABLE"),
+    ("salario_min", "INTEGER", "NULLABLE"),
+    ("salario_max", "INTEGER", "NULLABLE"),
+    ("fecha_publicacion", "STRING", "NULLABLE"),
+    ("descripcion", "STRING", "NULLABLE"),
+    ("match_percent", "INTEGER", "NULLABLE"),
+    ("match_reason", "STRING", "NULLABLE"),
+]
+
+_NUMERO = re.compile(r"\d[\d.,]*")
+
+
+def _a_entero(valor):
+    try:
+        return int(float(str(valor).strip().rstrip("%")))
+    except (TypeError, ValueError):
+        return None  # "Pendiente", vacío, etc.
+
+
+def _a_fecha(valor):
+    try:
+        return datetime.strptime(str(valor).strip()[:10], "%Y-%m-%d").date()
+    except ValueError:
+        return None
+
+
+def rango_salario(texto: str) -> tuple:
+    """'$2000 - $3000' -> (2000, 3000); 'No informado' -> (None, None). Los separadores de miles se ignoran."""
+    montos = []
+    for numero in _NUMERO.findall(str(texto or "")):
+        digitos = re.sub(r"[.,]", "", numero)
+        if digitos and int(digitos) >= 100:  # descarta '3 años', '2 días', etc.
+            montos.append(int(digitos))
+    if not montos:
+        return None, None
+    return min(montos), max(montos)
+
+
+def fila_historial(vacante: dict, run_id: str, cargado_en: datetime) -> dict:
+    """Vacante normalizada -> fila con las COLUMNAS del historial."""
+    fila = {nombre: str(vacante.get(nombre) or "") for nombre, _, _ in COLUMNAS}
+    salario_min, salario_max = rango_salario(vacante.get("salario"))
+    fila.update(
+        run_id=run_id,
+        cargado_en=cargado_en,
+        fecha_registro=_a_fecha(vacante.get("fecha_busqueda", "")),
+        portal=urlparse(vacante.get("url", "")).netloc.replace("www.", "") or "manual",
+        salario_min=salario_min,
+        salario_max=salario_max,
+        match_percent=_a_entero(vacante.get("match_percent")),
+    )
+    return fila
+
+
+def esquema_arrow():
+    import pyarrow as pa
+    tipos = {"STRING": pa.string(), "INTEGER": pa.int64(), "DATE": pa.date32(),
+             "TIMESTAMP": pa.timestamp("us", tz="UTC")}
+    return pa.schema([pa.field(nombre, tipos[tipo], nullable=modo != "REQUIRED") for nombre, tipo, modo in COLUMNAS])
+
+
+def escribir_historial(vacantes: List[dict], run_id: str, directorio: str = HISTORIAL_DIR, parte: int = None,
+                       intento: int = None) -> List[str]:
+    """
+    Agrega las vacantes de la ejecución al dataset: un archivo por partición mes=YYYY-MM
+    (según la fecha de registro; sin fecha -> mes de hoy). Retorna las rutas escritas.
+    Una ejecución escrita por lotes pasa `parte` (un archivo por lote, mismo run_id en las filas).
+    Una ejecución reanudada pasa `intento` (> 1) para no reemplazar los archivos del intento anterior.
+    Requiere pyarrow; sin él se avisa y no se escribe nada.
+    """
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError:
+        print("⚠️ pyarrow no está instalado: se omite el historial Parquet.")
+        return []
+
+    cargado_en = datetime.now(timezone.utc)
+    por_mes = defaultdict(list)
+    for v in vacantes:
+        fila = fila_historial(v, run_id, cargado_en)
+        mes = (fila["fecha_registro"] or cargado_en.date()).strftime("%Y-%m")
+        por_mes[mes].append(fila)
+
+    esquema = esquema_arrow()
+    rutas = []
+    for mes, filas in sorted(por_mes.items()):
+        particion = os.path.join(directorio, f"mes={mes}")
+        os.makedirs(particion, exist_ok=True)
+        sufijo = (f"-r{intento}" if intento and intento > 1 else "") + (f"-{parte:04d}" if parte is not None else "")
+        ruta = os.path.join(particion, f"run_{run_id}{sufijo}.parquet")
+        pq.write_table(pa.Table.from_pylist(filas, schema=esquema), ruta + ".tmp", compression="zstd")
+        os.replace(ruta + ".tmp", ruta)
+        rutas.append(ruta)
+    if rutas:
+        print(f"🗃️  Historial: {len(vacantes)} vacantes en {len(rutas)} partición(es) de {directorio}.")
+    return rutas
@@ -0,0 +1,197 @@
+"""
+Script: History_Query.py
+Purpose: Consultas agregadas sobre el historial Parquet (history_dataset.py) sin cargar filas a Python.
+         Usa DuckDB si está instalado; si no, lecturas Arrow con memory-map y agregación en Arrow.
+
+Uso:
+    python data-engineering/history_query.py por-keyword --periodo mes --desde 2025-01-01
+    python data-engineering/history_query.py por-portal --periodo semana
+    python data-engineering/history_query.py salarios --keyword Python
+    python data-engineering/history_query.py sql "SELECT nivel, count(*) FROM historial GROUP BY 1"   # solo DuckDB
+"""
+import os
+import sys
+import time
+import argparse
+from datetime import datetime
+from typing import List
+
+# --- PATH SETUP ---
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(os.path.join(BASE_DIR, "infrastructure"))
+
+from config import HISTORIAL_DIR
+
+FORMATO_PERIODO = {"mes": "%Y-%m", "semana": "%G-W%V", "dia": "%Y-%m-%d"}
+
+
+def _motor() -> str:
+    try:
+        import duckdb  # noqa: F401
+        return "duckdb"
+    except ImportError:
+        pass
+    try:
+        import pyarrow.dataset  # noqa: F401
+        return "arrow"
+    except ImportError:
+        return None
+
+
+# --- DUCKDB ---
+def _duckdb(consulta: str, directorio: str):
+    import duckdb
+    con = duckdb.connect()
+    patron = os.path.join(directorio, "**", "*.parquet").replace("'", "''")
+    con.execute(f"CREATE VIEW historial AS SELECT * FROM read_parquet('{patron}', hive_partitioning = true)")
+    resultado = con.execute(consulta)
+    columnas = [d[0] for d in resultado.description]
+    return columnas, resultado.fetchall()
+
+
+def _filtros_sql(desde: str = None, hasta: str = None, keyword: str = None, portal: str = None) -> str:
+    condiciones = ["TRUE"]
+    if desde:
+        condiciones.append(f"mes >= '{desde[:7]}' AND fecha_registro >= DATE '{desde}'")
+    if hasta:
+        condiciones.append(f"mes <= '{hasta[:7]}' AND fecha_registro <= DATE '{hasta}'")
+    if keyword:
+        condiciones.append(f"lower(keyword_buscada) = lower('{keyword.replace(chr(39), '')}')")
+    if portal:
+        condiciones.append(f"portal = '{portal.replace(chr(39), '')}'")
+    return " AND ".join(condiciones)
+
+
+# --- ARROW (memory-mapped) ---
+def _tabla_arrow(directorio: str, columnas: List[str], desde=None, hasta=None, keyword=None, portal=None):
+    import pyarrow.compute as pc
+    import pyarrow.dataset as ds
+    from pyarrow import fs
+
+    dataset = ds.dataset(directorio, format="parquet", partitioning="hive",
+                         filesystem=fs.LocalFileSystem(use_mmap=True))
+    filtro = None
+
+    def y(expr):
+        nonlocal filtro
+        filtro = expr if filtro is None else filtro & expr
+
+    # El filtro por `mes` descarta particiones completas antes de abrir archivos
+    if desde:
+        y((ds.field("mes") >= desde[:7]) & (ds.field("fecha_registro") >= datetime.strptime(desde, "%Y-%m-%d").date()))
+    if hasta:
+        y((ds.field("mes") <= hasta[:7]) & (ds.field("fecha_registro") <= datetime.strptime(hasta, "%Y-%m-%d").date()))
+    if keyword:
+        y(pc.utf8_lower(ds.field("keyword_buscada")) == keyword.lower())
+    if portal:
+        y(ds.field("portal") == portal)
+    return dataset.to_table(columns=columnas, filter=filtro)
+
+
+def _con_periodo(tabla, periodo: str):
+    import pyarrow as pa
+    import pyarrow.compute as pc
+    fechas = pc.cast(tabla["fecha_registro"], pa.timestamp("s"))
+    return tabla.append_column("periodo", pc.strftime(fechas, format=FORMATO_PERIODO[periodo]))
+
+
+def _ordenar(columnas, filas, claves):
+    idx = [columnas.index(c) for c in claves]
+    return sorted(filas, key=lambda f: tuple("" if f[i] is None else f[i] for i in idx))
+
+
+# --- CONSULTAS ---
+def conteo_por(dimension: str, periodo: str = "mes", directorio: str = HISTORIAL_DIR, **filtros):
+    """Vacantes distintas (por URL) por período y `dimension` (keyword_buscada o portal)."""
+    if _motor() == "duckdb":
+        return _duckdb(
+            f"SELECT strftime(fecha_registro, '{FORMATO_PERIODO[periodo]}') AS periodo, {dimension}, "
+            f"count(DISTINCT url) AS vacantes FROM historial WHERE {_filtros_sql(**filtros)} "
+            f"GROUP BY ALL ORDER BY periodo, vacantes DESC", directorio)
+
+    tabla = _con_periodo(_tabla_arrow(directorio, ["fecha_registro", dimension, "url"], **filtros), periodo)
+    agregado = tabla.group_by(["periodo", dimension]).aggregate([("url", "count_distinct")])
+    columnas = ["periodo", dimension, "vacantes"]
+    filas = list(zip(agregado["periodo"].to_pylist(), agregado[dimension].to_pylist(),
+                     agregado["url_count_distinct"].to_pylist()))
+    return columnas, sorted(filas, key=lambda f: (f[0] or "", -f[2]))
+
+
+def salarios_por_nivel(directorio: str = HISTORIAL_DIR, **filtros):
+    """Rangos salariales (mín/promedio/máx de los rangos publicados) por nivel de seniority."""
+    if _motor() == "duckdb":
+        return _duckdb(
+            "SELECT nivel, count(*) AS vacantes, min(salario_min) AS minimo, "
+            "round(avg(salario_min)) AS prom_desde, round(avg(salario_max)) AS prom_hasta, max(salario_max) AS maximo "
+            f"FROM historial WHERE salario_min IS NOT NULL AND {_filtros_sql(**filtros)} GROUP BY nivel ORDER BY nivel",
+            directorio)
+
+    import pyarrow.compute as pc
+    tabla = _tabla_arrow(directorio, ["nivel", "salario_min", "salario_max", "keyword_buscada", "portal", "fecha_registro"], **filtros)
+    tabla = tabla.filter(pc.is_valid(tabla["salario_min"]))
+    agregado = tabla.group_by("nivel").aggregate([
+        ("salario_min", "count"), ("salario_min", "min"), ("salario_min", "mean"),
+        ("salario_max", "mean"), ("salario_max", "max"),
+    ])
+    columnas = ["nivel", "vacantes", "minimo", "prom_desde", "prom_hasta", "maximo"]
+    filas = [
+        (n, c, mn, round(pd) if pd is not None else None, round(ph) if ph is not None else None, mx)
+        for n, c, mn, pd, ph, mx in zip(*(agregado[k].to_pylist() for k in [
+            "nivel", "salario_min_count", "salario_min_min", "salario_min_mean", "salario_max_mean", "salario_max_max"]))
+    ]
+    return columnas, _ordenar(columnas, filas, ["nivel"])
+
+
+def imprimir_tabla(columnas: List[str], filas: list):
+    anchos = [max([len(str(c))] + [len(str(f[i])) for f in filas]) for i, c in enumerate(columnas)]
+    print("  ".join(str(c).ljust(a) for c, a in zip(columnas, anchos)))
+    print("  ".join("-" * a for a in anchos))
+    for f in filas:
+        print("  ".join(str("" if v is None else v).ljust(a) for v, a in zip(f, anchos)))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Analítica sobre el historial Parquet de vacantes.")
+    parser.add_argument("--dir", default=HISTORIAL_DIR, help="Directorio del dataset (default: config.HISTORIAL_DIR)")
+    sub = parser.add_subparsers(dest="consulta", required=True)
+    for nombre in ("por-keyword", "por-portal", "salarios"):
+        p = sub.add_parser(nombre)
+        p.add_argument("--desde", help="YYYY-MM-DD")
+        p.add_argument("--hasta", help="YYYY-MM-DD")
+        p.add_argument("--keyword")
+        p.add_argument("--portal")
+        if nombre != "salarios":
+            p.add_argument("--periodo", choices=list(FORMATO_PERIODO), default="mes")
+    p_sql = sub.add_parser("sql", help="SQL libre sobre la vista 'historial' (requiere DuckDB)")
+    p_sql.add_argument("consulta_sql")
+    args = parser.parse_args(argv)
+
+    if not os.path.isdir(args.dir):
+        print(f"No hay historial en {args.dir}.")
+        return 1
+
+    if _motor() is None:
+        print("Se necesita DuckDB o pyarrow para consultar el historial (pip install duckdb).")
+        return 1
+
+    inicio = time.perf_counter()
+    if args.consulta == "sql":
+        if _motor() != "duckdb":
+            print("La consulta SQL libre requiere DuckDB (pip install duckdb).")
+            return 1
+        columnas, filas = _duckdb(args.consulta_sql, args.dir)
+    else:
+        filtros = {"desde": args.desde, "hasta": args.hasta, "keyword": args.keyword, "portal": args.portal}
+        if args.consulta == "salarios":
+            columnas, filas = salarios_por_nivel(args.dir, **filtros)
+        else:
+            dimension = "keyword_buscada" if args.consulta == "por-keyword" else "portal"
+            columnas, filas = conteo_por(dimension, args.periodo, args.dir, **filtros)
+
+    imprimir_tabla(columnas, filas)
+    print(f"\n{len(filas)} filas en {time.perf_counter() - inicio:.3f}s (motor: {_motor()}).")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,157 @@
+"""
+Script: Sheet_Archive.py
+Purpose: Archivo por mes de las vacantes antiguas. Las filas cuya "Fecha de Registro" supera la
+         retención se copian a pestañas Archivo_YYYY-MM (o a Parquet local) y se borran de la hoja
+         "Vacantes" en un solo batchUpdate, para que la hoja activa se mantenga chica y rápida.
+         La base local conserva sus URLs, así que siguen contando para deduplicar.
+"""
+import os
+from collections import defaultdict
+from datetime import datetime, timedelta
+from typing import Dict, List, Tuple
+
+from config import ARCHIVO_RETENCION_DIAS, ARCHIVO_DESTINO, ARCHIVO_DIR
+import sheet_snapshot
+from sheet_publish import Publicacion, req_actualizar_rango
+
+PREFIJO_PESTANA = "Archivo_"
+COLUMNA_FECHA = "Fecha de Registro"
+
+
+def _parsear_fecha(valor: str):
+    """Las fechas de registro son YYYY-MM-DD (a veces con hora); 'Manual' u otras no se archivan."""
+    try:
+        return datetime.strptime(str(valor).strip()[:10], "%Y-%m-%d")
+    except ValueError:
+        return None
+
+
+def seleccionar_filas(filas: List[dict], dias: int, hoy: datetime = None) -> Dict[str, List[dict]]:
+    """Agrupa por mes ("YYYY-MM") las filas registradas hace más de `dias` días."""
+    limite = (hoy or datetime.now()) - timedelta(days=dias)
+    por_mes = defaultdict(list)
+    for fila in filas:
+        fecha = _parsear_fecha(fila.get(COLUMNA_FECHA, ""))
+        if fecha is not None and fecha < limite:
+            por_mes[fecha.strftime("%Y-%m")].append(fila)
+    return dict(por_mes)
+
+
+def rangos_contiguos(row_idxs: List[int]) -> List[Tuple[int, int]]:
+    """[(inicio, fin)] inclusivos de filas consecutivas, de abajo hacia arriba (para borrar sin correr índices)."""
+    rangos = []
+    for idx in sorted(row_idxs):
+        if rangos and rangos[-1][1] == idx - 1:
+            rangos[-1][1] = idx
+        else:
+            rangos.append([idx, idx])
+    return [tuple(r) for r in reversed(rangos)]
+
+
+def req_borrar_filas(sheet, inicio: int, fin: int) -> dict:
+    """deleteDimension de las filas inicio..fin (1-based, inclusivas)."""
+    return {
+        "deleteDimension": {
+            "range": {"sheetId": sheet.id, "dimension": "ROWS", "startIndex": inicio - 1, "endIndex": fin}
+        }
+    }
+
+
+# --- DESTINOS ---
+def _archivar_en_hojas(sheet, headers: List[str], por_mes: Dict[str, List[dict]]) -> Dict[int, str]:
+    """
+    Copia cada mes a su pestaña (creándola si no existe). Las URLs ya presentes en la pestaña
+    se omiten: si una corrida anterior alcanzó a copiar pero no a borrar, no se duplican.
+    """
+    sh = sheet.spreadsheet
+    pestanas = {ws.title: ws for ws in sh.worksheets()}
+    destinos = {}
+    for mes, filas in sorted(por_mes.items()):
+        titulo = f"{PREFIJO_PESTANA}{mes}"
+        ws = pestanas.get(titulo)
+        pub = None
+        urls_archivadas = set()
+        if ws is None:
+            ws = sh.add_worksheet(titulo, rows=len(filas) + 1, cols=len(headers))
+            headers_archivo = list(headers)
+            pub = Publicacion(ws)
+            pub.filas([headers_archivo])
+        else:
+            headers_archivo = ws.row_values(1)
+            if "URL" in headers_archivo:
+                urls_archivadas = set(ws.col_values(headers_archivo.index("URL") + 1)[1:])
+            faltantes = [h for h in headers if h not in headers_archivo]
+            pub = Publicacion(ws)
+            if faltantes:
+                # La hoja activa ganó columnas desde el último archivo de este mes
+                headers_archivo += faltantes
+                pub.request(req_actualizar_rango(ws, 1, 1, [headers_archivo]))
+
+        nuevas = [fila for fila in filas if not fila.get("URL") or fila.get("URL") not in urls_archivadas]
+        pub.filas([[fila.get(h, "") for h in headers_archivo] for fila in nuevas])
+        pub.enviar()
+        for fila in filas:
+            destinos[fila["_row_idx"]] = titulo
+        print(f"🗄️  {len(nuevas)} filas archivadas en '{titulo}'.")
+    return destinos
+
+
+def _archivar_en_parquet(headers: List[str], por_mes: Dict[str, List[dict]]) -> Dict[int, str]:
+    """Un archivo Parquet por mes en ARCHIVO_DIR; si ya existe se le agregan las filas (sin duplicar)."""
+    import pandas as pd
+
+    os.makedirs(ARCHIVO_DIR, exist_ok=True)
+    destinos = {}
+    for mes, filas in sorted(por_mes.items()):
+        ruta = os.path.join(ARCHIVO_DIR, f"vacantes_{mes}.parquet")
+        df = pd.DataFrame([[str(fila.get(h, "")) for h in headers] for fila in filas], columns=headers)
+        if os.path.exists(ruta):
+            df = pd.concat([pd.read_parquet(ruta), df], ignore_index=True).fillna("").drop_duplicates()
+        try:
+            df.to_parquet(ruta + ".tmp", index=False, compression="zstd")
+        except ImportError as e:
+            raise RuntimeError(f"El archivo en Parquet requiere pyarrow: {e}")
+        os.replace(ruta + ".tmp", ruta)
+        for fila in filas:
+            destinos[fila["_row_idx"]] = os.path.basename(ruta)
+        print(f"🗄️  {len(filas)} filas archivadas en '{ruta}'.")
+    return destinos
+
+
+def archivar_vacantes(sheet, store=None, dias: int = ARCHIVO_RETENCION_DIAS, destino: str = ARCHIVO_DESTINO) -> dict:
+    """
+    Mueve a archivo las filas más antiguas que `dias`. Primero se copian al destino y recién
+    después se borran de la hoja (rangos contiguos, de abajo hacia arriba, en un batchUpdate),
+    así un fallo a mitad de camino nunca pierde filas.
+    Si se pasa `store`, las vacantes archivadas quedan marcadas y los row_idx se corrigen.
+    """
+    resumen = {"archivadas": 0, "meses": [], "rangos_borrados": 0}
+    if dias <= 0:
+        return resumen
+
+    snap = sheet_snapshot.sincronizar(sheet, [])
+    headers = [h for h in snap["headers"] if h]
+    filas = sheet_snapshot.leer_filas(sheet, headers)
+    por_mes = seleccionar_filas(filas, dias)
+    if not por_mes:
+        print(f"Sin vacantes con más de {dias} días para archivar.")
+        return resumen
+
+    if destino == "parquet":
+        destinos = _archivar_en_parquet(headers, por_mes)
+    else:
+        destinos = _archivar_en_hojas(sheet, headers, por_mes)
+
+    rangos = rangos_contiguos(list(destinos))
+    pub = Publicacion(sheet)
+    for inicio, fin in rangos:
+        pub.request(req_borrar_filas(sheet, inicio, fin))
+    pub.enviar()
+
+    sheet_snapshot.registrar_filas_borradas(sheet, list(destinos))
+    if store is not None:
+        store.registrar_archivadas(destinos)
+
+    resumen.update(archivadas=len(destinos), meses=sorted(por_mes), rangos_borrados=len(rangos))
+    print(f"✅ Archivo: {len(destinos)} filas fuera de la hoja activa ({len(rangos)} rango(s) borrados en 1 request).")
+    return resumen
@@ -0,0 +1,119 @@
+"""
+Script: Sheet_Format.py
+Purpose: Formato idempotente de hojas: se guarda un fingerprint del esquema en developer metadata
+         y el formato se aplica (en un único batch_update) solo cuando el fingerprint cambia.
+"""
+import json
+import hashlib
+from typing import Callable, List
+
+
+def fingerprint_formato(spec: dict) -> str:
+    """Hash estable del estado esperado (encabezados, validaciones, formato)."""
+    return hashlib.sha256(json.dumps(spec, sort_keys=True, ensure_ascii=False).encode("utf-8")).hexdigest()[:16]
+
+
+def leer_estado_formato(sheet, clave: str) -> dict:
+    """
+    Lee en una sola llamada el fingerprint guardado y la cantidad de reglas de formato
+    condicional de la pestaña. Retorna {"fingerprint", "metadata_id", "reglas_condicionales"}.
+    """
+    meta = sheet.spreadsheet.fetch_sheet_metadata(
+        params={"fields": "sheets(properties.sheetId,developerMetadata,conditionalFormats)"}
+    )
+    estado = {"fingerprint": None, "metadata_id": None, "reglas_condicionales": 0}
+    for hoja in meta.get("sheets", []):
+        if hoja.get("properties", {}).get("sheetId") != sheet.id:
+            continue
+        estado["reglas_condicionales"] = len(hoja.get("conditionalFormats", []))
+        for dm in hoja.get("developerMetadata", []):
+            if dm.get("metadataKey") == clave:
+                estado["fingerprint"] = dm.get("metadataValue")
+                estado["metadata_id"] = dm.get("metadataId")
+    return estado
+
+
+def aplicar_formato_si_cambio(sheet, clave: str, spec: dict,
+                              construir_requests: Callable[[object, dict], List[dict]]) -> bool:
+    """
+    Compara el fingerprint de `spec` con el guardado en la hoja. Si difiere, envía en un
+    único batch_update los requests de formato + la actualización del fingerprint.
+    `construir_requests(sheet, estado)` recibe el estado leído (ej: reglas a reemplazar).
+    Retorna True si aplicó cambios.
+    """
+    esperado = fingerprint_formato(spec)
+    estado = leer_estado_formato(sheet, clave)
+    if estado["fingerprint"] == esperado:
+        print("Formato al día (fingerprint sin cambios).")
+        return False
+
+    requests_list = construir_requests(sheet, estado)
+    if estado["metadata_id"] is not None:
+        requests_list.append({
+            "deleteDeveloperMetadata": {
+                "dataFilter": {"developerMetadataLookup": {"metadataId": estado["metadata_id"]}}
+            }
+        })
+    requests_list.append({
+        "createDeveloperMetadata": {
+            "developerMetadata": {
+                "metadataKey": clave,
+                "metadataValue": esperado,
+                "location": {"sheetId": sheet.id},
+                "visibility": "DOCUMENT"
+            }
+        }
+    })
+    sheet.spreadsheet.batch_update({"requests": requests_list})
+    print(f"Formato y validaciones aplicadas ({len(requests_list)} cambios en 1 request).")
+    return True
+
+
+# --- CONSTRUCTORES DE REQUESTS (Sheets API v4) ---
+def req_congelar_filas(sheet, filas: int) -> dict:
+    return {
+        "updateSheetProperties": {
+            "properties": {"sheetId": sheet.id, "gridProperties": {"frozenRowCount": filas}},
+            "fields": "gridProperties.frozenRowCount"
+        }
+    }
+
+
+def req_filtro_basico(sheet) -> dict:
+    return {"setBasicFilter": {"filter": {"range": {"sheetId": sheet.id}}}}
+
+
+def req_validacion_lista(sheet, fila_ini: int, fila_fin: int, col: int, valores: List[str]) -> dict:
+    """Desplegable ONE_OF_LIST sobre una columna (índices 0-based, fin exclusivo)."""
+    return {
+        "setDataValidation": {
+            "range": {
+                "sheetId": sheet.id,
+                "startRowIndex": fila_ini, "endRowIndex": fila_fin,
+                "startColumnIndex": col, "endColumnIndex": col + 1
+            },
+            "rule": {
+                "condition": {"type": "ONE_OF_LIST", "values": [{"userEnteredValue": v} for v in valores]},
+                "showCustomUi": True
+            }
+        }
+    }
+
+
+def req_negrita(sheet, fila: int, n_columnas: int) -> dict:
+    return {
+        "repeatCell": {
+            "range": {
+                "sheetId": sheet.id,
+                "startRowIndex": fila, "endRowIndex": fila + 1,
+                "startColumnIndex": 0, "endColumnIndex": n_columnas
+            },
+            "cell": {"userEnteredFormat": {"textFormat": {"bold": True}}},
+            "fields": "userEnteredFormat.textFormat.bold"
+        }
+    }
+
+
+def req_borrar_reglas_condicionales(sheet, cantidad: int) -> List[dict]:
+    """Borra las `cantidad` reglas existentes (siempre índice 0, se van corriendo)."""
+    return [{"deleteConditionalFormatRule": {"sheetId": sheet.id, "index": 0}} for _ in range(cantidad)]
@@ -0,0 +1,183 @@
+"""
+Script: Sheet_Migration.py
+Purpose: Migración de columnas sin vaciar la hoja. Se intenta primero server-side
+         (insert/move/delete dimension en un solo batchUpdate); si no es posible, las filas se
+         reescriben en bloques acotados con checkpoints para poder reanudar tras un fallo.
+"""
+import os
+import json
+from typing import List, Optional
+
+from gspread.utils import rowcol_to_a1
+
+from config import SNAPSHOT_DIR
+from sheet_snapshot import FILA_HEADERS, FILA_DATOS
+
+FILAS_POR_BLOQUE = 2000
+
+
+def _ruta_checkpoint(sheet) -> str:
+    return os.path.join(SNAPSHOT_DIR, f"migracion_{sheet.spreadsheet.id}_{sheet.id}.json")
+
+
+def _cargar_checkpoint(sheet) -> Optional[dict]:
+    ruta = _ruta_checkpoint(sheet)
+    if not os.path.exists(ruta):
+        return None
+    with open(ruta, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def _guardar_checkpoint(sheet, checkpoint: dict):
+    os.makedirs(SNAPSHOT_DIR, exist_ok=True)
+    ruta = _ruta_checkpoint(sheet)
+    with open(ruta + ".tmp", "w", encoding="utf-8") as f:
+        json.dump(checkpoint, f, ensure_ascii=False)
+    os.replace(ruta + ".tmp", ruta)
+
+
+def _borrar_checkpoint(sheet):
+    ruta = _ruta_checkpoint(sheet)
+    if os.path.exists(ruta):
+        os.remove(ruta)
+
+
+def _rango_columnas(sheet, inicio: int, fin: int) -> dict:
+    return {"sheetId": sheet.id, "dimension": "COLUMNS", "startIndex": inicio, "endIndex": fin}
+
+
+def planificar_servidor(sheet, headers_old: List[str], headers_new: List[str],
+                        fila_metadata: List[str] = None) -> Optional[List[dict]]:
+    """
+    Calcula los requests insert/move/deleteDimension que transforman las columnas actuales
+    en `headers_new`, moviendo los datos en el servidor. Retorna None si el mapeo es ambiguo
+    (encabezados duplicados), en cuyo caso hay que reescribir filas.
+    `fila_metadata` (fila 1) se reescribe al final porque los movimientos de columna la desplazan.
+    """
+    nombrados = [h for h in headers_old if h]
+    if len(nombrados) != len(set(nombrados)) or len(headers_new) != len(set(headers_new)):
+        return None
+
+    cols = list(headers_old)
+    requests_list = []
+
+    # 1. Eliminar columnas que ya no existen (de derecha a izquierda para no correr índices)
+    for idx in range(len(cols) - 1, -1, -1):
+        if cols[idx] not in headers_new:
+            requests_list.append({"deleteDimension": {"range": _rango_columnas(sheet, idx, idx + 1)}})
+            del cols[idx]
+
+    # 2. De izquierda a derecha: mover a su lugar o insertar columna vacía
+    for destino, nombre in enumerate(headers_new):
+        if destino < len(cols) and cols[destino] == nombre:
+            continue
+        if nombre in cols:
+            origen = cols.index(nombre)  # siempre a la derecha de `destino`
+            requests_list.append({
+                "moveDimension": {
+                    "source": _rango_columnas(sheet, origen, origen + 1),
+                    "destinationIndex": destino
+                }
+            })
+            cols.insert(destino, cols.pop(origen))
+        else:
+            requests_list.append({
+                "insertDimension": {"range": _rango_columnas(sheet, destino, destino + 1), "inheritFromBefore": False}
+            })
+            cols.insert(destino, nombre)
+
+    # 3. Fila de metadata (fila 1) y encabezados definitivos (fila 2)
+    metadata = list(fila_metadata or [])[:len(headers_new)]
+    metadata += [""] * (len(headers_new) - len(metadata))
+    requests_list.append({
+        "updateCells": {
+            "rows": [
+                {"values": [{"userEnteredValue": {"stringValue": v}} for v in metadata]},
+                {"values": [{"userEnteredValue": {"stringValue": h}} for h in headers_new]}
+            ],
+            "fields": "userEnteredValue",
+            "start": {"sheetId": sheet.id, "rowIndex": 0, "columnIndex": 0}
+        }
+    })
+    return requests_list
+
+
+def reescribir_por_bloques(sheet, headers_old: List[str], headers_new: List[str],
+                           filas_por_bloque: int = FILAS_POR_BLOQUE):
+    """
+    Reescribe las filas en su lugar, bloque a bloque, con el orden de `headers_new`.
+    Antes de escribir un bloque, el checkpoint guarda sus filas ya migradas ("escribiendo");
+    si el proceso muere a mitad, la siguiente ejecución reescribe ese mismo contenido en vez de
+    volver a leer (y remapear) filas que quizá ya estaban migradas. Los encabezados se cambian al final.
+    La lectura termina en el primer bloque vacío (la API omite filas vacías al final del rango),
+    sin recorrer el resto de la grilla.
+    """
+    checkpoint = _cargar_checkpoint(sheet)
+    if checkpoint and checkpoint.get("headers_new") == headers_new:
+        headers_old = checkpoint["headers_old"]
+        fila = checkpoint["siguiente_fila"]
+        print(f"↩️  Reanudando migración desde la fila {fila}...")
+    else:
+        fila = FILA_DATOS
+        checkpoint = {"headers_old": headers_old, "headers_new": headers_new, "siguiente_fila": fila}
+        _guardar_checkpoint(sheet, checkpoint)
+
+    # Igual que la migración original: si un encabezado se repite, gana la última aparición
+    mapa_old = {nombre: idx for idx, nombre in enumerate(headers_old)}
+    ancho = max(len(headers_old), len(headers_new))
+    ultima_col = rowcol_to_a1(1, ancho)[:-1]
+    total_filas = sheet.row_count
+
+    def escribir(pendiente: dict):
+        desde, filas = pendiente["desde"], pendiente["filas"]
+        if filas:
+            sheet.update(filas, f"A{desde}:{ultima_col}{desde + len(filas) - 1}")
+        checkpoint["siguiente_fila"] = pendiente["siguiente"]
+        checkpoint.pop("escribiendo", None)
+        _guardar_checkpoint(sheet, checkpoint)
+
+    # Bloque que quedó a medio escribir: se repite tal cual (idempotente)
+    if checkpoint.get("escribiendo"):
+        escribir(checkpoint["escribiendo"])
+        fila = checkpoint["siguiente_fila"]
+
+    while fila <= total_filas:
+        fin = min(fila + filas_por_bloque - 1, total_filas)
+        bloque = sheet.get(f"A{fila}:{ultima_col}{fin}")
+        if not bloque:
+            break
+        migradas = []
+        for fila_old in bloque:
+            nueva = [fila_old[mapa_old[c]] if mapa_old.get(c) is not None and mapa_old[c] < len(fila_old) else ""
+                     for c in headers_new]
+            # Limpiar columnas sobrantes a la derecha
+            migradas.append(nueva + [""] * (ancho - len(nueva)))
+
+        checkpoint["escribiendo"] = {"desde": fila, "filas": migradas, "siguiente": fin + 1}
+        _guardar_checkpoint(sheet, checkpoint)
+        escribir(checkpoint["escribiendo"])
+        fila = fin + 1
+        print(f"   Migradas filas hasta {fila - 1}...")
+
+    sheet.update([headers_new + [""] * (ancho - len(headers_new))], f"A{FILA_HEADERS}:{ultima_col}{FILA_HEADERS}")
+    _borrar_checkpoint(sheet)
+
+
+def migrar_columnas(sheet, headers_old: List[str], headers_new: List[str], fila_metadata: List[str] = None) -> str:
+    """
+    Migra la hoja a `headers_new`. Retorna "servidor" o "reescritura" según la estrategia usada.
+    Si hay una reescritura a medio terminar, se reanuda esa en vez de planificar de nuevo.
+    """
+    if _cargar_checkpoint(sheet) is None:
+        plan = planificar_servidor(sheet, headers_old, headers_new, fila_metadata)
+        if plan is not None:
+            try:
+                sheet.spreadsheet.batch_update({"requests": plan})
+                print(f"✅ Migración server-side completada ({len(plan)} operaciones, sin mover datos localmente).")
+                return "servidor"
+            except Exception as e:
+                print(f"⚠️ Migración server-side falló ({e}). Reescribiendo por bloques...")
+
+    reescribir_por_bloques(sheet, headers_old, headers_new)
+    print("✅ Migración por bloques completada.")
+    return "reescritura"
@@ -0,0 +1,156 @@
+"""
+Script: Sheet_Publish.py
+Purpose: Publicación transaccional en Sheets: agrupa celdas, filas nuevas y metadata en un solo
+         spreadsheets.batchUpdate, dividiendo en bloques solo si se exceden los límites de la API.
+"""
+import json
+import time
+from typing import List, Any, Dict, Tuple
+
+# La API acepta payloads mayores, pero sobre ~2 MB las latencias y timeouts se disparan
+LIMITE_BYTES_REQUEST = 2_000_000
+LIMITE_FILAS_REQUEST = 5000
+
+
+def _valor_celda(valor: Any) -> dict:
+    if isinstance(valor, bool):
+        return {"userEnteredValue": {"boolValue": valor}}
+    if isinstance(valor, (int, float)):
+        return {"userEnteredValue": {"numberValue": valor}}
+    return {"userEnteredValue": {"stringValue": "" if valor is None else str(valor)}}
+
+
+def req_actualizar_celda(sheet, fila: int, col: int, valor: Any) -> dict:
+    """updateCells para una celda (fila/col 1-based, como update_cell)."""
+    return req_actualizar_rango(sheet, fila, col, [[valor]])
+
+
+def req_actualizar_rango(sheet, fila: int, col: int, valores: List[list]) -> dict:
+    """updateCells para un rectángulo de valores cuya esquina superior izquierda es (fila, col), 1-based."""
+    return {
+        "updateCells": {
+            "rows": [{"values": [_valor_celda(v) for v in fila_valores]} for fila_valores in valores],
+            "fields": "userEnteredValue",
+            "start": {"sheetId": sheet.id, "rowIndex": fila - 1, "columnIndex": col - 1}
+        }
+    }
+
+
+def req_agregar_filas(sheet, filas: List[list]) -> dict:
+    """appendCells: agrega filas tras la última con datos (la grilla crece sola)."""
+    return {
+        "appendCells": {
+            "sheetId": sheet.id,
+            "rows": [{"values": [_valor_celda(v) for v in fila]} for fila in filas],
+            "fields": "userEnteredValue"
+        }
+    }
+
+
+def fusionar_celdas(sheet, celdas: Dict[Tuple[int, int], Any]) -> List[dict]:
+    """
+    Convierte celdas sueltas {(fila, col): valor} en el mínimo de updateCells: primero tramos
+    contiguos por fila y luego tramos iguales en filas consecutivas se unen en un rectángulo.
+    """
+    tramos = []  # [fila, col_ini, [valores]]
+    for (fila, col) in sorted(celdas):
+        ultimo = tramos[-1] if tramos else None
+        if ultimo and ultimo[0] == fila and ultimo[1] + len(ultimo[2]) == col:
+            ultimo[2].append(celdas[(fila, col)])
+        else:
+            tramos.append([fila, col, [celdas[(fila, col)]]])
+
+    bloques = []  # [fila_ini, col_ini, ancho, [[valores]]]
+    abiertos = {}  # (col_ini, ancho, siguiente_fila) -> bloque que puede crecer hacia abajo
+    for fila, col, valores in tramos:
+        bloque = abiertos.pop((col, len(valores), fila), None)
+        if bloque is None:
+            bloque = [fila, col, len(valores), []]
+            bloques.append(bloque)
+        bloque[3].append(valores)
+        abiertos[(col, len(valores), fila + 1)] = bloque
+
+    return [req_actualizar_rango(sheet, fila, col, filas) for fila, col, _, filas in bloques]
+
+
+class Publicacion:
+    """
+    Acumula cambios para una hoja y los envía con el mínimo de requests HTTP.
+    Uso:
+        pub = Publicacion(sheet)
+        pub.celda(1, 1, "Última actualización: ...")
+        pub.filas([...])
+        resumen = pub.enviar()
+    """
+
+    def __init__(self, sheet):
+        self.sheet = sheet
+        self._requests = []
+        self._requests_finales = []
+        self._filas = []
+
+    def celda(self, fila: int, col: int, valor: Any, al_final: bool = False):
+        req = req_actualizar_celda(self.sheet, fila, col, valor)
+        (self._requests_finales if al_final else self._requests).append(req)
+
+    def celdas(self, celdas: Dict[Tuple[int, int], Any]):
+        """Agrega muchas celdas {(fila, col): valor}; las adyacentes se fusionan en rangos."""
+        self._requests.extend(fusionar_celdas(self.sheet, celdas))
+
+    def filas(self, filas: List[list]):
+        self._filas.extend(filas)
+
+    def request(self, req: dict, al_final: bool = False):
+        """Agrega un request crudo (ej: formato o developer metadata)."""
+        (self._requests_finales if al_final else self._requests).append(req)
+
+    def _bloques(self) -> List[List[dict]]:
+        """
+        Divide el trabajo en batchUpdates bajo los límites. Las celdas/metadata van en el
+        primer bloque y los requests `al_final` (ej: fecha de actualización) en el último,
+        para que solo queden escritos si todo lo anterior se publicó.
+        """
+        bloques, actual, bytes_actual = [], list(self._requests), len(json.dumps(self._requests))
+        pendiente, filas_actual = [], 0
+
+        def cerrar_filas():
+            nonlocal pendiente
+            if pendiente:
+                actual.append(req_agregar_filas(self.sheet, pendiente))
+                pendiente = []
+
+        for fila in self._filas:
+            tam = len(json.dumps(fila)) + 64
+            if pendiente and (bytes_actual + tam > LIMITE_BYTES_REQUEST or filas_actual >= LIMITE_FILAS_REQUEST):
+                cerrar_filas()
+                bloques.append(actual)
+                actual, bytes_actual, filas_actual = [], 0, 0
+            pendiente.append(fila)
+            bytes_actual += tam
+            filas_actual += 1
+        cerrar_filas()
+
+        actual.extend(self._requests_finales)
+        if actual:
+            bloques.append(actual)
+        return bloques
+
+    def enviar(self) -> dict:
+        """Ejecuta los batchUpdate y retorna un resumen de tiempos y cantidad de requests."""
+        inicio = time.perf_counter()
+        bloques = self._bloques()
+        bytes_enviados = 0
+        for bloque in bloques:
+            body = {"requests": bloque}
+            bytes_enviados += len(json.dumps(body))
+            self.sheet.spreadsheet.batch_update(body)
+
+        resumen = {
+            "requests_http": len(bloques),
+            "operaciones": sum(len(b) for b in bloques),
+            "filas": len(self._filas),
+            "bytes": bytes_enviados,
+            "segundos": round(time.perf_counter() - inicio, 2),
+        }
+        self._requests, self._requests_finales, self._filas = [], [], []
+        return resumen
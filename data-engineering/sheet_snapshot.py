@@ -0,0 +1,200 @@
+"""
+Script: Sheet_Snapshot.py
+Purpose: Snapshot local e incremental de la hoja de vacantes (solo columnas necesarias y filas nuevas).
+"""
+import os
+import json
+import time
+from typing import List, Dict
+
+from gspread.utils import rowcol_to_a1
+
+from config import SNAPSHOT_DIR
+
+# Estructura de la hoja: fila 1 metadata ("Última actualización"), fila 2 encabezados, datos desde fila 3
+FILA_HEADERS = 2
+FILA_DATOS = 3
+
+
+def _letra_columna(idx_col: int) -> str:
+    """Índice 1-based de columna -> letra(s) A1 (7 -> 'G')."""
+    return rowcol_to_a1(1, idx_col)[:-1]
+
+
+def _ruta_snapshot(sheet) -> str:
+    return os.path.join(SNAPSHOT_DIR, f"{sheet.spreadsheet.id}_{sheet.id}.json")
+
+
+def _snapshot_vacio() -> dict:
+    return {"headers": [], "n_filas": 0, "columnas": {}, "revision": 0, "actualizado": None}
+
+
+def cargar_snapshot(sheet) -> dict:
+    ruta = _ruta_snapshot(sheet)
+    if not os.path.exists(ruta):
+        return _snapshot_vacio()
+    try:
+        with open(ruta, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except Exception as e:
+        print(f"⚠️ Snapshot ilegible, se reconstruye: {e}")
+        return _snapshot_vacio()
+
+
+def guardar_snapshot(sheet, snapshot: dict):
+    """Escritura atómica (tmp + replace) para no dejar snapshots corruptos."""
+    os.makedirs(SNAPSHOT_DIR, exist_ok=True)
+    ruta = _ruta_snapshot(sheet)
+    tmp = ruta + ".tmp"
+    snapshot["actualizado"] = time.strftime("%Y-%m-%d %H:%M:%S")
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(snapshot, f, ensure_ascii=False)
+    os.replace(tmp, ruta)
+
+
+def invalidar(sheet):
+    """Descarta el snapshot (ej: tras una migración o borrado de filas)."""
+    ruta = _ruta_snapshot(sheet)
+    if os.path.exists(ruta):
+        os.remove(ruta)
+
+
+def sincronizar(sheet, columnas: List[str]) -> dict:
+    """
+    Actualiza el snapshot con UNA sola lectura (batch_get):
+    - fila de encabezados (para detectar cambios de estructura),
+    - la última fila conocida (para detectar reescrituras),
+    - las filas agregadas desde el último snapshot, con todas sus columnas: la API omite celdas
+      vacías al final de cada rango, así que el número de filas sale de la última fila con
+      algún dato (no del largo de una columna, que se queda corto si termina en vacías),
+    - la columna completa para las columnas pedidas por primera vez.
+    """
+    snap = cargar_snapshot(sheet)
+    n = snap["n_filas"]
+    headers = snap["headers"]
+
+    if not headers:
+        # Sin snapshot previo: primero necesitamos saber dónde está cada columna
+        headers = sheet.row_values(FILA_HEADERS)
+        snap = _snapshot_vacio()
+        snap["headers"] = headers
+        n = 0
+
+    # Las columnas ya conocidas se siguen extendiendo aunque no se pidan (solo filas nuevas)
+    conocidas = [c for c in snap["columnas"] if c in headers]
+    nuevas = [c for c in columnas if c in headers and c not in conocidas]
+
+    rangos = [f"{FILA_HEADERS}:{FILA_HEADERS}"]
+    if n:
+        rangos.append(f"{n + FILA_DATOS - 1}:{n + FILA_DATOS - 1}")
+    rangos.append(f"A{n + FILA_DATOS}:{_letra_columna(max(len(headers), 1))}")
+    for c in nuevas:
+        letra = _letra_columna(headers.index(c) + 1)
+        rangos.append(f"{letra}{FILA_DATOS}:{letra}")
+
+    respuesta = sheet.batch_get(rangos)
+    headers_remotos = respuesta[0][0] if respuesta[0] else []
+    pos = 1
+
+    # Validación: si cambió la estructura o la última fila, el snapshot no sirve
+    valido = headers_remotos == headers
+    if n:
+        ultima_remota = respuesta[pos][0] if respuesta[pos] else []
+        pos += 1
+        for c in conocidas:
+            idx = headers.index(c)
+            remoto = ultima_remota[idx] if idx < len(ultima_remota) else ""
+            if snap["columnas"][c][-1] != remoto:
+                valido = False
+    if not valido:
+        print("ℹ️ La hoja cambió fuera del snapshot. Reconstruyendo...")
+        invalidar(sheet)
+        return sincronizar(sheet, columnas)
+
+    filas_agregadas = respuesta[pos]
+    pos += 1
+    agregadas = {}
+    for c in conocidas:
+        idx = headers.index(c)
+        agregadas[c] = [fila[idx] if idx < len(fila) else "" for fila in filas_agregadas]
+    for c in nuevas:
+        agregadas[c] = [fila[0] if fila else "" for fila in respuesta[pos]]
+        pos += 1
+
+    filas_nuevas = len(filas_agregadas)
+    total = max([n + filas_nuevas] + [len(agregadas[c]) for c in nuevas])
+
+    for c in conocidas:
+        valores = snap["columnas"][c] + agregadas[c]
+        snap["columnas"][c] = valores + [""] * (total - len(valores))
+    for c in nuevas:
+        snap["columnas"][c] = agregadas[c] + [""] * (total - len(agregadas[c]))
+
+    if total != n or nuevas:
+        snap["revision"] += 1
+    snap["n_filas"] = total
+    guardar_snapshot(sheet, snap)
+    return snap
+
+
+def leer_columnas(sheet, columnas: List[str]) -> Dict[str, list]:
+    """Retorna {nombre_columna: [valores desde la fila 3]} para las columnas pedidas."""
+    snap = sincronizar(sheet, columnas)
+    return {c: snap["columnas"][c] for c in columnas if c in snap["columnas"]}
+
+
+def leer_filas(sheet, columnas: List[str] = None) -> List[dict]:
+    """
+    Retorna las filas de datos como diccionarios {header: valor} + "_row_idx" (1-based).
+    Si `columnas` es None se usan todos los encabezados con nombre.
+    """
+    if columnas is None:
+        snap = cargar_snapshot(sheet)
+        columnas = [h for h in (snap["headers"] or sheet.row_values(FILA_HEADERS)) if h]
+    datos = leer_columnas(sheet, columnas)
+    total = len(next(iter(datos.values()), []))
+    filas = []
+    for i in range(total):
+        item = {c: valores[i] for c, valores in datos.items()}
+        item["_row_idx"] = i + FILA_DATOS
+        filas.append(item)
+    return filas
+
+
+def registrar_filas_nuevas(sheet, filas: List[list]):
+    """Incorpora al snapshot filas que acabamos de agregar nosotros (evita releerlas)."""
+    snap = cargar_snapshot(sheet)
+    if not snap["headers"] or not filas:
+        return
+    for c, valores in snap["columnas"].items():
+        idx = snap["headers"].index(c)
+        valores.extend(str(f[idx]) if idx < len(f) else "" for f in filas)
+    snap["n_filas"] += len(filas)
+    snap["revision"] += 1
+    guardar_snapshot(sheet, snap)
+
+
+def registrar_celdas(sheet, cambios: List[tuple]):
+    """Aplica al snapshot cambios de celdas hechos por nosotros: [(row_idx, header, valor)]."""
+    snap = cargar_snapshot(sheet)
+    if not snap["headers"]:
+        return
+    for row_idx, header, valor in cambios:
+        i = row_idx - FILA_DATOS
+        if header in snap["columnas"] and 0 <= i < snap["n_filas"]:
+            snap["columnas"][header][i] = str(valor)
+    snap["revision"] += 1
+    guardar_snapshot(sheet, snap)
+
+
+def registrar_filas_borradas(sheet, filas_borradas: List[int]):
+    """Quita del snapshot filas que borramos nosotros (row_idx 1-based), sin releer la hoja."""
+    snap = cargar_snapshot(sheet)
+    if not snap["headers"] or not filas_borradas:
+        return
+    indices = {r - FILA_DATOS for r in filas_borradas}
+    for c, valores in snap["columnas"].items():
+        snap["columnas"][c] = [v for i, v in enumerate(valores) if i not in indices]
+    snap["n_filas"] -= len([i for i in indices if 0 <= i < snap["n_filas"]])
+    snap["revision"] += 1
+    guardar_snapshot(sheet, snap)
@@ -0,0 +1,139 @@
+"""
+Script: Sheets_Client.py
+Purpose: Pool de conexión a Google Sheets a nivel de proceso: credenciales, cliente gspread
+         autorizado (con su sesión HTTP keep-alive), ID del spreadsheet y pestañas quedan en
+         cache, y el token se renueva antes de vencer.
+"""
+import os
+import json
+import threading
+from datetime import datetime, timezone, timedelta
+
+import gspread
+from google.auth.transport.requests import Request
+from google.oauth2.service_account import Credentials
+
+from sheets_scheduler import ClienteHTTPPlanificado
+from config import SCOPES, CREDENTIALS_PATH, SHEETS_CLIENTE_CACHE_PATH, SHEETS_TOKEN_MARGEN_S
+
+_lock = threading.RLock()
+_pool = {"creds": None, "cliente": None, "spreadsheets": {}, "hojas": {}}
+stats = {"autorizaciones": 0, "renovaciones_token": 0, "aperturas": 0, "hojas_reusadas": 0}
+
+
+# --- CACHE PERSISTENTE DE IDS ---
+def _cargar_ids() -> dict:
+    if not os.path.exists(SHEETS_CLIENTE_CACHE_PATH):
+        return {}
+    try:
+        with open(SHEETS_CLIENTE_CACHE_PATH, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def _guardar_id(nombre: str, key: str):
+    ids = _cargar_ids()
+    if ids.get(nombre) == key:
+        return
+    ids[nombre] = key
+    with open(SHEETS_CLIENTE_CACHE_PATH + ".tmp", "w", encoding="utf-8") as f:
+        json.dump(ids, f, ensure_ascii=False, indent=2)
+    os.replace(SHEETS_CLIENTE_CACHE_PATH + ".tmp", SHEETS_CLIENTE_CACHE_PATH)
+
+
+def _olvidar_id(nombre: str):
+    ids = _cargar_ids()
+    if ids.pop(nombre, None) is not None:
+        with open(SHEETS_CLIENTE_CACHE_PATH, "w", encoding="utf-8") as f:
+            json.dump(ids, f, ensure_ascii=False, indent=2)
+
+
+# --- CLIENTE ---
+def _token_por_vencer(creds) -> bool:
+    if not creds.token or creds.expiry is None:
+        return True
+    # google-auth guarda `expiry` como UTC naive
+    ahora = datetime.now(timezone.utc).replace(tzinfo=None)
+    return creds.expiry - ahora < timedelta(seconds=SHEETS_TOKEN_MARGEN_S)
+
+
+def obtener_cliente() -> gspread.Client:
+    """
+    Retorna el cliente autorizado del proceso (se crea una sola vez); sus requests pasan por
+    el planificador de cuota (sheets_scheduler). Si el token está
+    por vencer se renueva aquí, reutilizando la misma sesión HTTP, para que la renovación
+    no ocurra en medio de una escritura.
+    """
+    with _lock:
+        if _pool["cliente"] is None:
+            _pool["creds"] = Credentials.from_service_account_file(CREDENTIALS_PATH, scopes=SCOPES)
+            _pool["cliente"] = gspread.authorize(_pool["creds"], http_client=ClienteHTTPPlanificado)
+            stats["autorizaciones"] += 1
+
+        creds = _pool["creds"]
+        if _token_por_vencer(creds):
+            creds.refresh(Request(session=_pool["cliente"].http_client.session))
+            stats["renovaciones_token"] += 1
+        return _pool["cliente"]
+
+
+def abrir_spreadsheet(nombre: str) -> gspread.Spreadsheet:
+    """
+    Abre el spreadsheet por ID si ya se resolvió antes (sin búsqueda en Drive); si no,
+    lo busca por nombre (o lo crea) y guarda el ID para las próximas ejecuciones.
+    """
+    cliente = obtener_cliente()
+    with _lock:
+        if nombre in _pool["spreadsheets"]:
+            return _pool["spreadsheets"][nombre]
+
+        sh = None
+        key = _cargar_ids().get(nombre)
+        if key:
+            try:
+                sh = cliente.open_by_key(key)
+            except gspread.exceptions.SpreadsheetNotFound:
+                _olvidar_id(nombre)
+        if sh is None:
+            try:
+                sh = cliente.open(nombre)
+            except gspread.exceptions.SpreadsheetNotFound:
+                print(f"No se encontró '{nombre}', creando nuevo archivo en Drive...")
+                sh = cliente.create(nombre)
+            _guardar_id(nombre, sh.id)
+
+        stats["aperturas"] += 1
+        _pool["spreadsheets"][nombre] = sh
+        return sh
+
+
+def obtener_hoja(nombre_archivo: str, titulo: str, filas: int = 200, columnas: int = 26) -> gspread.Worksheet:
+    """Handle de la pestaña `titulo` (la crea si no existe). Llamadas repetidas no van a la red."""
+    with _lock:
+        clave = (nombre_archivo, titulo)
+        if clave in _pool["hojas"]:
+            stats["hojas_reusadas"] += 1
+            obtener_cliente()  # Solo renueva el token si corresponde
+            return _pool["hojas"][clave]
+
+        sh = abrir_spreadsheet(nombre_archivo)
+        # Una sola lectura de metadata registra todas las pestañas del archivo
+        for ws in sh.worksheets():
+            _pool["hojas"][(nombre_archivo, ws.title)] = ws
+        if clave not in _pool["hojas"]:
+            print(f"Creando hoja '{titulo}' dentro del archivo...")
+            _pool["hojas"][clave] = sh.add_worksheet(titulo, rows=filas, cols=columnas)
+        return _pool["hojas"][clave]
+
+
+def invalidar(nombre_archivo: str = None):
+    """Descarta handles en cache (ej: tras borrar/renombrar pestañas o un error de permisos)."""
+    with _lock:
+        if nombre_archivo is None:
+            _pool["spreadsheets"].clear()
+            _pool["hojas"].clear()
+            return
+        _pool["spreadsheets"].pop(nombre_archivo, None)
+        for clave in [c for c in _pool["hojas"] if c[0] == nombre_archivo]:
+            del _pool["hojas"][clave]
@@ -8,10 +8,7 @@ import requests
 import gspread
 from google.oauth2.service_account import Credentials
 from datetime import datetime
-from gspread_formatting import (
-    DataValidationRule, BooleanCondition, set_data_validation_for_cell_range,
-    ConditionalFormatRule, BooleanRule, CellFormat, Color, format_cell_ranges, set_frozen, GridRange
-)
+import sheet_format
 
 # --- PATH SETUP ---
 BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
@@ -72,91 +69,60 @@ def verificar_encabezados():
         print("ℹ️ La hoja tiene encabezados distintos. Se continúan usando los actuales.")
 
 # --- CONFIGURACIÓN VISUAL Y FORMATO ---
-def configurar_ui():
-    # Congela la fila 1
-    set_frozen(sheet, rows=1)
-
-    # Activa filtros
-    try:
-        sheet.set_basic_filter()
-    except Exception:
-        pass
-
-    # Validación de datos (menú desplegable)
-    regla = DataValidationRule(
-        BooleanCondition("ONE_OF_LIST", ESTADOS),
-        showCustomUi=True
-    )
-    set_data_validation_for_cell_range(sheet, "G2:G10000", regla)
-
-    # Formato condicional por Estado (compatible con versiones recientes)
-    estado_rango = GridRange.from_a1_range("G2:G10000", sheet)
-    reglas = []
-
-    def regla_color(texto, color):
-        return ConditionalFormatRule(
-            ranges=[estado_rango],
-            booleanRule=BooleanRule(
-                condition=BooleanCondition("TEXT_EQ", [texto]),
-                format=CellFormat(backgroundColor=color)
-            )
-        )
-
-    reglas.extend([
-        regla_color("Postulando", Color(0.78, 0.87, 1.0)),   # azul
-        regla_color("Entrevista", Color(1.0, 0.95, 0.7)),    # amarillo
-        regla_color("Rechazado", Color(1.0, 0.8, 0.8)),      # rojo
-        regla_color("Contratado", Color(0.8, 0.94, 0.8)),    # verde
-        regla_color("Sin respuesta", Color(0.93, 0.93, 0.93))  # gris
-    ])
-
-        # Aplicar formato condicional por API (versión compatible y estable)
-    try:
-        requests_list = []
-        colores = {
-            "Postulando": (0.78, 0.87, 1.0),
-            "Entrevista": (1.0, 0.95, 0.7),
-            "Rechazado": (1.0, 0.8, 0.8),
-            "Contratado": (0.8, 0.94, 0.8),
-            "Sin respuesta": (0.93, 0.93, 0.93)
-        }
-
-        for texto, (r, g, b) in colores.items():
-            requests_list.append({
-                "addConditionalFormatRule": {
-                    "rule": {
-                        "ranges": [{
-                            "sheetId": sheet.id,
-                            "startRowIndex": 1,
-                            "endRowIndex": 10000,
-                            "startColumnIndex": 6,
-                            "endColumnIndex": 7
-                        }],
-                        "booleanRule": {
-                            "condition": {
-                                "type": "TEXT_EQ",
-                                "values": [{"userEnteredValue": texto}]
-                            },
-                            "format": {
-                                "backgroundColor": {"red": r, "green": g, "blue": b}
-                            }
+COLORES_ESTADO = {
+    "Postulando": (0.78, 0.87, 1.0),     # azul
+    "Entrevista": (1.0, 0.95, 0.7),      # amarillo
+    "Rechazado": (1.0, 0.8, 0.8),        # rojo
+    "Contratado": (0.8, 0.94, 0.8),      # verde
+    "Sin respuesta": (0.93, 0.93, 0.93)  # gris
+}
+
+def _requests_ui(hoja, estado):
+    requests_list = [
+        # Congela la fila 1 y activa filtros
+        sheet_format.req_congelar_filas(hoja, 1),
+        sheet_format.req_filtro_basico(hoja),
+        # Validación de datos (menú desplegable) en G2:G10000
+        sheet_format.req_validacion_lista(hoja, 1, 10000, 6, ESTADOS),
+        # Formato encabezados (negrita)
+        sheet_format.req_negrita(hoja, 0, len(ENCABEZADOS)),
+    ]
+
+    # Formato condicional por Estado: se reemplazan las reglas previas en vez de acumularlas
+    requests_list.extend(sheet_format.req_borrar_reglas_condicionales(hoja, estado["reglas_condicionales"]))
+    for texto, (r, g, b) in COLORES_ESTADO.items():
+        requests_list.append({
+            "addConditionalFormatRule": {
+                "rule": {
+                    "ranges": [{
+                        "sheetId": hoja.id,
+                        "startRowIndex": 1,
+                        "endRowIndex": 10000,
+                        "startColumnIndex": 6,
+                        "endColumnIndex": 7
+                    }],
+                    "booleanRule": {
+                        "condition": {
+                            "type": "TEXT_EQ",
+                            "values": [{"userEnteredValue": texto}]
+                        },
+                        "format": {
+                            "backgroundColor": {"red": r, "green": g, "blue": b}
                         }
-                    },
-                    "index": 0
-                }
-            })
-
-        sheet.spreadsheet.batch_update({"requests": requests_list})
-        print("🎨 Formato condicional aplicado correctamente.")
-    except Exception as e:
-        print(f"⚠️ Error aplicando formato condicional: {e}")
+                    }
+                },
+                "index": 0
+            }
+        })
+    return requests_list
 
-
-    # Formato encabezados (negrita)
+def configurar_ui():
+    """Aplica formato y formato condicional solo si el fingerprint guardado en la hoja cambió."""
+    spec = {"encabezados": ENCABEZADOS, "estados": ESTADOS, "colores": COLORES_ESTADO, "filas_congeladas": 1}
     try:
-        format_cell_ranges(sheet, [("A1:J1", CellFormat(textFormat={"bold": True}))])
-    except Exception:
-        pass
+        sheet_format.aplicar_formato_si_cambio(sheet, "etl_formato", spec, _requests_ui)
+    except Exception as e:
+        print(f"⚠️ Error aplicando formato: {e}")
 
 # --- FUNCIONES AUXILIARES ---
 def normalizar_texto(valor, por_defecto=""):
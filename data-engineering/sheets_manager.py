@@ -1,17 +1,17 @@
-import gspread
 from datetime import datetime
-from google.oauth2.service_account import Credentials
-from gspread_formatting import (
-    DataValidationRule, BooleanCondition, set_data_validation_for_cell_range,
-    format_cell_ranges, CellFormat, set_frozen
-)
-from config import SCOPES, SHEET_NAME, CREDENTIALS_PATH 
-import time
-
-# 💡 COLUMNAS OPTIMIZADAS (Sin Descripción, Razón Match, Prioridad, Match %)
+from config import SHEET_NAME
+import sheets_client
+from sheets_scheduler import planificador
+import sheet_snapshot
+import sheet_format
+from sheet_publish import Publicacion
+from sheet_migration import migrar_columnas
+
+# 💡 COLUMNAS OPTIMIZADAS (Sin Descripción, Razón Match, Prioridad)
+# "Match %" guarda el resultado del análisis IA: las filas con valor dejan de estar pendientes
 ENCABEZADOS = [
     "Título", "Empresa", "Ubicación", "Modalidad", "Nivel", "Jornada", "URL",
-    "Salario", "Estado", "Fecha de Registro", "Fecha Publicación"
+    "Salario", "Estado", "Fecha de Registro", "Fecha Publicación", "Match %"
 ]
 
 ESTADOS = ["Postulando", "Entrevista", "Rechazado", "Contratado", "Sin respuesta", "Descartado"]
@@ -20,28 +20,44 @@ def obtener_urls_existentes(sheet):
     """
     Obtiene un set con todas las URLs que ya están registradas en la hoja.
     Útil para filtrar antes de procesar.
+    Lee solo la columna URL desde el snapshot local (únicamente filas nuevas van a la red).
     """
     try:
-        data = sheet.get_all_values()
-        # La URL sigue estando en índice 6 (columna G)
-        urls = [row[6] for row in data[1:] if len(row) > 6 and row[6]]
-        return set(urls)
+        urls = sheet_snapshot.leer_columnas(sheet, ["URL"]).get("URL", [])
+        return set(u for u in urls if u)
     except Exception as e:
         print(f"Advertencia: No se pudieron cargar URLs existentes: {e}")
         return set()
 
+FORMATO_CLAVE = "vacantes_formato"
+FILAS_VALIDACION = 10000
+
+def _spec_formato() -> dict:
+    """Estado de formato esperado; cualquier cambio aquí cambia el fingerprint."""
+    return {
+        "encabezados": ENCABEZADOS,
+        "estados": ESTADOS,
+        "filas_congeladas": 2,
+        "validacion_estado": f"I3:I{FILAS_VALIDACION}",
+        "negrita": "fila 2",
+    }
+
+def _requests_formato(sheet, estado):
+    col_estado = ENCABEZADOS.index("Estado")
+    return [
+        sheet_format.req_congelar_filas(sheet, 2),
+        sheet_format.req_filtro_basico(sheet),
+        sheet_format.req_validacion_lista(sheet, 2, FILAS_VALIDACION, col_estado, ESTADOS),
+        # Negritas en la fila de encabezados (A2:L2)
+        sheet_format.req_negrita(sheet, 1, len(ENCABEZADOS)),
+    ]
+
 def _aplicar_formato_y_validaciones(sheet):
-    """Aplica el formato, filtro, congelación y validación de datos a la hoja."""
-    
-    set_frozen(sheet, rows=2)
-    sheet.set_basic_filter()
-    
-    regla = DataValidationRule(BooleanCondition("ONE_OF_LIST", ESTADOS), showCustomUi=True)
-    set_data_validation_for_cell_range(sheet, "I3:I10000", regla)
-    
-    # Ajuste de rango de negritas (A2:K2) - Ajustado a 11 columnas
-    format_cell_ranges(sheet, [("A2:K2", CellFormat(textFormat={"bold": True}))])
-    print("Formato y validaciones aplicadas.")
+    """
+    Aplica el formato, filtro, congelación y validación de datos a la hoja.
+    Solo envía cambios (en un único batch_update) si el fingerprint guardado difiere.
+    """
+    sheet_format.aplicar_formato_si_cambio(sheet, FORMATO_CLAVE, _spec_formato(), _requests_formato)
 
 def aplanar_y_normalizar(resultados_crudos):
     """
@@ -74,51 +90,32 @@ def aplanar_y_normalizar(resultados_crudos):
     
     return vacantes_limpias
 
-def conectar_sheets():
-    """Establece la conexión, abre/crea el archivo y la hoja de vacantes."""
-    
-    creds = Credentials.from_service_account_file(CREDENTIALS_PATH, scopes=SCOPES)
-    cliente = gspread.authorize(creds)
-
-    sh = None
-    for _ in range(3):
-        try:
-            try:
-                sh = cliente.open(SHEET_NAME)
-            except gspread.exceptions.SpreadsheetNotFound:
-                print(f"No se encontró '{SHEET_NAME}', creando nuevo archivo en Drive...")
-                sh = cliente.create(SHEET_NAME)
-            break
-        except Exception as e:
-            if "503" in str(e):
-                print("Google Sheets no disponible, reintentando...")
-                time.sleep(3)
-            else:
-                raise
-    else:
-        raise RuntimeError("No se pudo conectar con Google Sheets después de varios intentos.")
-
-    hojas = [ws.title for ws in sh.worksheets()]
-    if "Vacantes" in hojas:
-        return sh.worksheet("Vacantes")
-    else:
-        print("Creando hoja 'Vacantes' dentro del archivo...")
-        return sh.add_worksheet("Vacantes", rows=200, cols=len(ENCABEZADOS))
+def conectar_sheets(nombre_archivo: str = SHEET_NAME):
+    """
+    Retorna la hoja de vacantes (abre/crea el archivo y la pestaña la primera vez).
+    `nombre_archivo` permite un spreadsheet por candidato (modo batch).
+    El cliente, el ID del archivo y el handle de la pestaña quedan en cache en sheets_client,
+    así que las llamadas siguientes no hacen requests. Los errores transitorios (429/5xx)
+    se reintentan con backoff en sheets_scheduler.
+    """
+    return sheets_client.obtener_hoja(nombre_archivo, "Vacantes", columnas=len(ENCABEZADOS))
 
 
 def preparar_hoja(sheet):
     """
     Asegura que la hoja tenga los encabezados correctos y el formato base.
     Si los encabezados cambiaron, intenta MIGRAR los datos existentes.
+    Solo lee las filas de metadata y encabezados; la hoja completa se descarga únicamente al migrar.
     """
     try:
-        datos = sheet.get_all_values()
+        datos = sheet.get("A1:2")
     except Exception:
         datos = []
     
     # Caso 1: Hoja vacía o corrupta
     if len(datos) < 2:
         sheet.clear()
+        sheet_snapshot.invalidar(sheet)
         print("Hoja vacía. Iniciando de cero.")
         sheet.update("A1", [[f"Última actualización: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}"]])
         sheet.append_row(ENCABEZADOS)
@@ -130,79 +127,108 @@ def preparar_hoja(sheet):
     headers_actuales = filas_actuales_headers[:len(ENCABEZADOS)]
     
     if headers_actuales == ENCABEZADOS:
-        # Todo correcto
-        sheet.update("A1", [[f"Última actualización: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}"]])
+        # Todo correcto (la fecha de A1 se escribe al publicar; la réplica la registra aunque no haya filas)
         _aplicar_formato_y_validaciones(sheet)
         return
 
     # Caso 3: MIGRACIÓN DE COLUMNAS
     print(f"⚠️ Detectado cambio de estructura. Migrando datos... (Old: {len(headers_actuales)} cols, New: {len(ENCABEZADOS)} cols)")
     
-    # Mapa de columnas antiguas: "NombreColumna" -> Indice
-    mapa_old = {nombre: idx for idx, nombre in enumerate(filas_actuales_headers)}
-    
-    filas_migradas = []
-    
-    # Datos comienzan en fila 3 (índice 2)
-    for fila_old in datos[2:]:
-        nueva_fila = []
-        for col_nueva in ENCABEZADOS:
-            # Buscar si existe en la vieja
-            idx_old = mapa_old.get(col_nueva)
-            
-            valor = ""
-            if idx_old is not None and idx_old < len(fila_old):
-                valor = fila_old[idx_old]
-            
-            nueva_fila.append(valor)
-        filas_migradas.append(nueva_fila)
-    
-    # Reescribir hoja
-    sheet.clear()
-    sheet.update("A1", [[f"Última actualización: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}"]])
-    sheet.append_row(ENCABEZADOS)
-    
-    if filas_migradas:
-        sheet.append_rows(filas_migradas)
-        print(f"✅ Migración completada. {len(filas_migradas)} filas preservadas.")
+    # Se migra en el servidor (insert/move/delete de columnas) o, si no es posible,
+    # reescribiendo por bloques con checkpoint. La hoja nunca queda vacía.
+    migrar_columnas(sheet, filas_actuales_headers, ENCABEZADOS, fila_metadata=datos[0])
+    sheet_snapshot.invalidar(sheet)
     
     _aplicar_formato_y_validaciones(sheet)
 
 
-def actualizar_sheet(sheet, ofertas: list[dict]):
+def _fila_vacante(o: dict) -> list:
+    """Convierte una vacante normalizada en una fila con el orden de ENCABEZADOS."""
+    return [
+        o.get("titulo", ""),
+        o.get("empresa", ""),
+        o.get("ubicacion", ""),
+        o.get("modalidad", ""),
+        o.get("nivel", ""),
+        o.get("jornada", ""),
+        o.get("url", ""),
+        o.get("salario", ""),
+        "",
+        o.get("fecha_busqueda", ""),
+        o.get("fecha_publicacion", ""),
+        o.get("match_percent", "")
+    ]
+
+def publicar_vacantes(sheet, ofertas: list[dict], urls_existentes: set = None, registrar_fecha: bool = True) -> dict:
     """
-    Añade nuevas vacantes a la hoja.
+    Paso de publicación: filas nuevas + fecha de actualización (A1) en un único
+    spreadsheets.batchUpdate (se divide en bloques solo si excede los límites de la API).
+    Retorna el resumen de la publicación (requests, filas, bytes, segundos).
     """
-    
-    existentes = obtener_urls_existentes(sheet)
+    if urls_existentes is None:
+        urls_existentes = obtener_urls_existentes(sheet)
 
     nuevas_filas = []
-
     for o in ofertas:
         url = o.get("url")
+        if url and url in urls_existentes:
+            continue
+        nuevas_filas.append(_fila_vacante(o))
 
-        if url and url in existentes:
-             continue 
-
-        nuevas_filas.append([
-            o.get("titulo", ""),
-            o.get("empresa", ""),
-            o.get("ubicacion", ""),
-            o.get("modalidad", ""),
-            o.get("nivel", ""),
-            o.get("jornada", ""),
-            o.get("url", ""),
-            o.get("salario", ""),
-            "",
-            o.get("fecha_busqueda", ""),
-            o.get("fecha_publicacion", "")
-        ])
+    pub = Publicacion(sheet)
+    pub.filas(nuevas_filas)
+    if registrar_fecha:
+        fecha = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+        pub.celda(1, 1, f"Última actualización: {fecha}", al_final=True)
 
+    resumen = pub.enviar()
     if nuevas_filas:
-        sheet.append_rows(nuevas_filas)
+        sheet_snapshot.registrar_filas_nuevas(sheet, nuevas_filas)
         print(f"{len(nuevas_filas)} nuevas vacantes agregadas.")
     else:
         print("No hay nuevas vacantes para agregar.")
+    print(f"Publicación: {resumen['requests_http']} request(s), {resumen['bytes'] / 1024:.0f} KB en {resumen['segundos']}s.")
+    return resumen
+
+def escribir_enriquecimiento(sheet, resultados: list[tuple], pub: Publicacion = None,
+                             headers: list[str] = None) -> list[tuple]:
+    """
+    Escribe en bloque resultados de análisis: `resultados` = [(row_idx, {header: valor}), ...].
+    Las columnas se resuelven por nombre de encabezado (no por posición) y las celdas
+    adyacentes se fusionan en rangos. Si se pasa `pub`, los cambios se suman a esa publicación
+    y el envío queda a cargo del llamador; si no, se envían aquí en un único batchUpdate.
+    `headers` evita releer la fila de encabezados si el llamador ya la tiene sincronizada.
+    Retorna los cambios aplicados [(row_idx, header, valor)]; los encabezados inexistentes se omiten.
+    """
+    if headers is None:
+        headers = sheet_snapshot.sincronizar(sheet, [])["headers"]
+    celdas, cambios, omitidos = {}, [], set()
+    for row_idx, campos in resultados:
+        for header, valor in campos.items():
+            if header not in headers:
+                omitidos.add(header)
+                continue
+            celdas[(row_idx, headers.index(header) + 1)] = valor
+            cambios.append((row_idx, header, valor))
+    if omitidos:
+        print(f"⚠️ Columnas inexistentes en la hoja, se omiten: {', '.join(sorted(omitidos))}")
+    if not celdas:
+        return []
+
+    enviar = pub is None
+    pub = pub or Publicacion(sheet)
+    pub.celdas(celdas)
+    if enviar:
+        resumen = pub.enviar()
+        sheet_snapshot.registrar_celdas(sheet, cambios)
+        print(f"Enriquecimiento: {len(cambios)} celdas de {len(resultados)} filas en {resumen['requests_http']} request(s).")
+    return cambios
+
+def actualizar_sheet(sheet, ofertas: list[dict]):
+    """
+    Añade nuevas vacantes a la hoja.
+    """
+    return publicar_vacantes(sheet, ofertas, registrar_fecha=False)
 
 
 
@@ -220,14 +246,23 @@ def actualizar_estado(row_idx, nuevo_estado):
     Actualiza el estado de una vacante en la hoja.
     row_idx: Índice de la fila (1-based).
     nuevo_estado: String (ej: "Postulado", "Descartado")
+    El cambio se encola: los estados cambiados en la misma ventana de unos segundos
+    se envían juntos en un único batchUpdate (ver sheets_scheduler).
+    Retorna True si quedó ENCOLADO (aún no guardado); el resultado del envío se informa en consola.
     """
+    def confirmado():
+        sheet_snapshot.registrar_celdas(sheet, [(row_idx, "Estado", nuevo_estado)])
+        print(f"✅ Estado guardado en fila {row_idx}: {nuevo_estado}")
+
+    def fallido(error):
+        print(f"❌ No se guardó el estado de la fila {row_idx} ({nuevo_estado}): {error}")
+
     try:
         sheet = conectar_sheets()
-        # La columna Estado es la I (9na columna)
-        COL_ESTADO = 9 
-        sheet.update_cell(row_idx, COL_ESTADO, nuevo_estado)
-        print(f"✅ Estado actualizado en fila {row_idx}: {nuevo_estado}")
+        col_estado = ENCABEZADOS.index("Estado") + 1
+        planificador.encolar_celda(sheet, row_idx, col_estado, nuevo_estado, al_confirmar=confirmado, al_fallar=fallido)
+        print(f"🕓 Estado encolado para la fila {row_idx}: {nuevo_estado} (se envía en unos segundos)")
         return True
     except Exception as e:
         print(f"❌ Error actualizando estado: {e}")
-        return False
\ No newline at end of file
+        return False
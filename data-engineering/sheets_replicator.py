@@ -0,0 +1,190 @@
+"""
+Script: Sheets_Replicator.py
+Purpose: Réplica write-behind de la base local hacia Google Sheets: envía en lotes las vacantes
+         nuevas o modificadas, con reintentos y backoff, sin bloquear la ejecución principal.
+"""
+import json
+import time
+import threading
+from datetime import datetime
+from typing import Callable
+
+from config import REPLICA_INTERVALO_S, REPLICA_LOTE, REPLICA_BACKOFF_MAX_S
+from sheets_manager import escribir_enriquecimiento
+from sheet_publish import Publicacion
+from vacancy_store import VacancyStore, CAMPO_A_HEADER, HEADER_A_CAMPO, SYNC_NUEVO
+import sheet_snapshot
+import tracing
+
+
+class ReplicadorSheets:
+    """
+    Hilo de fondo que vacía la cola de cambios pendientes (sync_estado != 'ok') de la
+    base local hacia la hoja. Si Sheets falla, los cambios quedan en SQLite y se
+    reintentan con backoff exponencial; la próxima ejecución los retoma.
+    """
+
+    def __init__(self, store: VacancyStore, obtener_hoja: Callable, intervalo: float = REPLICA_INTERVALO_S,
+                 lote: int = REPLICA_LOTE, backoff_max: float = REPLICA_BACKOFF_MAX_S):
+        self.store = store
+        self._obtener_hoja = obtener_hoja
+        self._hoja = None
+        self.intervalo = intervalo
+        self.lote = lote
+        self.backoff_max = backoff_max
+        self._evento = threading.Event()
+        self._detener = threading.Event()
+        self._hilo = None
+        self._fecha_registrada = False
+        self.stats = {"ciclos": 0, "filas_nuevas": 0, "celdas": 0, "errores": 0, "ultimo_error": None}
+
+    # --- CICLO DE VIDA ---
+    def iniciar(self):
+        if self._hilo is None:
+            self._hilo = threading.Thread(target=self._ciclo, name="replicador-sheets", daemon=True)
+            self._hilo.start()
+        return self
+
+    def notificar(self):
+        """Despierta al replicador (ej: tras guardar vacantes en la base local)."""
+        self._evento.set()
+
+    def detener(self, espera_max: float = 0):
+        """
+        Pide un último vaciado y espera como máximo `espera_max` segundos.
+        Lo que no alcance a replicarse queda pendiente en SQLite para la próxima ejecución.
+        """
+        self._detener.set()
+        self._evento.set()
+        if self._hilo is not None:
+            self._hilo.join(timeout=espera_max)
+        pendientes = len(self.store.sin_sincronizar(limite=1_000_000))
+        if pendientes:
+            print(f"⏳ {pendientes} cambios quedan pendientes de replicar a Sheets (se reintentarán).")
+
+    def _ciclo(self):
+        errores_seguidos = 0
+        while True:
+            try:
+                while self._sincronizar_lote():
+                    pass
+                errores_seguidos = 0
+                espera = self.intervalo
+            except Exception as e:
+                errores_seguidos += 1
+                self._hoja = None  # Forzar reconexión en el siguiente intento
+                self.stats["errores"] += 1
+                self.stats["ultimo_error"] = str(e)
+                espera = min(self.backoff_max, 2 ** errores_seguidos)
+                print(f"⚠️ Réplica a Sheets falló ({e}). Reintento en {espera}s.")
+
+            if self._detener.is_set() and (errores_seguidos == 0 or errores_seguidos >= 3):
+                if errores_seguidos == 0:
+                    self._registrar_fecha()
+                return
+            self._evento.wait(timeout=espera)
+            self._evento.clear()
+
+    # --- SINCRONIZACIÓN ---
+    def _hoja_activa(self):
+        if self._hoja is None:
+            self._hoja = self._obtener_hoja()
+        return self._hoja
+
+    def _sincronizar_lote(self) -> bool:
+        """Replica un lote. Retorna True si había trabajo (para seguir vaciando)."""
+        filas = self.store.sin_sincronizar(self.lote)
+        if not filas:
+            return False
+
+        hoja = self._hoja_activa()
+        self.stats["ciclos"] += 1
+
+        # Estado actual de la hoja (incremental): URL -> fila, para idempotencia y row_idx.
+        # Las columnas se ubican por encabezado, no por posición.
+        snap = sheet_snapshot.sincronizar(hoja, ["URL"])
+        headers = snap["headers"]
+        urls_hoja = snap["columnas"].get("URL", [])
+        fila_por_url = {u: i + sheet_snapshot.FILA_DATOS for i, u in enumerate(urls_hoja) if u}
+
+        pub = Publicacion(hoja)
+        versiones, row_idx, filas_agregadas, claves_agregadas, enriquecimiento = {}, {}, [], [], []
+
+        for f in filas:
+            versiones[f["clave"]] = f["version"]
+            idx = f["row_idx"]
+            if idx is None and f["url"].startswith("http"):
+                idx = fila_por_url.get(f["url"])
+
+            if f["sync_estado"] == SYNC_NUEVO and idx is None:
+                fila = [f.get(HEADER_A_CAMPO.get(h, ""), "") for h in headers]
+                filas_agregadas.append(fila)
+                claves_agregadas.append((f["clave"], f["url"]))
+                continue
+
+            if idx is None:
+                # Modificada pero no está en la hoja (ej: archivada): nada que escribir
+                continue
+            row_idx[f["clave"]] = idx
+            # También si sigue "nueva" pero ya está en la hoja (ej: agregada en un lote que no
+            # alcanzó a confirmarse): sus campos sucios pueden no haber llegado
+            sucios = json.loads(f["campos_sucios"])
+            campos = {CAMPO_A_HEADER[c]: f.get(c, "") for c in sucios if CAMPO_A_HEADER.get(c) in headers}
+            if campos:
+                enriquecimiento.append((idx, campos))
+
+        celdas = escribir_enriquecimiento(hoja, enriquecimiento, pub=pub, headers=headers)
+        pub.filas(filas_agregadas)
+        _celda_fecha(pub)
+        inicio = time.time()
+        resumen = pub.enviar()
+        fin = time.time()
+        self._fecha_registrada = True
+        if filas_agregadas:
+            row_idx.update(self._filas_agregadas(hoja, claves_agregadas))
+            self.stats["filas_nuevas"] += len(filas_agregadas)
+        for f in filas:
+            if f["clave"] in row_idx:
+                tracing.registrar(f, "publish.sheets", inicio, fin, crear=False, row=row_idx[f["clave"]], batch=len(filas))
+
+        if celdas:
+            sheet_snapshot.registrar_celdas(hoja, celdas)
+            self.stats["celdas"] += len(celdas)
+        self.store.marcar_sincronizadas(versiones, row_idx)
+        print(f"☁️  Réplica: {len(filas_agregadas)} filas nuevas, {resumen['operaciones']} operaciones "
+              f"en {resumen['requests_http']} request(s).")
+        return len(filas) == self.lote
+
+    def _registrar_fecha(self):
+        """
+        Cierre sin errores: si ningún lote llevó la fecha de A1 (ejecución sin nada que replicar),
+        se envía sola, para que "Última actualización" refleje también las ejecuciones vacías.
+        """
+        if self._fecha_registrada:
+            return
+        try:
+            pub = Publicacion(self._hoja_activa())
+            _celda_fecha(pub)
+            pub.enviar()
+            self._fecha_registrada = True
+        except Exception as e:
+            print(f"⚠️ No se pudo registrar la fecha de actualización en Sheets: {e}")
+
+    def _filas_agregadas(self, hoja, claves_urls: list) -> dict:
+        """
+        Fila real de cada vacante agregada. appendCells escribe tras la última fila con datos de la hoja
+        (que puede no ser la que calculamos, ej: filas manuales sin URL al final), así que se relee el
+        snapshot (solo las filas nuevas) y se ubica cada una por URL o, sin URL, por su lugar en la cola.
+        """
+        snap = sheet_snapshot.sincronizar(hoja, ["URL"])
+        urls = snap["columnas"].get("URL", [])
+        primera = snap["n_filas"] - len(claves_urls) + sheet_snapshot.FILA_DATOS
+        fila_por_url = {u: i + sheet_snapshot.FILA_DATOS for i, u in enumerate(urls) if u}
+        return {clave: fila_por_url[url] if url.startswith("http") and url in fila_por_url else primera + i
+                for i, (clave, url) in enumerate(claves_urls)}
+
+
+def _celda_fecha(pub: Publicacion):
+    """Fecha de actualización (A1) al final de la publicación: solo queda escrita si todo lo anterior se envió."""
+    fecha = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+    pub.celda(1, 1, f"Última actualización: {fecha}", al_final=True)
@@ -0,0 +1,229 @@
+"""
+Script: Sheets_Scheduler.py
+Purpose: Planificador de requests a la API de Sheets: respeta las ventanas de cuota de lectura y
+         escritura por minuto, reintenta con backoff exponencial ante 429/5xx (los requests no
+         idempotentes, como un batchUpdate con appendCells, solo ante 429/503) y agrupa cambios de
+         celdas sueltas en un único batchUpdate. Todas las llamadas de gspread pasan por aquí a
+         través de ClienteHTTPPlanificado (ver sheets_client.py).
+"""
+import time
+import atexit
+import random
+import threading
+from collections import deque
+from typing import Callable, Dict
+
+import requests
+from gspread.exceptions import APIError
+from gspread.http_client import HTTPClient
+
+from config import (SHEETS_LECTURAS_POR_MIN, SHEETS_ESCRITURAS_POR_MIN, SHEETS_REINTENTOS,
+                    SHEETS_BACKOFF_MAX_S, SHEETS_COALESCER_S)
+from sheet_publish import fusionar_celdas
+# El contador se renombra: SHEETS_REINTENTOS de config es el máximo de reintentos
+from metrics import SHEETS_LLAMADAS, SHEETS_LATENCIA, SHEETS_REINTENTOS as METRICA_REINTENTOS
+
+VENTANA_S = 60
+CODIGOS_REINTENTABLES = {408, 429, 500, 502, 503, 504}
+# Con estos códigos Sheets rechaza el request sin procesarlo: son los únicos que se reintentan en
+# requests no idempotentes (un appendCells o deleteDimension que sí se aplicó no debe repetirse)
+CODIGOS_SIN_PROCESAR = {429, 503}
+API_SHEETS = "sheets.googleapis.com"
+
+
+class _VentanaCuota:
+    """Ventana deslizante de 60 s: bloquea hasta que haya cupo para un request más."""
+
+    def __init__(self, limite: int):
+        self.limite = limite
+        self._marcas = deque()
+
+    def espera_necesaria(self, ahora: float) -> float:
+        while self._marcas and ahora - self._marcas[0] >= VENTANA_S:
+            self._marcas.popleft()
+        if len(self._marcas) < self.limite:
+            return 0.0
+        return VENTANA_S - (ahora - self._marcas[0])
+
+    def registrar(self, ahora: float):
+        self._marcas.append(ahora)
+
+
+class PlanificadorSheets:
+    """
+    Punto único de salida hacia Sheets. Uso directo:
+        planificador.ejecutar(fn, escritura=True)       # llamada con cuota + reintentos
+        planificador.encolar_celda(sheet, fila, col, v)  # se agrupa con otras celdas
+        planificador.vaciar()                            # fuerza el envío de lo encolado
+    """
+
+    def __init__(self, lecturas_por_min: int = SHEETS_LECTURAS_POR_MIN,
+                 escrituras_por_min: int = SHEETS_ESCRITURAS_POR_MIN,
+                 reintentos: int = SHEETS_REINTENTOS, backoff_max: float = SHEETS_BACKOFF_MAX_S,
+                 coalescer_s: float = SHEETS_COALESCER_S):
+        self._ventanas = {False: _VentanaCuota(lecturas_por_min), True: _VentanaCuota(escrituras_por_min)}
+        self.reintentos = reintentos
+        self.backoff_max = backoff_max
+        self.coalescer_s = coalescer_s
+        self._lock = threading.Lock()
+        self._lock_cola = threading.Lock()
+        self._cola: Dict[int, dict] = {}
+        self._timer = None
+        self.stats = {
+            "lecturas": 0, "escrituras": 0,
+            "limitadas": 0, "segundos_limitado": 0.0,
+            "celdas_encoladas": 0, "fusionadas": 0,
+            "reintentos": 0, "fallidas": 0,
+        }
+
+    # --- CUOTA + REINTENTOS ---
+    def _reservar_cupo(self, escritura: bool):
+        """La espera se calcula con el lock y se duerme sin él: una lectura con cupo no queda detrás de una escritura limitada."""
+        ventana = self._ventanas[escritura]
+        limitada = False
+        while True:
+            with self._lock:
+                espera = ventana.espera_necesaria(time.monotonic())
+                if espera <= 0:
+                    ventana.registrar(time.monotonic())
+                    self.stats["escrituras" if escritura else "lecturas"] += 1
+                    return
+                if not limitada:
+                    self.stats["limitadas"] += 1
+                self.stats["segundos_limitado"] += espera
+            if not limitada:
+                print(f"⏳ Cuota de {'escritura' if escritura else 'lectura'} de Sheets al límite, esperando {espera:.1f}s...")
+                limitada = True
+            # Otro hilo pudo tomar el cupo mientras tanto: se vuelve a verificar
+            time.sleep(espera)
+
+    def _espera_reintento(self, intento: int, error: Exception) -> float:
+        respuesta = getattr(error, "response", None)
+        retry_after = respuesta.headers.get("Retry-After") if respuesta is not None else None
+        if retry_after and retry_after.isdigit():
+            return min(self.backoff_max, float(retry_after))
+        # Backoff exponencial con jitter (recomendación de Google para 429/5xx)
+        return min(self.backoff_max, 2 ** intento + random.random())
+
+    @staticmethod
+    def _es_reintentable(error: Exception, idempotente: bool) -> bool:
+        if isinstance(error, APIError):
+            return error.code in (CODIGOS_REINTENTABLES if idempotente else CODIGOS_SIN_PROCESAR)
+        if isinstance(error, requests.exceptions.ConnectTimeout):
+            return True  # No llegó a conectarse: el request no se envió
+        # Un timeout o corte a mitad de camino no dice si el servidor aplicó el request
+        return idempotente and isinstance(error, (requests.exceptions.ConnectionError, requests.exceptions.Timeout))
+
+    def ejecutar(self, fn: Callable, escritura: bool, cuota: bool = True, idempotente: bool = None):
+        """
+        Ejecuta `fn()` respetando la cuota; reintenta errores transitorios con backoff.
+        Sin `idempotente` (por defecto, las escrituras) solo se reintenta lo que Sheets rechazó
+        sin procesar (429/503); ante timeouts o 5xx el error sube y el llamador concilia.
+        """
+        if idempotente is None:
+            idempotente = not escritura
+        tipo = "write" if escritura else "read"
+        for intento in range(self.reintentos + 1):
+            inicio = time.perf_counter()
+            if cuota:
+                self._reservar_cupo(escritura)
+            try:
+                resultado = fn()
+                SHEETS_LATENCIA.observar(time.perf_counter() - inicio, kind=tipo)
+                SHEETS_LLAMADAS.inc(kind=tipo, outcome="ok")
+                return resultado
+            except Exception as e:
+                SHEETS_LATENCIA.observar(time.perf_counter() - inicio, kind=tipo)
+                SHEETS_LLAMADAS.inc(kind=tipo, outcome="error")
+                if not self._es_reintentable(e, idempotente) or intento == self.reintentos:
+                    self.stats["fallidas"] += 1
+                    raise
+                espera = self._espera_reintento(intento, e)
+                self.stats["reintentos"] += 1
+                METRICA_REINTENTOS.inc(kind=tipo)
+                print(f"⚠️ Sheets respondió {getattr(e, 'code', type(e).__name__)}, reintento {intento + 1} en {espera:.1f}s...")
+                time.sleep(espera)
+
+    # --- AGRUPACIÓN DE CELDAS ---
+    def encolar_celda(self, sheet, fila: int, col: int, valor, al_confirmar: Callable = None,
+                      al_fallar: Callable = None):
+        """
+        Encola el cambio de una celda (1-based). Se envía junto a las demás celdas encoladas
+        en los próximos `coalescer_s` segundos. `al_confirmar()` se llama tras el envío exitoso;
+        `al_fallar(error)` si el envío falla (el cambio se pierde).
+        Un segundo cambio a la misma celda reemplaza al anterior.
+        """
+        with self._lock_cola:
+            pendiente = self._cola.setdefault(sheet.id, {"sheet": sheet, "celdas": {}, "callbacks": [], "fallos": []})
+            pendiente["celdas"][(fila, col)] = valor
+            if al_confirmar:
+                pendiente["callbacks"].append(al_confirmar)
+            if al_fallar:
+                pendiente["fallos"].append(al_fallar)
+            self.stats["celdas_encoladas"] += 1
+            if self._timer is None:
+                self._timer = threading.Timer(self.coalescer_s, self._vaciar_en_fondo)
+                self._timer.daemon = True
+                self._timer.start()
+
+    def _vaciar_en_fondo(self):
+        try:
+            self.vaciar()
+        except Exception as e:
+            print(f"❌ Error enviando cambios agrupados a Sheets: {e}")
+
+    def vaciar(self) -> int:
+        """
+        Envía lo encolado: un batchUpdate por hoja. Retorna la cantidad de requests HTTP.
+        Si una hoja falla se avisa a sus `al_fallar`, se siguen enviando las demás y al final
+        se relanza el primer error.
+        """
+        with self._lock_cola:
+            cola, self._cola = self._cola, {}
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+
+        enviados, primer_error = 0, None
+        for pendiente in cola.values():
+            sheet = pendiente["sheet"]
+            reqs = fusionar_celdas(sheet, pendiente["celdas"])
+            self.stats["fusionadas"] += len(pendiente["celdas"]) - len(reqs)
+            try:
+                # La llamada HTTP ya pasa por cuota y reintentos (ClienteHTTPPlanificado)
+                sheet.spreadsheet.batch_update({"requests": reqs})
+            except Exception as e:
+                primer_error = primer_error or e
+                for callback in pendiente["fallos"]:
+                    callback(e)
+                continue
+            enviados += 1
+            for callback in pendiente["callbacks"]:
+                callback()
+        if primer_error is not None:
+            raise primer_error
+        return enviados
+
+    def resumen(self) -> str:
+        s = self.stats
+        return (f"Sheets: {s['lecturas']} lecturas, {s['escrituras']} escrituras, "
+                f"{s['limitadas']} limitadas ({s['segundos_limitado']:.1f}s), "
+                f"{s['fusionadas']} fusionadas, {s['reintentos']} reintentos, {s['fallidas']} fallidas")
+
+
+planificador = PlanificadorSheets()
+atexit.register(planificador._vaciar_en_fondo)
+
+
+class ClienteHTTPPlanificado(HTTPClient):
+    """HTTPClient de gspread cuyas llamadas a la API de Sheets pasan por el planificador."""
+
+    def request(self, method: str, endpoint: str, *args, **kwargs):
+        es_sheets = API_SHEETS in endpoint
+        escritura = method.upper() != "GET" and "batchGetByDataFilter" not in endpoint
+        # PUT (values.update) reescribe lo mismo; los POST (batchUpdate, append) pueden duplicar
+        idempotente = not escritura or method.upper() == "PUT"
+        return planificador.ejecutar(
+            lambda: super(ClienteHTTPPlanificado, self).request(method, endpoint, *args, **kwargs),
+            escritura=escritura, cuota=es_sheets, idempotente=idempotente
+        )
@@ -0,0 +1,259 @@
+"""
+Script: Vacancy_Store.py
+Purpose: Base local SQLite (modo WAL) como fuente primaria de vacantes. Google Sheets pasa a ser
+         una réplica que se actualiza en segundo plano (ver sheets_replicator.py).
+"""
+import json
+import bisect
+import sqlite3
+import hashlib
+import threading
+from datetime import datetime
+from typing import List, Dict, Iterable
+
+from config import VACANCY_DB_PATH
+
+# Campos de la vacante normalizada que se persisten
+CAMPOS = [
+    "titulo", "empresa", "ubicacion", "modalidad", "nivel", "jornada", "url",
+    "salario", "estado", "fecha_busqueda", "fecha_publicacion",
+    "descripcion", "match_percent", "match_reason", "keyword_buscada"
+]
+
+# Encabezado de la hoja -> campo local
+HEADER_A_CAMPO = {
+    "Título": "titulo",
+    "Empresa": "empresa",
+    "Ubicación": "ubicacion",
+    "Modalidad": "modalidad",
+    "Nivel": "nivel",
+    "Jornada": "jornada",
+    "URL": "url",
+    "Salario": "salario",
+    "Estado": "estado",
+    "Fecha de Registro": "fecha_busqueda",
+    "Fecha Publicación": "fecha_publicacion",
+    "Descripción": "descripcion",
+    "Match %": "match_percent",
+}
+CAMPO_A_HEADER = {v: k for k, v in HEADER_A_CAMPO.items()}
+
+# Estados de sincronización con la réplica
+SYNC_NUEVO = "nuevo"
+SYNC_MODIFICADO = "modificado"
+SYNC_OK = "ok"
+
+_SCHEMA = f"""
+CREATE TABLE IF NOT EXISTS vacantes (
+    clave TEXT PRIMARY KEY,
+    {", ".join(f"{c} TEXT DEFAULT ''" for c in CAMPOS)},
+    row_idx INTEGER,
+    archivo TEXT NOT NULL DEFAULT '',
+    sync_estado TEXT NOT NULL DEFAULT '{SYNC_NUEVO}',
+    campos_sucios TEXT NOT NULL DEFAULT '[]',
+    version INTEGER NOT NULL DEFAULT 0,
+    creado_en TEXT,
+    actualizado_en TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_vacantes_sync ON vacantes(sync_estado);
+CREATE INDEX IF NOT EXISTS idx_vacantes_match ON vacantes(match_percent);
+"""
+
+
+def clave_vacante(v: dict) -> str:
+    """La URL identifica la vacante; las ingresadas a mano sin URL usan un hash de su contenido."""
+    url = (v.get("url") or "").strip()
+    if url.startswith("http"):
+        return url
+    base = f"{v.get('titulo', '')}|{v.get('empresa', '')}|{v.get('descripcion', '')}"
+    return "manual:" + hashlib.sha1(base.encode("utf-8")).hexdigest()[:16]
+
+
+def _ahora() -> str:
+    return datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+
+
+class VacancyStore:
+    """Acceso thread-safe a la base local. Todas las lecturas/escrituras son síncronas y locales."""
+
+    def __init__(self, path: str = VACANCY_DB_PATH):
+        self.path = path
+        self._lock = threading.RLock()
+        self.conn = sqlite3.connect(path, check_same_thread=False, timeout=30)
+        self.conn.row_factory = sqlite3.Row
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript(_SCHEMA)
+        self._migrar_esquema()
+
+    def _migrar_esquema(self):
+        """Agrega columnas nuevas a bases creadas con versiones anteriores."""
+        columnas = {r["name"] for r in self.conn.execute("PRAGMA table_info(vacantes)")}
+        if "archivo" not in columnas:
+            self.conn.execute("ALTER TABLE vacantes ADD COLUMN archivo TEXT NOT NULL DEFAULT ''")
+            self.conn.commit()
+        if "version" not in columnas:
+            self.conn.execute("ALTER TABLE vacantes ADD COLUMN version INTEGER NOT NULL DEFAULT 0")
+            self.conn.commit()
+
+    def cerrar(self):
+        with self._lock:
+            self.conn.close()
+
+    # --- LECTURAS ---
+    def contar(self) -> int:
+        with self._lock:
+            return self.conn.execute("SELECT COUNT(*) FROM vacantes").fetchone()[0]
+
+    def urls(self) -> set:
+        """Todas las URLs conocidas (índice de vistas para deduplicar)."""
+        with self._lock:
+            return {r[0] for r in self.conn.execute("SELECT url FROM vacantes WHERE url != ''")}
+
+    def obtener(self, clave: str) -> dict:
+        with self._lock:
+            row = self.conn.execute("SELECT * FROM vacantes WHERE clave = ?", (clave,)).fetchone()
+        return dict(row) if row else None
+
+    def pendientes_match(self) -> List[dict]:
+        """
+        Vacantes sin Match % calculado (y no archivadas), las últimas primero, con las llaves
+        de la hoja ("Título", "Empresa", ...) que usa chat_vacante. Un "0" es un resultado real;
+        "Nuevo" es la marca que usaban antes las vacantes de link/texto sin analizar.
+        """
+        with self._lock:
+            rows = self.conn.execute(
+                "SELECT * FROM vacantes WHERE COALESCE(match_percent, '') IN ('', 'Pendiente', 'Nuevo') AND archivo = '' "
+                "ORDER BY fecha_busqueda DESC, rowid DESC"
+            ).fetchall()
+        return [self._a_formato_hoja(dict(r)) for r in rows]
+
+    @staticmethod
+    def _a_formato_hoja(fila: dict) -> dict:
+        item = {header: fila.get(campo, "") for header, campo in HEADER_A_CAMPO.items()}
+        item["_row_idx"] = fila.get("row_idx")
+        item["_clave"] = fila["clave"]
+        return item
+
+    # --- ESCRITURAS ---
+    def insertar_nuevas(self, vacantes: Iterable[dict]) -> int:
+        """Inserta vacantes nuevas (ignora las ya conocidas). Quedan marcadas para replicar."""
+        ahora = _ahora()
+        filas = []
+        for v in vacantes:
+            valores = [str(v.get(c, "") if v.get(c) is not None else "") for c in CAMPOS]
+            filas.append([clave_vacante(v)] + valores + [SYNC_NUEVO, ahora, ahora])
+        columnas = ["clave"] + CAMPOS + ["sync_estado", "creado_en", "actualizado_en"]
+        with self._lock, self.conn:
+            antes = self.conn.total_changes
+            self.conn.executemany(
+                f"INSERT OR IGNORE INTO vacantes ({', '.join(columnas)}) VALUES ({', '.join('?' * len(columnas))})",
+                filas
+            )
+            return self.conn.total_changes - antes
+
+    def actualizar_campos(self, clave: str, **campos) -> bool:
+        """
+        Modifica campos de una vacante y los marca como sucios para la réplica.
+        Cada cambio incrementa `version`: la réplica solo marca como sincronizada la versión que leyó.
+        """
+        campos = {k: v for k, v in campos.items() if k in CAMPOS}
+        if not campos:
+            return False
+        with self._lock, self.conn:
+            row = self.conn.execute(
+                "SELECT sync_estado, campos_sucios FROM vacantes WHERE clave = ?", (clave,)
+            ).fetchone()
+            if row is None:
+                return False
+            sucios = sorted(set(json.loads(row["campos_sucios"])) | set(campos))
+            # Si aún no llegó a la hoja, sigue siendo "nuevo" (se escribirá completa)
+            sync = row["sync_estado"] if row["sync_estado"] == SYNC_NUEVO else SYNC_MODIFICADO
+            sets = ", ".join(f"{k} = ?" for k in campos)
+            self.conn.execute(
+                f"UPDATE vacantes SET {sets}, sync_estado = ?, campos_sucios = ?, actualizado_en = ?, "
+                f"version = version + 1 WHERE clave = ?",
+                [str(v) for v in campos.values()] + [sync, json.dumps(sucios), _ahora(), clave]
+            )
+        return True
+
+    def importar_desde_hoja(self, filas_hoja: List[dict]) -> int:
+        """
+        Siembra la base con las filas existentes de la hoja (formato {header: valor, "_row_idx"}).
+        Se marcan como sincronizadas: ya están en la réplica.
+        """
+        vacantes = []
+        for fila in filas_hoja:
+            v = {campo: fila.get(header, "") for header, campo in HEADER_A_CAMPO.items()}
+            if not v.get("url") and not v.get("titulo"):
+                continue
+            v["_row_idx"] = fila.get("_row_idx")
+            vacantes.append(v)
+
+        ahora = _ahora()
+        columnas = ["clave"] + CAMPOS + ["row_idx", "sync_estado", "creado_en", "actualizado_en"]
+        datos = [
+            [clave_vacante(v)] + [str(v.get(c, "")) for c in CAMPOS] + [v["_row_idx"], SYNC_OK, ahora, ahora]
+            for v in vacantes
+        ]
+        with self._lock, self.conn:
+            antes = self.conn.total_changes
+            self.conn.executemany(
+                f"INSERT OR IGNORE INTO vacantes ({', '.join(columnas)}) VALUES ({', '.join('?' * len(columnas))})",
+                datos
+            )
+            return self.conn.total_changes - antes
+
+    # --- SOPORTE PARA LA RÉPLICA ---
+    def sin_sincronizar(self, limite: int = 500) -> List[dict]:
+        with self._lock:
+            rows = self.conn.execute(
+                "SELECT * FROM vacantes WHERE sync_estado != ? ORDER BY rowid LIMIT ?", (SYNC_OK, limite)
+            ).fetchall()
+        return [dict(r) for r in rows]
+
+    def marcar_sincronizadas(self, versiones: Dict[str, int], row_idx: Dict[str, int] = None):
+        """
+        Marca como sincronizadas las vacantes cuya `version` no cambió desde que se leyeron
+        (si cambiaron mientras se replicaban, quedan sucias para la siguiente vuelta).
+        """
+        row_idx = row_idx or {}
+        with self._lock, self.conn:
+            for clave, version in versiones.items():
+                self.conn.execute(
+                    "UPDATE vacantes SET sync_estado = ?, campos_sucios = '[]' WHERE clave = ? AND version = ?",
+                    (SYNC_OK, clave, version)
+                )
+                # La fila ya existe en la hoja aunque haya cambiado mientras se replicaba: si seguía
+                # como "nueva", pasa a "modificada" para que la próxima vuelta escriba sus campos sucios
+                if clave in row_idx:
+                    self.conn.execute(
+                        "UPDATE vacantes SET row_idx = ?, sync_estado = CASE WHEN sync_estado = ? THEN ? "
+                        "ELSE sync_estado END WHERE clave = ?",
+                        (row_idx[clave], SYNC_NUEVO, SYNC_MODIFICADO, clave)
+                    )
+
+    def registrar_archivadas(self, destinos: Dict[int, str]):
+        """
+        Refleja el borrado de filas archivadas en la hoja: {row_idx: destino}.
+        Las archivadas quedan sin row_idx (su URL sigue sirviendo para deduplicar) y el
+        resto se corre hacia arriba tantas filas como se borraron por encima.
+        """
+        borradas = sorted(destinos)
+        with self._lock, self.conn:
+            rows = self.conn.execute("SELECT clave, row_idx FROM vacantes WHERE row_idx IS NOT NULL").fetchall()
+            archivadas, corridas = [], []
+            for r in rows:
+                if r["row_idx"] in destinos:
+                    archivadas.append((destinos[r["row_idx"]], r["clave"]))
+                else:
+                    nuevo = r["row_idx"] - bisect.bisect_left(borradas, r["row_idx"])
+                    if nuevo != r["row_idx"]:
+                        corridas.append((nuevo, r["clave"]))
+            self.conn.executemany("UPDATE vacantes SET row_idx = NULL, archivo = ? WHERE clave = ?", archivadas)
+            self.conn.executemany("UPDATE vacantes SET row_idx = ? WHERE clave = ?", corridas)
+
+    def asignar_row_idx(self, mapa: Dict[str, int]):
+        with self._lock, self.conn:
+            self.conn.executemany("UPDATE vacantes SET row_idx = ? WHERE clave = ?",
+                                  [(idx, clave) for clave, idx in mapa.items()])
@@ -59,3 +59,125 @@ URL_GETONBRD = "https://www.getonbrd.com/api/v0/search/jobs?query={}&expand=[\"c
 
 RUTA_CV = "cv.pdf" 
 
+
+# --- CHAT CON EL ASESOR ---
+# Presupuesto de tokens de entrada por turno; sobre esto se resumen los turnos antiguos
+CHAT_PRESUPUESTO_TOKENS = 24000
+# Turnos (pregunta + respuesta) que siempre se conservan completos
+CHAT_TURNOS_RECIENTES = 4
+
+# --- PRE-ANÁLISIS EN SEGUNDO PLANO (chat_vacante) ---
+PREFETCH_TOP_N = 3
+PREFETCH_WORKERS = 2
+# "reciente" (últimas registradas primero) o "score" (coincidencia de keywords)
+PREFETCH_CRITERIO = "reciente"
+
+# --- ADJUNTOS DEL CHAT ---
+# Cache de handles subidos (hash de contenido -> URI). Los archivos de Gemini expiran a las 48h.
+ATTACHMENT_CACHE_PATH = os.path.join(BASE_DIR, "attachment_cache.json")
+ATTACHMENT_TTL_HORAS = 47
+
+# --- SNAPSHOT LOCAL DE LA HOJA ---
+SNAPSHOT_DIR = os.path.join(BASE_DIR, "snapshots")
+
+# --- BASE LOCAL (SQLite) Y RÉPLICA A SHEETS ---
+VACANCY_DB_PATH = os.path.join(BASE_DIR, "vacantes.db")
+REPLICA_INTERVALO_S = 30
+REPLICA_LOTE = 500
+REPLICA_BACKOFF_MAX_S = 300
+# Al terminar una ejecución, tiempo máximo de espera para vaciar la cola de réplica
+REPLICA_ESPERA_CIERRE_S = 60
+
+# --- CLIENTE DE SHEETS COMPARTIDO ---
+# ID del spreadsheet resuelto (evita la búsqueda por nombre en Drive en cada ejecución)
+SHEETS_CLIENTE_CACHE_PATH = os.path.join(BASE_DIR, "sheets_cliente.json")
+# Se renueva el token de acceso si vence dentro de este margen
+SHEETS_TOKEN_MARGEN_S = 300
+
+# --- CUOTAS Y REINTENTOS DE SHEETS ---
+# Cuota por defecto de la API (por usuario): 60 lecturas y 60 escrituras por minuto
+SHEETS_LECTURAS_POR_MIN = 60
+SHEETS_ESCRITURAS_POR_MIN = 60
+SHEETS_REINTENTOS = 6
+SHEETS_BACKOFF_MAX_S = 64
+# Ventana para agrupar cambios de celdas sueltas (ej: estados) en un solo batchUpdate
+SHEETS_COALESCER_S = 2
+
+# --- ARCHIVO DE VACANTES ANTIGUAS ---
+# Filas con "Fecha de Registro" más antigua que esto salen de la hoja "Vacantes" (0 = no archivar)
+ARCHIVO_RETENCION_DIAS = 90
+# "hoja" (pestañas Archivo_YYYY-MM en el mismo archivo) o "parquet" (ARCHIVO_DIR local)
+ARCHIVO_DESTINO = "hoja"
+ARCHIVO_DIR = os.path.join(BASE_DIR, "archivo")
+
+# --- HISTORIAL EN BIGQUERY ---
+BIGQUERY_HABILITADO = os.getenv("BIGQUERY_HABILITADO", "0") == "1"
+BIGQUERY_PROYECTO = os.getenv("BIGQUERY_PROJECT", "")
+BIGQUERY_DATASET = "vacantes"
+BIGQUERY_TABLA = "historial"
+# Lotes escritos que aún no se cargan (se reintentan en la próxima ejecución)
+BIGQUERY_LOTES_DIR = os.path.join(BASE_DIR, "bigquery_lotes")
+
+# --- HISTORIAL PARQUET (analítica local) ---
+HISTORIAL_DIR = os.path.join(BASE_DIR, "historial")
+
+# --- CHECKPOINTS DE EJECUCIÓN (--resume) ---
+RUNS_DIR = os.path.join(BASE_DIR, "runs")
+# Ejecuciones completas que se conservan en disco
+RUNS_CONSERVAR = 10
+
+# --- MODO DAEMON (automate_search.py --daemon) ---
+# Cada (portal, keyword) se refresca con el intervalo de su portal, en segundos
+DAEMON_INTERVALOS_S = {"GetOnBrd": 3600, "LinkedIn": 6 * 3600}
+DAEMON_INTERVALO_DEFECTO_S = 3600
+# Hilos por portal; en LinkedIn cada hilo mantiene su propio Chromium abierto
+DAEMON_HILOS = {"GetOnBrd": 4, "LinkedIn": 1}
+DAEMON_TICK_S = 30
+# Las keywords (cache del CV) se releen cada tanto para tomar cambios sin reiniciar
+DAEMON_KEYWORDS_CADA_S = 1800
+DAEMON_ESTADO_PATH = os.path.join(BASE_DIR, "daemon_estado.json")
+# Endpoint /health, /status y /metrics (puerto 0 = deshabilitado; solo el archivo de estado)
+DAEMON_HOST = "127.0.0.1"
+DAEMON_PUERTO = int(os.getenv("DAEMON_PUERTO", "8765"))
+
+# --- MÉTRICAS ---
+# Textfile para el textfile collector de node_exporter (modo cron); en modo daemon: GET /metrics
+METRICAS_TEXTFILE_PATH = os.path.join(BASE_DIR, "metrics", "jobsearch.prom")
+
+# --- TRAZAS POR VACANTE ---
+# "json" (TRACES_DIR/<run_id>.jsonl), "otlp" (collector en OTEL_EXPORTER_OTLP_ENDPOINT; requiere opentelemetry-sdk) u "off"
+TRACING_DESTINO = os.getenv("TRACING_DESTINO", "json")
+TRACES_DIR = os.path.join(BASE_DIR, "traces")
+
+# --- PROFILING (--profile) ---
+PERFIL_INTERVALO_S = 0.005
+PERFIL_TOP = 25
+# Profundidad de pila de tracemalloc: cada frame extra encarece mucho cada asignación
+PERFIL_TRACEMALLOC_FRAMES = 5
+
+# --- POOL DE PROCESOS (trabajo CPU: HTML -> texto, filtros de palabras) ---
+# Procesos del pool (0 = todo en el hilo que llama, sin pool; por defecto núcleos - 1)
+CPU_POOL_WORKERS = int(os.getenv("CPU_POOL_WORKERS", max(0, (os.cpu_count() or 1) - 1)))
+# Ítems por tarea enviada a un proceso (amortiza el pickling)
+CPU_POOL_LOTE = 64
+# Bajo este número de ítems se procesa en línea: el viaje al pool cuesta más que el trabajo
+CPU_POOL_MINIMO_HTML = 8
+CPU_POOL_MINIMO_FILTRO = 1000
+
+# --- MEMORIA ACOTADA (automate_search.py --bounded-memory) ---
+# Las descripciones van a runs/<run_id>/descripciones.db; se cargan de a este número de vacantes
+MEMORIA_ACOTADA_LOTE = 200
+
+# --- MODO MULTI-CANDIDATO (automate_search.py --candidates) ---
+# Lista JSON de perfiles: {"nombre", "cv", "keywords"?, "relevancia"?, "sheet"?, "db"?}
+CANDIDATOS_PATH = os.path.join(BASE_DIR, "candidatos.json")
+CANDIDATOS_DIR = os.path.join(BASE_DIR, "candidatos")
+
+# --- FIXTURES DE PORTALES (benchmarks/portal_replay.py) ---
+# Con un directorio, las respuestas de los scrapers se graban ahí (archivo de fixtures)
+PORTAL_CAPTURA_DIR = os.getenv("PORTAL_CAPTURA_DIR", "")
+# Con una URL (ej: http://127.0.0.1:8770), los scrapers piden al servidor de replay en vez de a los portales
+PORTAL_REPLAY_URL = os.getenv("PORTAL_REPLAY_URL", "")
+PORTAL_FIXTURES_DIR = os.path.join(BASE_DIR, "fixtures", "portales")
+PORTAL_REPLAY_HOST = "127.0.0.1"
+PORTAL_REPLAY_PUERTO = 8770
@@ -0,0 +1,83 @@
+"""
+Script: Cpu_Pool.py
+Purpose: Pool de procesos compartido para las transformaciones CPU-bound del pipeline (HTML -> texto,
+         filtros de palabras). Los hilos de I/O (scrapers, Sheets, LLM) siguen en ThreadPoolExecutor;
+         lo que solo consume CPU se manda acá en lotes de CPU_POOL_LOTE ítems para no pelear por el GIL.
+         Las funciones enviadas deben ser de módulo liviano e importable (utils), no lambdas.
+         Con pocos ítems, CPU_POOL_WORKERS=0 o el pool caído, se ejecuta en línea con el mismo resultado.
+
+Uso:
+    from cpu_pool import mapear
+    textos = mapear(html_a_texto, htmls, minimo=CPU_POOL_MINIMO_HTML)
+"""
+import sys
+import time
+import atexit
+import threading
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Callable, Iterable, List
+
+from config import CPU_POOL_WORKERS, CPU_POOL_LOTE, CPU_POOL_MINIMO_HTML
+from metrics import POOL_CPU
+
+_lock = threading.Lock()
+_pool = None
+_deshabilitado = CPU_POOL_WORKERS <= 0
+
+
+def _iniciar_worker(rutas: List[str]):
+    # Los módulos del repo se importan planos (sys.path armado por el entry point)
+    for ruta in rutas:
+        if ruta not in sys.path:
+            sys.path.append(ruta)
+
+
+def _ejecutar_lote(fn: Callable, lote: list):
+    inicio = time.process_time()
+    return [fn(item) for item in lote], time.process_time() - inicio
+
+
+def _obtener_pool() -> ProcessPoolExecutor:
+    global _pool
+    with _lock:
+        if _pool is None:
+            # spawn: el pool se crea desde hilos de I/O y fork con hilos vivos puede heredar locks tomados
+            _pool = ProcessPoolExecutor(max_workers=CPU_POOL_WORKERS, mp_context=multiprocessing.get_context("spawn"),
+                                        initializer=_iniciar_worker, initargs=(list(sys.path),))
+        return _pool
+
+
+def mapear(fn: Callable, items: Iterable, lote: int = CPU_POOL_LOTE, minimo: int = CPU_POOL_MINIMO_HTML) -> list:
+    """[fn(x) for x in items] repartido en el pool por lotes; mantiene el orden de entrada."""
+    global _deshabilitado
+    items = list(items)
+    if _deshabilitado or len(items) < minimo:
+        return [fn(item) for item in items]
+
+    try:
+        pool = _obtener_pool()
+        futuros = [pool.submit(_ejecutar_lote, fn, items[i:i + lote]) for i in range(0, len(items), lote)]
+        resultados = []
+        for futuro in futuros:
+            parcial, cpu = futuro.result()
+            resultados.extend(parcial)
+            POOL_CPU.inc(cpu)
+        return resultados
+    except (BrokenProcessPool, OSError) as e:
+        print(f"⚠️ CPU POOL UNAVAILABLE, RUNNING INLINE: {e}")
+        _deshabilitado = True
+        cerrar()
+        return [fn(item) for item in items]
+
+
+def cerrar():
+    global _pool
+    with _lock:
+        pool, _pool = _pool, None
+    if pool is not None:
+        pool.shutdown(wait=True, cancel_futures=True)
+
+
+atexit.register(cerrar)
@@ -0,0 +1,260 @@
+"""
+Script: Metrics.py
+Purpose: Métricas del pipeline (contadores e histogramas con etiquetas) sin dependencias externas.
+         Se exportan en formato de texto de Prometheus: en modo daemon vía GET /metrics y en modo
+         cron como textfile (.prom, para el textfile collector de node_exporter) + JSON al final
+         de cada ejecución.
+
+Uso:
+    from metrics import PORTAL_LATENCIA, VACANTES_ETAPA, cronometro
+    with cronometro(PORTAL_LATENCIA, portal="GetOnBrd"):
+        ...
+    VACANTES_ETAPA.inc(len(vacantes), stage="collected")
+"""
+import os
+import json
+import time
+import threading
+from bisect import bisect_left
+from contextlib import contextmanager
+from typing import Dict, List, Sequence, Tuple
+
+from config import METRICAS_TEXTFILE_PATH
+
+BUCKETS_SEGUNDOS = (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300)
+
+
+def _escapar(valor) -> str:
+    return str(valor).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _etiquetas(nombres: Sequence[str], valores: Tuple, extra: str = "") -> str:
+    partes = [f'{n}="{_escapar(v)}"' for n, v in zip(nombres, valores)]
+    if extra:
+        partes.append(extra)
+    return "{" + ",".join(partes) + "}" if partes else ""
+
+
+def _num(valor: float) -> str:
+    if valor == float("inf"):
+        return "+Inf"
+    return repr(float(valor)) if isinstance(valor, float) and not valor.is_integer() else str(int(valor))
+
+
+class _Metrica:
+    tipo = ""
+
+    def __init__(self, nombre: str, ayuda: str, etiquetas: Sequence[str] = ()):
+        self.nombre = nombre
+        self.ayuda = ayuda
+        self.etiquetas = tuple(etiquetas)
+        self._lock = threading.Lock()
+        self._series: Dict[Tuple, object] = {}
+
+    def _clave(self, labels: dict) -> Tuple:
+        if set(labels) != set(self.etiquetas):
+            raise ValueError(f"{self.nombre} espera etiquetas {self.etiquetas}, recibió {tuple(labels)}")
+        return tuple(str(labels[n]) for n in self.etiquetas)
+
+    def reiniciar(self):
+        with self._lock:
+            self._series.clear()
+
+
+class Contador(_Metrica):
+    tipo = "counter"
+
+    def inc(self, valor: float = 1, **labels):
+        if valor < 0:
+            raise ValueError("Un contador solo puede aumentar")
+        clave = self._clave(labels)
+        with self._lock:
+            self._series[clave] = self._series.get(clave, 0) + valor
+
+    def valor(self, **labels) -> float:
+        return self._series.get(self._clave(labels), 0)
+
+    def lineas(self) -> List[str]:
+        with self._lock:
+            return [f"{self.nombre}{_etiquetas(self.etiquetas, k)} {_num(v)}" for k, v in sorted(self._series.items())]
+
+    def a_dict(self) -> list:
+        with self._lock:
+            return [{"labels": dict(zip(self.etiquetas, k)), "value": v} for k, v in sorted(self._series.items())]
+
+
+class Histograma(_Metrica):
+    tipo = "histogram"
+
+    def __init__(self, nombre: str, ayuda: str, etiquetas: Sequence[str] = (), buckets: Sequence[float] = BUCKETS_SEGUNDOS):
+        super().__init__(nombre, ayuda, etiquetas)
+        self.buckets = tuple(sorted(buckets))
+
+    def observar(self, valor: float, **labels):
+        clave = self._clave(labels)
+        with self._lock:
+            serie = self._series.setdefault(clave, {"cuentas": [0] * (len(self.buckets) + 1), "suma": 0.0, "n": 0})
+            serie["cuentas"][bisect_left(self.buckets, valor)] += 1
+            serie["suma"] += valor
+            serie["n"] += 1
+
+    def lineas(self) -> List[str]:
+        lineas = []
+        with self._lock:
+            for clave, serie in sorted(self._series.items()):
+                acumulado = 0
+                for limite, cuenta in zip(self.buckets + (float("inf"),), serie["cuentas"]):
+                    acumulado += cuenta
+                    le = _etiquetas(self.etiquetas, clave, f'le="{_num(limite)}"')
+                    lineas.append(f"{self.nombre}_bucket{le} {acumulado}")
+                lineas.append(f"{self.nombre}_sum{_etiquetas(self.etiquetas, clave)} {round(serie['suma'], 6)}")
+                lineas.append(f"{self.nombre}_count{_etiquetas(self.etiquetas, clave)} {serie['n']}")
+        return lineas
+
+    def a_dict(self) -> list:
+        with self._lock:
+            return [{
+                "labels": dict(zip(self.etiquetas, k)), "count": s["n"], "sum": round(s["suma"], 6),
+                "avg": round(s["suma"] / s["n"], 6) if s["n"] else None,
+                "buckets": dict(zip([_num(b) for b in self.buckets] + ["+Inf"], s["cuentas"])),
+            } for k, s in sorted(self._series.items())]
+
+
+class Registro:
+    def __init__(self):
+        self._metricas: Dict[str, _Metrica] = {}
+
+    def _registrar(self, metrica: _Metrica) -> _Metrica:
+        if metrica.nombre in self._metricas:
+            raise ValueError(f"Métrica duplicada: {metrica.nombre}")
+        self._metricas[metrica.nombre] = metrica
+        return metrica
+
+    def contador(self, nombre: str, ayuda: str, etiquetas: Sequence[str] = ()) -> Contador:
+        return self._registrar(Contador(nombre, ayuda, etiquetas))
+
+    def histograma(self, nombre: str, ayuda: str, etiquetas: Sequence[str] = (), **kwargs) -> Histograma:
+        return self._registrar(Histograma(nombre, ayuda, etiquetas, **kwargs))
+
+    def reiniciar(self):
+        for m in self._metricas.values():
+            m.reiniciar()
+
+    def texto_prometheus(self) -> str:
+        """Formato de exposición de texto de Prometheus (version=0.0.4)."""
+        lineas = []
+        for m in self._metricas.values():
+            lineas.append(f"# HELP {m.nombre} {m.ayuda}")
+            lineas.append(f"# TYPE {m.nombre} {m.tipo}")
+            lineas.extend(m.lineas())
+        return "\n".join(lineas) + "\n"
+
+    def a_dict(self) -> dict:
+        return {m.nombre: {"type": m.tipo, "help": m.ayuda, "series": m.a_dict()} for m in self._metricas.values()}
+
+    def exportar(self, textfile: str = METRICAS_TEXTFILE_PATH, json_path: str = None) -> List[str]:
+        """Escribe el textfile .prom y, si se indica, un JSON con el mismo contenido (ambos atómicos)."""
+        rutas = []
+        for ruta, contenido in ((textfile, self.texto_prometheus()),
+                                (json_path, json.dumps(self.a_dict(), ensure_ascii=False, indent=2))):
+            if not ruta:
+                continue
+            os.makedirs(os.path.dirname(ruta) or ".", exist_ok=True)
+            with open(ruta + ".tmp", "w", encoding="utf-8") as f:
+                f.write(contenido)
+            os.replace(ruta + ".tmp", ruta)
+            rutas.append(ruta)
+        return rutas
+
+
+registro = Registro()
+
+# --- SCRAPING ---
+PORTAL_LATENCIA = registro.histograma(
+    "jobsearch_portal_request_seconds", "Duración de una búsqueda (portal, keyword)", ["portal"])
+PORTAL_ERRORES = registro.contador(
+    "jobsearch_portal_errors_total", "Búsquedas de portal que terminaron en error", ["portal"])
+
+# --- ETAPAS / FILTROS ---
+VACANTES_ETAPA = registro.contador(
+    "jobsearch_vacancies_total",
+    "Vacantes que llegan a cada etapa (collected, valid, unique, new, relevant, packed, stored)", ["stage"])
+FILTRO_DESCARTES = registro.contador(
+    "jobsearch_filter_dropped_total",
+    "Vacantes descartadas por filtro (tasa = dropped / vacancies{stage=collected})", ["filter"])
+
+# --- LLM ---
+LLM_LATENCIA = registro.histograma("jobsearch_llm_request_seconds", "Latencia de llamadas al LLM", ["operation"])
+LLM_TOKENS = registro.contador("jobsearch_llm_tokens_total", "Tokens consumidos por el LLM", ["operation", "direction"])
+LLM_REINTENTOS = registro.contador("jobsearch_llm_retries_total", "Reintentos de llamadas al LLM", ["operation"])
+LLM_ERRORES = registro.contador("jobsearch_llm_errors_total", "Llamadas al LLM que fallaron", ["operation"])
+
+# --- SHEETS ---
+SHEETS_LLAMADAS = registro.contador(
+    "jobsearch_sheets_requests_total", "Requests HTTP a Google APIs vía gspread", ["kind", "outcome"])
+SHEETS_LATENCIA = registro.histograma(
+    "jobsearch_sheets_request_seconds", "Latencia de requests a Sheets (incluye espera por cuota)", ["kind"])
+SHEETS_REINTENTOS = registro.contador("jobsearch_sheets_retries_total", "Reintentos por 429/5xx/red", ["kind"])
+
+# --- CPU POR ETAPA ---
+ETAPA_SEGUNDOS = registro.contador("jobsearch_stage_seconds_total", "Duración (reloj) de cada etapa", ["stage"])
+ETAPA_CPU = registro.contador(
+    "jobsearch_stage_cpu_seconds_total", "CPU usada por etapa: proceso principal (todos sus hilos) y pool de procesos",
+    ["stage", "process"])
+POOL_CPU = registro.contador("jobsearch_cpu_pool_seconds_total", "CPU usada por los procesos de cpu_pool")
+
+
+@contextmanager
+def cronometro(histograma: Histograma, errores: Contador = None, **labels):
+    """Observa la duración del bloque; si falla y se pasa `errores`, también lo cuenta."""
+    inicio = time.perf_counter()
+    try:
+        yield
+    except Exception:
+        if errores is not None:
+            errores.inc(**labels)
+        raise
+    finally:
+        histograma.observar(time.perf_counter() - inicio, **labels)
+
+
+def llamar_llm(operacion: str, fn, *args, **kwargs):
+    """
+    Ejecuta `fn(*args, **kwargs)` (ej: client.models.generate_content) registrando latencia,
+    errores y tokens (usage_metadata de google-genai, si viene). Retorna la respuesta.
+    """
+    with cronometro(LLM_LATENCIA, LLM_ERRORES, operation=operacion):
+        response = fn(*args, **kwargs)
+    usage = getattr(response, "usage_metadata", None)
+    entrada = getattr(usage, "prompt_token_count", None)
+    salida = getattr(usage, "candidates_token_count", None)
+    if entrada:
+        LLM_TOKENS.inc(entrada, operation=operacion, direction="input")
+    if salida:
+        LLM_TOKENS.inc(salida, operation=operacion, direction="output")
+    return response
+
+
+def contar_reintento_llm(operacion: str):
+    """Callback para `before_sleep` de tenacity."""
+    return lambda retry_state: LLM_REINTENTOS.inc(operation=operacion)
+
+
+@contextmanager
+def medir_cpu(etapa: str, nucleos: int = None):
+    """
+    Reloj y CPU de la etapa (proceso principal + pool de procesos). Al terminar imprime la
+    utilización respecto de los núcleos disponibles: ~100% = la etapa escala a todos los núcleos.
+    """
+    nucleos = nucleos or os.cpu_count() or 1
+    inicio, cpu, pool = time.perf_counter(), time.process_time(), POOL_CPU.valor()
+    try:
+        yield
+    finally:
+        segundos = time.perf_counter() - inicio
+        cpu, pool = time.process_time() - cpu, POOL_CPU.valor() - pool
+        ETAPA_SEGUNDOS.inc(segundos, stage=etapa)
+        ETAPA_CPU.inc(cpu, stage=etapa, process="main")
+        ETAPA_CPU.inc(pool, stage=etapa, process="pool")
+        uso = (cpu + pool) / (segundos * nucleos) if segundos > 0 else 0
+        print(f"🖥️  [cpu] {etapa}: {segundos:.2f}s, cpu {cpu:.2f}s + pool {pool:.2f}s ({uso:.0%} de {nucleos} núcleos)")
@@ -0,0 +1,240 @@
+"""
+Script: Portal_Fixtures.py
+Purpose: Grabación y replay de los portales, para medir los scrapers sin golpear los sitios reales.
+         - Captura (PORTAL_CAPTURA_DIR o capturar()): cada respuesta HTTP de los scrapers (API de GetOnBrd)
+           y cada página ya renderizada por Playwright (LinkedIn) queda en un archivo de fixtures:
+           un directorio con index.json y los cuerpos comprimidos en cuerpos/<hash>.gz.
+         - Replay (PORTAL_REPLAY_URL o reproducir()): url_portal() reescribe las URLs de los scrapers hacia
+           ServidorReplay, un servidor HTTP local que sirve el archivo con latencia y errores inyectados.
+         Las páginas se graban sin <script> y, en replay, el navegador solo puede pedir al servidor local:
+         el DOM grabado ya está renderizado y nada sale a la red.
+
+Uso:
+    python benchmarks/portal_replay.py capture --keywords "Python,Data Engineer"
+    python benchmarks/portal_replay.py serve --latency-ms 150 --error-rate 0.05
+    python benchmarks/portal_replay.py bench --latency-ms 150
+"""
+import os
+import re
+import gzip
+import json
+import time
+import random
+import socket
+import hashlib
+import threading
+from collections import Counter
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlsplit, unquote
+from typing import Dict, Optional, Tuple
+
+from config import PORTAL_CAPTURA_DIR, PORTAL_REPLAY_URL, PORTAL_REPLAY_HOST, PORTAL_REPLAY_PUERTO
+
+_SCRIPTS = re.compile(r"<script\b.*?</script\s*>", re.IGNORECASE | re.DOTALL)
+# Cabeceras que se conservan al grabar (el resto depende de la conexión original)
+_CABECERAS = ("content-type", "location")
+
+
+def clave_url(url: str) -> str:
+    """host + ruta + query, sin codificación: la misma URL pedida por requests o por Chromium da la misma clave."""
+    partes = urlsplit(url)
+    return unquote(partes.netloc + partes.path + (f"?{partes.query}" if partes.query else ""))
+
+
+class ArchivoFixtures:
+    """Directorio de fixtures: index.json {clave: {status, cabeceras, cuerpo}} + cuerpos/<hash>.gz."""
+
+    def __init__(self, directorio: str):
+        self.directorio = directorio
+        self.index_path = os.path.join(directorio, "index.json")
+        self._lock = threading.Lock()
+        if os.path.exists(self.index_path):
+            with open(self.index_path, "r", encoding="utf-8") as f:
+                self.index = json.load(f)
+        else:
+            self.index = {"meta": {}, "respuestas": {}}
+
+    def _guardar_index(self):
+        os.makedirs(self.directorio, exist_ok=True)
+        with open(self.index_path + ".tmp", "w", encoding="utf-8") as f:
+            json.dump(self.index, f, ensure_ascii=False, indent=2)
+        os.replace(self.index_path + ".tmp", self.index_path)
+
+    def grabar(self, url: str, status: int, cabeceras: Dict[str, str], cuerpo: bytes):
+        clave = clave_url(url)
+        nombre = hashlib.sha1(clave.encode("utf-8")).hexdigest()[:20] + ".gz"
+        os.makedirs(os.path.join(self.directorio, "cuerpos"), exist_ok=True)
+        with open(os.path.join(self.directorio, "cuerpos", nombre), "wb") as f:
+            f.write(gzip.compress(cuerpo))
+        cabeceras = {k.lower(): v for k, v in cabeceras.items() if k.lower() in _CABECERAS}
+        with self._lock:
+            self.index["respuestas"][clave] = {
+                "status": status, "cabeceras": cabeceras, "cuerpo": nombre,
+                "bytes": len(cuerpo), "capturado": datetime.now().isoformat(timespec="seconds"),
+            }
+            self._guardar_index()
+
+    def registrar_meta(self, **meta):
+        """Datos de la captura (portales y keywords usadas) para que el benchmark repita las mismas búsquedas."""
+        with self._lock:
+            self.index["meta"].update(meta)
+            self._guardar_index()
+
+    @property
+    def meta(self) -> dict:
+        return self.index["meta"]
+
+    def cargar(self) -> Dict[str, Tuple[int, Dict[str, str], bytes]]:
+        """Todas las respuestas en memoria (el servidor no lee disco mientras se mide)."""
+        respuestas = {}
+        for clave, r in self.index["respuestas"].items():
+            with open(os.path.join(self.directorio, "cuerpos", r["cuerpo"]), "rb") as f:
+                respuestas[clave] = (r["status"], r["cabeceras"], gzip.decompress(f.read()))
+        return respuestas
+
+
+# --- ESTADO DEL PROCESO ---
+_captura: Optional[ArchivoFixtures] = ArchivoFixtures(PORTAL_CAPTURA_DIR) if PORTAL_CAPTURA_DIR else None
+_replay = PORTAL_REPLAY_URL.rstrip("/")
+
+
+def capturar(directorio: Optional[str]) -> Optional[ArchivoFixtures]:
+    """Activa (o con None desactiva) la grabación en `directorio`."""
+    global _captura
+    _captura = ArchivoFixtures(directorio) if directorio else None
+    return _captura
+
+
+def reproducir(base_url: Optional[str]):
+    """Apunta los scrapers al servidor de replay en `base_url` (None = portales reales)."""
+    global _replay
+    _replay = (base_url or "").rstrip("/")
+
+
+def en_replay() -> bool:
+    return bool(_replay)
+
+
+def url_portal(url: str) -> str:
+    """La URL real, o su equivalente en el servidor de replay: https://host/ruta?q -> <replay>/host/ruta?q."""
+    return _reescribir(_replay, url) if _replay else url
+
+
+def _reescribir(base: str, url: str, host: str = "") -> str:
+    partes = urlsplit(url)
+    return f"{base}/{partes.netloc or host}{partes.path}" + (f"?{partes.query}" if partes.query else "")
+
+
+def grabar_respuesta(respuesta, *args, **kwargs):
+    """Hook de respuesta de requests.Session (session.hooks['response'])."""
+    if _captura is not None:
+        _captura.grabar(respuesta.url, respuesta.status_code, dict(respuesta.headers), respuesta.content)
+    return respuesta
+
+
+def grabar_pagina(url: str, page):
+    """Graba el DOM renderizado de una página de Playwright bajo la URL que se pidió."""
+    if _captura is not None:
+        html = _SCRIPTS.sub("", page.content())
+        _captura.grabar(url, 200, {"content-type": "text/html; charset=utf-8"}, html.encode("utf-8"))
+
+
+def aislar_pagina(page):
+    """En replay, el navegador solo llega al servidor local (CSS, imágenes y trackers se abortan)."""
+    if _replay:
+        page.route("**/*", lambda route: route.continue_() if route.request.url.startswith(_replay) else route.abort())
+
+
+# --- SERVIDOR DE REPLAY ---
+class ServidorReplay:
+    """
+    Sirve un ArchivoFixtures en http://host:puerto/<host original>/<ruta>?<query>.
+    latencia_ms ± jitter_ms antes de cada respuesta; con probabilidad tasa_error se responde
+    codigo_error en vez del fixture (codigo_error=0: se corta la conexión sin responder).
+    """
+
+    def __init__(self, archivo: ArchivoFixtures, latencia_ms: float = 0, jitter_ms: float = 0,
+                 tasa_error: float = 0.0, codigo_error: int = 503, semilla: int = None,
+                 host: str = PORTAL_REPLAY_HOST, puerto: int = PORTAL_REPLAY_PUERTO):
+        self.respuestas = archivo.cargar()
+        self.latencia_ms = latencia_ms
+        self.jitter_ms = jitter_ms
+        self.tasa_error = tasa_error
+        self.codigo_error = codigo_error
+        self.host = host
+        self.puerto = puerto
+        self.stats = Counter()
+        self._azar = random.Random(semilla)
+        self._lock = threading.Lock()
+        self._servidor = None
+
+    @property
+    def url(self) -> str:
+        return f"http://{self.host}:{self.puerto}"
+
+    def _sortear(self) -> Tuple[float, bool]:
+        with self._lock:
+            espera = max(0.0, self.latencia_ms + self._azar.uniform(-self.jitter_ms, self.jitter_ms)) / 1000
+            return espera, self._azar.random() < self.tasa_error
+
+    def _contar(self, clave: str, resultado: str):
+        with self._lock:
+            self.stats[resultado] += 1
+            self.stats[f"{resultado}:{clave.split('/', 1)[0]}"] += 1
+
+    def iniciar(self) -> "ServidorReplay":
+        servidor = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def do_GET(self):
+                clave = unquote(self.path.lstrip("/"))
+                espera, fallar = servidor._sortear()
+                if espera:
+                    time.sleep(espera)
+                if fallar:
+                    servidor._contar(clave, "errores")
+                    if not servidor.codigo_error:
+                        self.close_connection = True
+                        self.connection.shutdown(socket.SHUT_RDWR)
+                        return
+                    self._responder(servidor.codigo_error, {"content-type": "text/plain"}, b"error inyectado")
+                    return
+                if clave not in servidor.respuestas:
+                    servidor._contar(clave, "sin_fixture")
+                    self._responder(404, {"content-type": "text/plain"}, f"sin fixture: {clave}".encode("utf-8"))
+                    return
+                status, cabeceras, cuerpo = servidor.respuestas[clave]
+                if "location" in cabeceras:
+                    # Redirecciones grabadas (absolutas o relativas al host) -> la misma ruta en el servidor
+                    destino = _reescribir(servidor.url, cabeceras["location"], host=clave.split("/", 1)[0])
+                    cabeceras = dict(cabeceras, location=destino)
+                servidor._contar(clave, "servidas")
+                self._responder(status, cabeceras, cuerpo)
+
+            def _responder(self, status: int, cabeceras: Dict[str, str], cuerpo: bytes):
+                self.send_response(status)
+                for nombre, valor in cabeceras.items():
+                    self.send_header(nombre, valor)
+                self.send_header("Content-Length", str(len(cuerpo)))
+                self.end_headers()
+                self.wfile.write(cuerpo)
+
+            def log_message(self, *args):
+                pass
+
+        self._servidor = ThreadingHTTPServer((self.host, self.puerto), Handler)
+        self._servidor.daemon_threads = True
+        # Con puerto 0 el sistema asigna uno libre
+        self.puerto = self._servidor.server_address[1]
+        threading.Thread(target=self._servidor.serve_forever, name="portal-replay", daemon=True).start()
+        return self
+
+    def detener(self):
+        if self._servidor:
+            self._servidor.shutdown()
+            self._servidor.server_close()
+            self._servidor = None
+
@@ -0,0 +1,141 @@
+"""
+Script: Profiling.py
+Purpose: Modo --profile de los entry points. Cada etapa (collect, filter, pack, publish...) se mide con:
+         - muestreo de pilas de TODOS los hilos (los scrapers corren en pools) -> <etapa>.collapsed,
+           formato "pila;plegada N" listo para flamegraph.pl / speedscope / inferno;
+         - cProfile determinista del hilo que ejecuta la etapa -> <etapa>.prof (pstats/snakeviz) y <etapa>.top.txt;
+         - snapshots de tracemalloc al inicio y fin -> <etapa>.alloc.txt (sitios que más memoria sumaron + pico).
+         Todo queda en <directorio de la ejecución>/profile/ junto a un resumen.json.
+         tracemalloc y cProfile agregan overhead: los tiempos absolutos son mayores que sin --profile.
+"""
+import os
+import sys
+import json
+import time
+import pstats
+import cProfile
+import threading
+import tracemalloc
+from collections import Counter
+from contextlib import contextmanager
+
+from config import PERFIL_INTERVALO_S, PERFIL_TOP, PERFIL_TRACEMALLOC_FRAMES
+
+# Hojas de pila que solo esperan (pools ociosos, Event.wait): se omiten para que el gráfico muestre trabajo
+_ARCHIVOS_ESPERA = {"threading.py", "queue.py", "selectors.py"}
+
+
+def _marco(code) -> str:
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+
+class _Muestreador(threading.Thread):
+    """Toma la pila de cada hilo cada `intervalo` segundos y cuenta las pilas plegadas."""
+
+    def __init__(self, intervalo: float):
+        super().__init__(name="perfil-muestreo", daemon=True)
+        self.intervalo = intervalo
+        self.pilas = Counter()
+        self.muestras = 0
+        self._fin = threading.Event()
+
+    def run(self):
+        propio = threading.get_ident()
+        while not self._fin.wait(self.intervalo):
+            nombres = {t.ident: t.name for t in threading.enumerate()}
+            for ident, frame in sys._current_frames().items():
+                if ident == propio or os.path.basename(frame.f_code.co_filename) in _ARCHIVOS_ESPERA:
+                    continue
+                pila = []
+                while frame is not None:
+                    pila.append(_marco(frame.f_code))
+                    frame = frame.f_back
+                pila.append(nombres.get(ident, f"thread-{ident}"))
+                self.pilas[";".join(reversed(pila))] += 1
+            self.muestras += 1
+
+    def detener(self) -> Counter:
+        self._fin.set()
+        self.join()
+        return self.pilas
+
+
+class Perfilador:
+    """
+    Uso:
+        perfil = Perfilador(os.path.join(checkpoint.dir, "profile"), activo=args.profile)
+        with perfil.etapa("collect"):
+            ...
+        perfil.cerrar()
+    Inactivo, etapa() no hace nada (el código de las etapas no cambia con o sin --profile).
+    """
+
+    def __init__(self, directorio: str, activo: bool = True, intervalo: float = PERFIL_INTERVALO_S, top: int = PERFIL_TOP):
+        self.directorio = directorio
+        self.activo = activo
+        self.intervalo = intervalo
+        self.top = top
+        self.resumen = {}
+        if activo:
+            os.makedirs(directorio, exist_ok=True)
+            if not tracemalloc.is_tracing():
+                tracemalloc.start(PERFIL_TRACEMALLOC_FRAMES)
+
+    @contextmanager
+    def etapa(self, nombre: str):
+        if not self.activo:
+            yield
+            return
+        muestreador = _Muestreador(self.intervalo)
+        perfil = cProfile.Profile()
+        tracemalloc.reset_peak()
+        antes = tracemalloc.take_snapshot()
+        inicio, cpu = time.perf_counter(), time.process_time()
+        muestreador.start()
+        perfil.enable()
+        try:
+            yield
+        finally:
+            perfil.disable()
+            pilas = muestreador.detener()
+            segundos, cpu = time.perf_counter() - inicio, time.process_time() - cpu
+            _, pico = tracemalloc.get_traced_memory()
+            despues = tracemalloc.take_snapshot()
+            self._escribir(nombre, perfil, pilas, antes, despues)
+            self.resumen[nombre] = {
+                "segundos": round(segundos, 3), "cpu_s": round(cpu, 3), "muestras": muestreador.muestras,
+                "pico_mb": round(pico / 2 ** 20, 2),
+                "neto_mb": round(sum(s.size_diff for s in despues.compare_to(antes, "filename")) / 2 ** 20, 2),
+            }
+            print(f"⏱️  [profile] {nombre}: {segundos:.2f}s (cpu {cpu:.2f}s), pico {self.resumen[nombre]['pico_mb']} MB")
+
+    def _ruta(self, nombre: str, extension: str) -> str:
+        return os.path.join(self.directorio, f"{nombre}{extension}")
+
+    def _escribir(self, nombre: str, perfil: cProfile.Profile, pilas: Counter, antes, despues):
+        with open(self._ruta(nombre, ".collapsed"), "w", encoding="utf-8") as f:
+            for pila, n in pilas.most_common():
+                f.write(f"{pila} {n}\n")
+
+        perfil.dump_stats(self._ruta(nombre, ".prof"))
+        with open(self._ruta(nombre, ".top.txt"), "w", encoding="utf-8") as f:
+            pstats.Stats(perfil, stream=f).sort_stats("cumulative").print_stats(self.top * 2)
+
+        filtros = [tracemalloc.Filter(False, tracemalloc.__file__), tracemalloc.Filter(False, __file__)]
+        diferencias = despues.filter_traces(filtros).compare_to(antes.filter_traces(filtros), "traceback")
+        with open(self._ruta(nombre, ".alloc.txt"), "w", encoding="utf-8") as f:
+            f.write(f"Top {self.top} sitios de asignación (neto durante '{nombre}')\n\n")
+            for i, estad in enumerate(diferencias[:self.top], 1):
+                f.write(f"#{i}: {estad.size_diff / 1024:+.1f} KiB en {estad.count_diff:+d} bloques "
+                        f"(total {estad.size / 1024:.1f} KiB)\n")
+                for linea in estad.traceback.format():
+                    f.write(f"    {linea}\n")
+                f.write("\n")
+
+    def cerrar(self):
+        if not self.activo:
+            return
+        with open(os.path.join(self.directorio, "resumen.json"), "w", encoding="utf-8") as f:
+            json.dump(self.resumen, f, ensure_ascii=False, indent=2)
+        tracemalloc.stop()
+        print(f"⏱️  [profile] Resultados en {self.directorio} (*.collapsed -> flamegraph.pl / speedscope)")
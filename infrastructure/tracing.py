@@ -0,0 +1,284 @@
+"""
+Script: Tracing.py
+Purpose: Una traza por vacante, con un span por etapa (collect, filtros, LLM, publish, Sheets), para
+         ubicar la cola de latencia y las vacantes que se pierden en el camino.
+         Con TRACING_DESTINO="otlp" y el SDK de OpenTelemetry instalado se exporta a un collector
+         OTLP (endpoint estándar: OTEL_EXPORTER_OTLP_ENDPOINT). Si no, los spans se agregan a un
+         JSONL en TRACES_DIR/<run_id>.jsonl con los campos de OTLP (traceId, spanId, parentSpanId...).
+         Las vacantes que no llegan a cerrarse (descartadas o guardadas) se marcan `lost` al finalizar.
+
+Uso:
+    tracing.iniciar(run_id)
+    with tracing.span(vacante, "filter.relevance") as attrs:
+        attrs["outcome"] = "kept"
+    tracing.cerrar(vacante, "dropped", filter="already_stored")
+    tracing.finalizar()
+
+    python infrastructure/tracing.py traces/<run_id>.jsonl    # resumen: p50/p95/máx por span y perdidas
+"""
+import os
+import sys
+import json
+import time
+import threading
+from collections import OrderedDict, defaultdict
+from contextlib import contextmanager
+from typing import Dict, Optional
+
+from config import TRACING_DESTINO, TRACES_DIR
+
+SERVICIO = "scraping-ia"
+# Trazas ya cerradas que aún pueden recibir spans tardíos (ej: la réplica a Sheets tras guardar)
+MAX_CERRADAS = 10000
+
+
+def clave_traza(v: dict) -> str:
+    """Identifica la vacante en todas las etapas (URL; sin URL, empresa|título)."""
+    return (v.get("url") or "").strip() or f"{v.get('empresa', '')}|{v.get('titulo', '')}"
+
+
+def _atributo(valor):
+    return valor if isinstance(valor, (str, bool, int, float)) else str(valor)
+
+
+# --- EXPORTADORES ---
+class _ExportadorJSON:
+    """Un span por línea, escrito al terminar el span (el archivo sirve aunque el proceso muera)."""
+
+    def __init__(self, run_id: str, directorio: str):
+        os.makedirs(directorio, exist_ok=True)
+        self.directorio = directorio
+        self.ruta = os.path.join(directorio, f"{run_id}.jsonl")
+        self._f = open(self.ruta, "a", encoding="utf-8")
+        self._lock = threading.Lock()
+
+    def rotar(self, run_id: str):
+        with self._lock:
+            self._f.close()
+            self.ruta = os.path.join(self.directorio, f"{run_id}.jsonl")
+            self._f = open(self.ruta, "a", encoding="utf-8")
+
+    def raiz(self, atributos: dict, inicio_ns: int) -> dict:
+        return {"traceId": os.urandom(16).hex(), "spanId": os.urandom(8).hex(), "inicio": inicio_ns, "attrs": atributos}
+
+    def _escribir(self, registro: dict):
+        with self._lock:
+            self._f.write(json.dumps(registro, ensure_ascii=False) + "\n")
+            self._f.flush()
+
+    def hijo(self, raiz: dict, nombre: str, inicio_ns: int, fin_ns: int, atributos: dict, error: str = None):
+        self._escribir({
+            "traceId": raiz["traceId"], "spanId": os.urandom(8).hex(), "parentSpanId": raiz["spanId"],
+            "name": nombre, "startTimeUnixNano": inicio_ns, "endTimeUnixNano": fin_ns,
+            "attributes": atributos, "status": "ERROR" if error else "OK", **({"error": error} if error else {}),
+        })
+
+    def cerrar_raiz(self, raiz: dict, fin_ns: int, atributos: dict):
+        self._escribir({
+            "traceId": raiz["traceId"], "spanId": raiz["spanId"], "parentSpanId": None, "name": "vacancy",
+            "startTimeUnixNano": raiz["inicio"], "endTimeUnixNano": fin_ns,
+            "attributes": {**raiz["attrs"], **atributos},
+            "status": "ERROR" if atributos.get("outcome") == "lost" else "OK",
+        })
+
+    def apagar(self):
+        with self._lock:
+            self._f.close()
+
+
+class _ExportadorOTel:
+    """Mismos spans vía el SDK de OpenTelemetry (BatchSpanProcessor + exportador OTLP/HTTP)."""
+
+    def __init__(self, run_id: str):
+        from opentelemetry import trace
+        from opentelemetry.sdk.resources import Resource
+        from opentelemetry.sdk.trace import TracerProvider
+        from opentelemetry.sdk.trace.export import BatchSpanProcessor
+        from opentelemetry.exporter.otlp.proto.http.trace_exporter import OTLPSpanExporter
+
+        self._trace = trace
+        self.provider = TracerProvider(resource=Resource.create({"service.name": SERVICIO, "run.id": run_id}))
+        self.provider.add_span_processor(BatchSpanProcessor(OTLPSpanExporter()))
+        self.tracer = self.provider.get_tracer(SERVICIO)
+        self.ruta = os.getenv("OTEL_EXPORTER_OTLP_ENDPOINT", "http://localhost:4318")
+
+    def raiz(self, atributos: dict, inicio_ns: int):
+        return self.tracer.start_span("vacancy", attributes=atributos, start_time=inicio_ns)
+
+    def hijo(self, raiz, nombre: str, inicio_ns: int, fin_ns: int, atributos: dict, error: str = None):
+        from opentelemetry.trace import Status, StatusCode
+        span = self.tracer.start_span(nombre, context=self._trace.set_span_in_context(raiz),
+                                      attributes=atributos, start_time=inicio_ns)
+        if error:
+            span.set_status(Status(StatusCode.ERROR, error))
+        span.end(end_time=fin_ns)
+
+    def cerrar_raiz(self, raiz, fin_ns: int, atributos: dict):
+        from opentelemetry.trace import Status, StatusCode
+        raiz.set_attributes(atributos)
+        if atributos.get("outcome") == "lost":
+            raiz.set_status(Status(StatusCode.ERROR, "lost"))
+        raiz.end(end_time=fin_ns)
+
+    def apagar(self):
+        self.provider.shutdown()  # vacía el BatchSpanProcessor
+
+
+# --- ESTADO DEL PROCESO ---
+_lock = threading.Lock()
+_exportador = None
+_raices: Dict[str, object] = {}
+_cerradas: "OrderedDict[str, object]" = OrderedDict()
+_stats = {"vacantes": 0, "spans": 0, "cerradas": defaultdict(int)}
+
+
+def iniciar(run_id: str, destino: str = TRACING_DESTINO, directorio: str = TRACES_DIR):
+    """Activa el tracing para la ejecución; sin llamar a esto, todas las funciones son no-op."""
+    global _exportador
+    finalizar()
+    if destino == "off":
+        return None
+    if destino == "otlp":
+        try:
+            _exportador = _ExportadorOTel(run_id)
+        except ImportError:
+            print("⚠️ OpenTelemetry no está instalado (pip install opentelemetry-sdk "
+                  "opentelemetry-exporter-otlp-proto-http): trazas a JSON.")
+    if _exportador is None:
+        _exportador = _ExportadorJSON(run_id, directorio)
+    return _exportador.ruta
+
+
+def activo() -> bool:
+    return _exportador is not None
+
+
+def rotar(run_id: str):
+    """Procesos de larga vida (daemon): los spans siguen en TRACES_DIR/<run_id>.jsonl sin cerrar las trazas abiertas."""
+    if isinstance(_exportador, _ExportadorJSON):
+        _exportador.rotar(run_id)
+
+
+def _raiz(v: dict, inicio_ns: int = None, crear: bool = True):
+    """
+    Traza abierta de la vacante. Con crear=True, una vacante cuya traza ya se cerró (ej: recolectada
+    de nuevo en otro ciclo del daemon) empieza una traza nueva; con crear=False el span tardío se
+    agrega a la cerrada (ej: la réplica a Sheets tras guardar).
+    """
+    clave = clave_traza(v)
+    with _lock:
+        raiz = _raices.get(clave) or (None if crear else _cerradas.get(clave))
+        if raiz is None and crear:
+            _cerradas.pop(clave, None)
+            atributos = {"vacancy.key": clave, "vacancy.title": str(v.get("titulo", "")),
+                         "vacancy.company": str(v.get("empresa", ""))}
+            raiz = _raices[clave] = _exportador.raiz(atributos, inicio_ns or time.time_ns())
+            _stats["vacantes"] += 1
+        return raiz
+
+
+def registrar(v: dict, nombre: str, inicio: float, fin: float, error: str = None, crear: bool = True, **atributos):
+    """
+    Span ya medido (`inicio`/`fin` de time.time()), ej: una búsqueda compartida por sus vacantes.
+    Con crear=False solo se agrega a trazas de esta ejecución (ej: réplica de filas de corridas previas).
+    """
+    if _exportador is None:
+        return
+    inicio_ns, fin_ns = int(inicio * 1e9), int(fin * 1e9)
+    raiz = _raiz(v, inicio_ns, crear)
+    if raiz is None:
+        return
+    _exportador.hijo(raiz, nombre, inicio_ns, fin_ns, {k: _atributo(a) for k, a in atributos.items()}, error)
+    _stats["spans"] += 1
+
+
+@contextmanager
+def span(v: dict, nombre: str, **atributos):
+    """Mide el bloque como span de la vacante; el dict entregado permite agregar atributos."""
+    if _exportador is None:
+        yield atributos
+        return
+    inicio, error = time.time(), None
+    try:
+        yield atributos
+    except Exception as e:
+        error = f"{type(e).__name__}: {e}"
+        raise
+    finally:
+        registrar(v, nombre, inicio, time.time(), error=error, **atributos)
+
+
+def cerrar(v: dict, resultado: str, **atributos):
+    """Fin de la traza: `resultado` = dropped | stored | ... (con atributos como filter=...)."""
+    if _exportador is None:
+        return
+    with _lock:
+        raiz = _raices.pop(clave_traza(v), None)
+        if raiz is None:
+            return
+        _cerradas[clave_traza(v)] = raiz
+        if len(_cerradas) > MAX_CERRADAS:
+            _cerradas.popitem(last=False)
+    _exportador.cerrar_raiz(raiz, time.time_ns(), {"outcome": resultado, **{k: _atributo(a) for k, a in atributos.items()}})
+    _stats["cerradas"][resultado] += 1
+
+
+def finalizar() -> Optional[dict]:
+    """Cierra como `lost` las trazas abiertas, vacía el exportador y retorna un resumen."""
+    global _exportador
+    if _exportador is None:
+        return None
+    with _lock:
+        abiertas = list(_raices.items())
+        _raices.clear()
+        _cerradas.clear()
+    for clave, raiz in abiertas:
+        _exportador.cerrar_raiz(raiz, time.time_ns(), {"outcome": "lost"})
+    _exportador.apagar()
+    resumen = {"destino": _exportador.ruta, "vacantes": _stats["vacantes"], "spans": _stats["spans"],
+               "cerradas": dict(_stats["cerradas"]), "perdidas": len(abiertas)}
+    _exportador = None
+    _stats.update(vacantes=0, spans=0, cerradas=defaultdict(int))
+    return resumen
+
+
+# --- ANÁLISIS DEL JSONL ---
+def resumir_archivo(ruta: str, top: int = 10) -> str:
+    """p50/p95/máx por nombre de span, vacantes más lentas y perdidas."""
+    duraciones, raices, lineas = defaultdict(list), [], []
+    with open(ruta, "r", encoding="utf-8") as f:
+        for linea in f:
+            try:
+                s = json.loads(linea)
+            except ValueError:
+                continue
+            ms = (s["endTimeUnixNano"] - s["startTimeUnixNano"]) / 1e6
+            if s.get("parentSpanId"):
+                duraciones[s["name"]].append(ms)
+            else:
+                raices.append((ms, s["attributes"]))
+
+    lineas.append(f"{'span':<24} {'n':>6} {'p50 ms':>10} {'p95 ms':>10} {'máx ms':>10}")
+    for nombre, valores in sorted(duraciones.items()):
+        valores.sort()
+        p = lambda q: valores[min(len(valores) - 1, int(q * len(valores)))]
+        lineas.append(f"{nombre:<24} {len(valores):>6} {p(0.5):>10.1f} {p(0.95):>10.1f} {valores[-1]:>10.1f}")
+
+    resultados = defaultdict(int)
+    for _, a in raices:
+        resultados[a.get("outcome", "?") + (f" ({a['filter']})" if a.get("filter") else "")] += 1
+    lineas.append("\nResultado por vacante: " + ", ".join(f"{k}: {n}" for k, n in sorted(resultados.items())))
+    lineas.append(f"\nVacantes más lentas (top {top}):")
+    for ms, a in sorted(raices, key=lambda r: -r[0])[:top]:
+        lineas.append(f"  {ms:>10.1f} ms  {a.get('outcome', '?'):<8} {a.get('vacancy.key')}")
+    perdidas = [a.get("vacancy.key") for _, a in raices if a.get("outcome") == "lost"]
+    if perdidas:
+        lineas.append(f"\nPerdidas ({len(perdidas)}): " + ", ".join(perdidas[:top]))
+    return "\n".join(lineas)
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2:
+        print("Uso: python infrastructure/tracing.py <traces/RUN_ID.jsonl>")
+        sys.exit(1)
+    print(resumir_archivo(sys.argv[1]))
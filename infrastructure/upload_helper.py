@@ -1,3 +1,40 @@
+import os
+import json
+import time
+import shutil
+import hashlib
+import threading
+
+from google import genai
+
+from config import ATTACHMENT_CACHE_PATH, ATTACHMENT_TTL_HORAS
+
+MIME_TYPES = {
+    ".png": "image/png",
+    ".jpg": "image/jpeg",
+    ".jpeg": "image/jpeg",
+    ".webp": "image/webp",
+    ".pdf": "application/pdf",
+    ".txt": "text/plain",
+    ".md": "text/markdown",
+    ".csv": "text/csv"
+}
+
+
+def detectar_mime(path: str) -> str:
+    ext = os.path.splitext(path)[1].lower()
+    return MIME_TYPES.get(ext, "application/octet-stream")
+
+
+def hash_archivo(path: str, chunk_size: int = 1024 * 1024) -> str:
+    """Calcula el SHA-256 de un archivo leyendo por bloques (sin cargarlo entero en memoria)."""
+    sha = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            sha.update(chunk)
+    return sha.hexdigest()
+
+
 def preparar_archivo(path: str):
     """
     Lee un archivo local y retorna un objeto Part de genai para enviar.
@@ -6,40 +43,145 @@ def preparar_archivo(path: str):
     if not os.path.exists(path):
         raise FileNotFoundError(f"No se encuentra el archivo: {path}")
 
-    mime_types = {
-        ".png": "image/png",
-        ".jpg": "image/jpeg", 
-        ".jpeg": "image/jpeg",
-        ".webp": "image/webp",
-        ".pdf": "application/pdf",
-        ".txt": "text/plain",
-        ".md": "text/markdown",
-        ".csv": "text/csv"
-    }
-    
-    ext = os.path.splitext(path)[1].lower()
-    mime_type = mime_types.get(ext, "application/octet-stream")
-    
+    mime_type = detectar_mime(path)
+
     with open(path, "rb") as f:
         data = f.read()
-        
+
     return genai.types.Part.from_bytes(data=data, mime_type=mime_type)
 
-def enviar_mensaje_multimodal(chat, texto: str, archivo_path: str = None):
+
+class SubidorGemini:
+    """Sube archivos al endpoint de Files de Gemini y retorna su URI."""
+
+    def __init__(self, client):
+        self.client = client
+
+    def subir(self, path: str, mime_type: str) -> str:
+        archivo = self.client.files.upload(file=path, config={"mime_type": mime_type})
+        return archivo.uri
+
+
+class SubidorLocal:
+    """Sustituto local del endpoint de Files (para pruebas): copia el archivo a un directorio."""
+
+    def __init__(self, directorio: str):
+        self.directorio = directorio
+        os.makedirs(directorio, exist_ok=True)
+
+    def subir(self, path: str, mime_type: str) -> str:
+        destino = os.path.join(self.directorio, f"{hash_archivo(path)}{os.path.splitext(path)[1]}")
+        shutil.copyfile(path, destino)
+        return f"file://{destino}"
+
+
+class GestorAdjuntos:
+    """
+    Deduplica adjuntos del chat: cada archivo se identifica por su hash de contenido,
+    se sube una sola vez y luego se envía como referencia (Part.from_uri) mientras
+    el handle no expire. Lleva contadores de bytes subidos/evitados por sesión.
+    """
+
+    def __init__(self, subidor, cache_path: str = ATTACHMENT_CACHE_PATH,
+                 ttl_segundos: float = ATTACHMENT_TTL_HORAS * 3600):
+        self.subidor = subidor
+        self.cache_path = cache_path
+        self.ttl_segundos = ttl_segundos
+        self._lock = threading.Lock()
+        self._cache = self._cargar_cache()
+        self.stats = {
+            "subidas": 0,
+            "reutilizadas": 0,
+            "bytes_subidos": 0,
+            "bytes_evitados": 0,
+            "segundos_subiendo": 0.0,
+            "segundos_ahorrados": 0.0,
+        }
+
+    def _cargar_cache(self) -> dict:
+        if not self.cache_path or not os.path.exists(self.cache_path):
+            return {}
+        try:
+            with open(self.cache_path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except Exception as e:
+            print(f"⚠️ Error leyendo cache de adjuntos: {e}")
+            return {}
+
+    def _guardar_cache(self):
+        if not self.cache_path:
+            return
+        ahora = time.time()
+        vigentes = {h: e for h, e in self._cache.items() if e["expira"] > ahora}
+        try:
+            with open(self.cache_path, "w", encoding="utf-8") as f:
+                json.dump(vigentes, f, indent=2)
+        except Exception as e:
+            print(f"⚠️ Error guardando cache de adjuntos: {e}")
+
+    def preparar(self, path: str):
+        """Retorna un Part que referencia el archivo, subiéndolo solo si su contenido es nuevo."""
+        if not os.path.exists(path):
+            raise FileNotFoundError(f"No se encuentra el archivo: {path}")
+
+        mime_type = detectar_mime(path)
+        tamano = os.path.getsize(path)
+        digest = hash_archivo(path)
+
+        with self._lock:
+            entrada = self._cache.get(digest)
+            if entrada and entrada["expira"] > time.time():
+                self.stats["reutilizadas"] += 1
+                self.stats["bytes_evitados"] += tamano
+                self.stats["segundos_ahorrados"] += entrada.get("segundos_subida", 0.0)
+                return genai.types.Part.from_uri(file_uri=entrada["uri"], mime_type=entrada["mime_type"])
+
+        inicio = time.perf_counter()
+        uri = self.subidor.subir(path, mime_type)
+        duracion = time.perf_counter() - inicio
+
+        with self._lock:
+            self._cache[digest] = {
+                "uri": uri,
+                "mime_type": mime_type,
+                "bytes": tamano,
+                "segundos_subida": round(duracion, 3),
+                "expira": time.time() + self.ttl_segundos,
+            }
+            self.stats["subidas"] += 1
+            self.stats["bytes_subidos"] += tamano
+            self.stats["segundos_subiendo"] += duracion
+            self._guardar_cache()
+
+        return genai.types.Part.from_uri(file_uri=uri, mime_type=mime_type)
+
+    def resumen(self) -> str:
+        s = self.stats
+        return (
+            f"📎 Adjuntos: {s['subidas']} subidos ({s['bytes_subidos'] / 1024:.0f} KB, {s['segundos_subiendo']:.1f}s) | "
+            f"{s['reutilizadas']} reutilizados ({s['bytes_evitados'] / 1024:.0f} KB evitados, ~{s['segundos_ahorrados']:.1f}s ahorrados)"
+        )
+
+
+def enviar_mensaje_multimodal(chat, texto: str, archivo_path: str = None, gestor: GestorAdjuntos = None):
     """
     Envía un mensaje al chat, opcionalmente con un archivo adjunto.
+    Con `gestor`, el adjunto se envía como referencia deduplicada en vez de bytes en línea.
     """
     parts = []
     if texto:
         parts.append(genai.types.Part.from_text(text=texto))
-        
+
     if archivo_path:
         try:
-            file_part = preparar_archivo(archivo_path)
+            if gestor is not None:
+                file_part = gestor.preparar(archivo_path)
+            else:
+                file_part = preparar_archivo(archivo_path)
             parts.append(file_part)
         except Exception as e:
             return f"❌ Error adjuntando archivo: {e}"
-            
+
     try:
         response = chat.send_message(parts)
         return response.text
@@ -1,5 +1,6 @@
 from datetime import datetime
 from pypdf import PdfReader
+from bs4 import BeautifulSoup
 from config import PALABRAS_CLAVE, PALABRAS_EXCLUIDAS
 
 def es_vacante_valida(titulo, descripcion):
@@ -32,6 +33,23 @@ def es_vacante_valida(titulo, descripcion):
     return False
 
 
+def evaluar_vacante(vacante, palabras_relevantes):
+    """
+    Filtros por palabras de una vacante, sin estado (se puede ejecutar en cpu_pool):
+    (pasa es_vacante_valida, keywords de `palabras_relevantes` presentes en título + descripción).
+    """
+    titulo, descripcion = vacante.get("titulo"), vacante.get("descripcion")
+    if not es_vacante_valida(titulo, descripcion):
+        return False, []
+    texto_completo = ((titulo or "") + " " + (descripcion or "")).lower()
+    return True, [kw for kw in palabras_relevantes if kw in texto_completo]
+
+
+def html_a_texto(html):
+    """Texto plano de una descripción HTML."""
+    return BeautifulSoup(html or "", "html.parser").get_text(separator=" ", strip=True)
+
+
 def cargar_texto_pdf(ruta_pdf: str) -> str:
     """
     Lee el texto de un archivo PDF.
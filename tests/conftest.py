@@ -0,0 +1,6 @@
+import os
+import sys
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+for carpeta in ("infrastructure", "data-engineering"):
+    sys.path.append(os.path.join(BASE_DIR, carpeta))
@@ -0,0 +1,99 @@
+import re
+from types import SimpleNamespace
+
+import pytest
+
+import sheet_migration
+from sheet_snapshot import FILA_DATOS
+
+
+class HojaFalsa:
+    """Grilla en memoria con el recorte de la API: sin filas ni celdas vacías al final."""
+
+    def __init__(self, filas, row_count=50):
+        self.id = 0
+        self.spreadsheet = SimpleNamespace(id="test")
+        self.row_count = row_count
+        self.celdas = {}
+        for r, fila in enumerate(filas, start=1):
+            for c, valor in enumerate(fila):
+                self.celdas[(r, c)] = valor
+        self.lecturas = []
+
+    @staticmethod
+    def _rango(a1):
+        m = re.match(r"A(\d+):([A-Z]+)(\d+)", a1)
+        ancho = 0
+        for letra in m.group(2):
+            ancho = ancho * 26 + ord(letra) - 64
+        return int(m.group(1)), int(m.group(3)), ancho
+
+    def get(self, a1):
+        desde, hasta, ancho = self._rango(a1)
+        self.lecturas.append((desde, hasta))
+        filas = []
+        for r in range(desde, hasta + 1):
+            fila = [self.celdas.get((r, c), "") for c in range(ancho)]
+            while fila and fila[-1] == "":
+                fila.pop()
+            filas.append(fila)
+        while filas and not filas[-1]:
+            filas.pop()
+        return filas
+
+    def update(self, valores, a1):
+        desde, _, _ = self._rango(a1)
+        for i, fila in enumerate(valores):
+            for c, valor in enumerate(fila):
+                self.celdas[(desde + i, c)] = valor
+
+    def fila(self, r, ancho):
+        return [self.celdas.get((r, c), "") for c in range(ancho)]
+
+
+@pytest.fixture(autouse=True)
+def snapshot_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(sheet_migration, "SNAPSHOT_DIR", str(tmp_path))
+
+
+def _hoja(n_datos):
+    filas = [["meta"], ["url", "titulo", "empresa"]]
+    filas += [[f"u{i}", f"t{i}", f"e{i}"] for i in range(n_datos)]
+    return HojaFalsa(filas)
+
+
+def test_reescritura_reordena_y_no_lee_la_grilla_vacia():
+    hoja = _hoja(5)
+    sheet_migration.reescribir_por_bloques(hoja, ["url", "titulo", "empresa"], ["empresa", "url"], filas_por_bloque=2)
+
+    assert hoja.fila(FILA_DATOS, 3) == ["e0", "u0", ""]
+    assert hoja.fila(FILA_DATOS + 4, 3) == ["e4", "u4", ""]
+    # Se corta en el primer bloque vacío, no en row_count
+    assert hoja.lecturas[-1][0] <= FILA_DATOS + 6
+
+
+def test_caida_entre_update_y_checkpoint_no_remapea_filas_migradas(monkeypatch):
+    hoja = _hoja(5)
+    old, new = ["url", "titulo", "empresa"], ["empresa", "url"]
+    guardar = sheet_migration._guardar_checkpoint
+    llamadas = {"n": 0}
+
+    def guardar_y_caer(sheet, checkpoint):
+        # Muere justo después del primer update (antes de confirmar el bloque)
+        if "escribiendo" not in checkpoint and checkpoint["siguiente_fila"] > FILA_DATOS and llamadas["n"] == 0:
+            llamadas["n"] += 1
+            raise KeyboardInterrupt("caída simulada")
+        guardar(sheet, checkpoint)
+
+    monkeypatch.setattr(sheet_migration, "_guardar_checkpoint", guardar_y_caer)
+    with pytest.raises(KeyboardInterrupt):
+        sheet_migration.reescribir_por_bloques(hoja, old, new, filas_por_bloque=2)
+    # El primer bloque ya quedó migrado en la hoja
+    assert hoja.fila(FILA_DATOS, 3) == ["e0", "u0", ""]
+
+    monkeypatch.setattr(sheet_migration, "_guardar_checkpoint", guardar)
+    sheet_migration.reescribir_por_bloques(hoja, old, new, filas_por_bloque=2)
+
+    for i in range(5):
+        assert hoja.fila(FILA_DATOS + i, 3) == [f"e{i}", f"u{i}", ""]
+    assert hoja.fila(2, 3) == ["empresa", "url", ""]
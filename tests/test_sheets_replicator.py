@@ -0,0 +1,58 @@
+from types import SimpleNamespace
+
+import sheet_snapshot
+from sheets_replicator import ReplicadorSheets
+from vacancy_store import VacancyStore, HEADER_A_CAMPO, SYNC_OK
+
+URL = "https://portal.example/jobs/1"
+HEADERS = list(HEADER_A_CAMPO)
+
+
+class HojaFalsa:
+    """Solo la columna URL y los batchUpdate enviados; appendCells agrega filas tras la última."""
+
+    def __init__(self):
+        self.id = 0
+        self.urls = []
+        self.requests = []
+        self.al_enviar = None
+        self.spreadsheet = SimpleNamespace(batch_update=self._batch_update)
+
+    def _batch_update(self, body):
+        for req in body["requests"]:
+            self.requests.append(req)
+            if "appendCells" in req:
+                col_url = HEADERS.index("URL")
+                for fila in req["appendCells"]["rows"]:
+                    self.urls.append(fila["values"][col_url]["userEnteredValue"]["stringValue"])
+        if self.al_enviar:
+            self.al_enviar()
+
+    def snapshot(self, sheet, columnas):
+        return {"headers": HEADERS, "columnas": {"URL": list(self.urls)}, "n_filas": len(self.urls)}
+
+
+def test_edicion_durante_el_append_no_se_pierde(tmp_path, monkeypatch):
+    hoja = HojaFalsa()
+    monkeypatch.setattr(sheet_snapshot, "sincronizar", hoja.snapshot)
+    monkeypatch.setattr(sheet_snapshot, "registrar_celdas", lambda sheet, cambios: None)
+    store = VacancyStore(str(tmp_path / "vacantes.db"))
+    store.insertar_nuevas([{"url": URL, "titulo": "Data Engineer"}])
+    replicador = ReplicadorSheets(store, lambda: hoja)
+
+    # El análisis escribe Match % mientras el lote que agrega la fila está en vuelo
+    hoja.al_enviar = lambda: store.actualizar_campos(URL, match_percent="80")
+    replicador._sincronizar_lote()
+    hoja.al_enviar = None
+    assert store.obtener(URL)["sync_estado"] != SYNC_OK
+
+    hoja.requests.clear()
+    replicador._sincronizar_lote()
+
+    col = HEADERS.index("Match %")
+    escritas = [r["updateCells"] for r in hoja.requests
+                if "updateCells" in r and r["updateCells"]["start"]["columnIndex"] == col]
+    assert len(escritas) == 1
+    assert escritas[0]["start"]["rowIndex"] == sheet_snapshot.FILA_DATOS - 1
+    assert escritas[0]["rows"][0]["values"][0]["userEnteredValue"]["stringValue"] == "80"
+    assert store.obtener(URL)["sync_estado"] == SYNC_OK
@@ -0,0 +1,66 @@
+import pytest
+import requests
+from gspread.exceptions import APIError
+
+import sheets_scheduler
+from sheets_scheduler import PlanificadorSheets
+
+
+def test_ejecutar_retorna_el_resultado():
+    planificador = PlanificadorSheets()
+    assert isinstance(planificador.reintentos, int)
+    assert planificador.ejecutar(lambda: 42, escritura=False) == 42
+    assert planificador.stats["lecturas"] == 1
+
+
+def test_ejecutar_reintenta_errores_transitorios(monkeypatch):
+    monkeypatch.setattr(sheets_scheduler.time, "sleep", lambda s: None)
+    intentos = []
+
+    def fn():
+        intentos.append(1)
+        if len(intentos) < 3:
+            raise requests.exceptions.ConnectionError("caída")
+        return "ok"
+
+    planificador = PlanificadorSheets(reintentos=3)
+    assert planificador.ejecutar(fn, escritura=False) == "ok"
+    assert planificador.stats["reintentos"] == 2
+
+
+class _RespuestaError:
+    def __init__(self, codigo):
+        self.headers = {}
+        self.text = ""
+        self._codigo = codigo
+
+    def json(self):
+        return {"error": {"code": self._codigo, "message": "", "status": ""}}
+
+
+def _fallar_una_vez(error):
+    intentos = []
+
+    def fn():
+        intentos.append(1)
+        if len(intentos) == 1:
+            raise error
+        return "ok"
+    return fn, intentos
+
+
+def test_escritura_no_idempotente_no_se_reintenta_tras_timeout(monkeypatch):
+    monkeypatch.setattr(sheets_scheduler.time, "sleep", lambda s: None)
+    fn, intentos = _fallar_una_vez(requests.exceptions.ReadTimeout("sin respuesta"))
+
+    with pytest.raises(requests.exceptions.ReadTimeout):
+        PlanificadorSheets().ejecutar(fn, escritura=True)
+    assert len(intentos) == 1
+
+
+def test_escritura_no_idempotente_se_reintenta_si_no_se_proceso(monkeypatch):
+    monkeypatch.setattr(sheets_scheduler.time, "sleep", lambda s: None)
+    fn, intentos = _fallar_una_vez(APIError(_RespuestaError(429)))
+
+    assert PlanificadorSheets().ejecutar(fn, escritura=True) == "ok"
+    assert len(intentos) == 2
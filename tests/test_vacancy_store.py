@@ -0,0 +1,46 @@
+from vacancy_store import VacancyStore, SYNC_OK, SYNC_MODIFICADO, SYNC_NUEVO
+
+URL = "https://portal.example/jobs/1"
+
+
+def _store(tmp_path):
+    store = VacancyStore(str(tmp_path / "vacantes.db"))
+    store.insertar_nuevas([{"url": URL, "titulo": "Data Engineer"}])
+    return store
+
+
+def test_cambio_en_el_mismo_segundo_no_se_marca_sincronizado(tmp_path):
+    store = _store(tmp_path)
+    leida = store.sin_sincronizar()[0]
+    store.actualizar_campos(URL, match_percent="80")
+
+    store.marcar_sincronizadas({URL: leida["version"]}, {URL: 3})
+
+    fila = store.obtener(URL)
+    assert fila["sync_estado"] == SYNC_MODIFICADO
+    assert fila["row_idx"] == 3
+    assert "match_percent" in fila["campos_sucios"]
+
+
+def test_version_leida_se_marca_sincronizada(tmp_path):
+    store = _store(tmp_path)
+    leida = store.sin_sincronizar()[0]
+    assert leida["sync_estado"] == SYNC_NUEVO
+
+    store.marcar_sincronizadas({URL: leida["version"]}, {URL: 3})
+
+    fila = store.obtener(URL)
+    assert fila["sync_estado"] == SYNC_OK
+    assert fila["campos_sucios"] == "[]"
+
+
+def test_pendientes_match_excluye_un_cero_real(tmp_path):
+    store = VacancyStore(str(tmp_path / "vacantes.db"))
+    store.insertar_nuevas([
+        {"url": f"https://portal.example/jobs/{i}", "match_percent": match}
+        for i, match in enumerate(["", "Pendiente", "Nuevo", "0", "75"])
+    ])
+
+    pendientes = {v["Match %"] for v in store.pendientes_match()}
+
+    assert pendientes == {"", "Pendiente", "Nuevo"}